@@ -0,0 +1,327 @@
+import json
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import numpy as np
+from inventory import _parse_timestamp
+from journal import last_change_id
+
+FETCH_CHUNK = 100000
+
+# sale times as seconds since the epoch, so every sales column is an integer
+SALES_SQL = """
+    SELECT sale_id, stock_id, amount_sold, CAST(strftime('%s', sold_at) AS INTEGER), 1
+    FROM sales
+    """
+# archived sales only survive as per stock, per hour totals (archive.py);
+# they come first with sale id 0 and the hour as their time
+ARCHIVED_SQL = """
+    SELECT 0, stock_id, amount_sold, CAST(strftime('%s', hour) AS INTEGER), sales
+    FROM archived_sales
+    """
+
+def _read_ints(conn, sql, params, width):
+    # the rows of an all-integer query as an (n, width) int64 array, built a
+    # chunk at a time rather than from one list of every tuple
+    cursor = conn.execute(sql, params)
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(FETCH_CHUNK)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=np.int64))
+    return np.concatenate(chunks) if chunks else np.empty((0, width), dtype=np.int64)
+
+def _positions(ids, keys):
+    # where each key sits in the sorted ids, or -1 when it is not there
+    positions = np.searchsorted(ids, keys)
+    positions[positions >= len(ids)] = 0
+    found = len(ids) > 0
+    if found:
+        found = ids[positions] == keys
+    return np.where(found, positions, -1)
+
+def _epoch(value):
+    value = _parse_timestamp(value)
+    if value is None:
+        return None
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+
+class Columns:
+    # Same-length NumPy columns that grow by appending; capacity grows by a
+    # quarter so a run of small appends does not copy everything each time,
+    # without doubling the memory of a large snapshot on its first refresh.
+    def __init__(self, dtypes):
+        self.dtypes = dtypes
+        self.size = 0
+        self.data = {name: np.empty(0, dtype) for name, dtype in dtypes.items()}
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.data[name][:self.size]
+
+    def append(self, **columns):
+        count = len(next(iter(columns.values())))
+        needed = self.size + count
+        capacity = len(next(iter(self.data.values())))
+        if needed > capacity:
+            capacity = max(needed, capacity + capacity // 4)
+            for name, array in self.data.items():
+                grown = np.empty(capacity, array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.data[name] = grown
+        for name, values in columns.items():
+            self.data[name][self.size:needed] = values
+        self.size = needed
+
+    def keep(self, mask):
+        for name in self.data:
+            self.data[name] = self[name][mask]
+        self.size = int(np.count_nonzero(mask))
+
+    def nbytes(self):
+        return sum(array.nbytes for array in self.data.values())
+
+class AnalyticsSnapshot:
+    # A columnar copy of products, stocks, suppliers and sales in NumPy
+    # arrays, for questions that would otherwise scan and join the whole
+    # sales table: on-hand value per supplier, sell-through and per-product
+    # totals are one bincount each.
+    #
+    # load() reads everything once; refresh() then catches up through the
+    # change journal (journal.py): rows with ids above the ones already held
+    # are appended, and only the sales that were edited or deleted are read
+    # again. A change to an existing product, stock or supplier reloads that
+    # (small) table. If the journal has been compacted past the snapshot, or
+    # a sale it held has gone without a journaled delete, it loads afresh.
+    # Sales moved to the archive stay in the snapshot as they were; a fresh
+    # load reads them back from their per-hour summary.
+    def __init__(self, conn):
+        self.conn = conn
+        self.change_id = None
+
+    @contextmanager
+    def _consistent(self):
+        # everything one load or refresh reads comes from one snapshot of
+        # the database
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            self.conn.rollback()
+
+    def load(self):
+        with self._consistent():
+            self._load(last_change_id(self.conn))
+
+    def _load(self, change_id):
+        self._load_products()
+        self._load_stocks()
+        self._load_suppliers()
+        self.sales = Columns({
+            "sale_id": np.int64, "stock_id": np.int64, "amount": np.int64,
+            "sold_at": np.int64, "count": np.int64, "product": np.int64,
+        })
+        self._append_sales(_read_ints(self.conn, ARCHIVED_SQL, (), 5))
+        self._append_sales(_read_ints(self.conn, SALES_SQL + "ORDER BY sale_id", (), 5))
+        self.change_id = change_id
+
+    def _load_products(self):
+        rows = self.conn.execute(
+            "SELECT product_id, product_price, product_name FROM products ORDER BY product_id").fetchall()
+        self.product_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.prices = np.array([row[1] for row in rows], dtype=np.float64)
+        self.product_names = np.array([row[2] for row in rows], dtype=object)
+
+    def _append_products(self, after_id):
+        rows = self.conn.execute(
+            "SELECT product_id, product_price, product_name FROM products WHERE product_id > ? ORDER BY product_id",
+            (after_id,)).fetchall()
+        if rows:
+            self.product_ids = np.concatenate([self.product_ids, np.array([row[0] for row in rows], dtype=np.int64)])
+            self.prices = np.concatenate([self.prices, np.array([row[1] for row in rows], dtype=np.float64)])
+            self.product_names = np.concatenate([self.product_names, np.array([row[2] for row in rows], dtype=object)])
+
+    def _load_stocks(self, after_id=None):
+        rows = _read_ints(
+            self.conn,
+            "SELECT stock_id, product_id, stock_quantity FROM stocks WHERE stock_id > ? ORDER BY stock_id",
+            (after_id or 0,), 3)
+        if after_id is None:
+            self.stocks = Columns({"stock_id": np.int64, "product_id": np.int64, "quantity": np.int64})
+        self.stocks.append(stock_id=rows[:, 0], product_id=rows[:, 1], quantity=rows[:, 2])
+
+    def _load_suppliers(self, after_id=None):
+        rows = self.conn.execute(
+            "SELECT supplier_id, product_id, supplier_name FROM suppliers WHERE supplier_id > ? ORDER BY supplier_id",
+            (after_id or 0,)).fetchall()
+        if after_id is None:
+            self.suppliers = Columns({"supplier_id": np.int64, "product_id": np.int64, "name": object})
+        self.suppliers.append(
+            supplier_id=np.array([row[0] for row in rows], dtype=np.int64),
+            product_id=np.array([row[1] for row in rows], dtype=np.int64),
+            name=np.array([row[2] for row in rows], dtype=object))
+
+    def _append_sales(self, rows):
+        self.sales.append(
+            sale_id=rows[:, 0], stock_id=rows[:, 1], amount=rows[:, 2], sold_at=rows[:, 3], count=rows[:, 4],
+            product=self._sale_products(rows[:, 1]))
+
+    def _sale_products(self, stock_ids):
+        # product positions of the sales' stocks, -1 once a stock is gone
+        if not len(self.stocks):
+            return np.full(len(stock_ids), -1, dtype=np.int64)
+        positions = _positions(self.stocks["stock_id"], stock_ids)
+        products = _positions(self.product_ids, self.stocks["product_id"])[positions]
+        return np.where(positions >= 0, products, -1)
+
+    def _last_id(self, ids):
+        return int(ids[-1]) if len(ids) else 0
+
+    def refresh(self):
+        # returns whether anything changed since the last load or refresh
+        if self.change_id is None:
+            self.load()
+            return True
+        with self._consistent():
+            last = last_change_id(self.conn)
+            if last == self.change_id:
+                return False
+            first = self.conn.execute(
+                "SELECT MIN(change_id) FROM change_journal WHERE change_id > ?", (self.change_id,)).fetchone()[0]
+            if first != self.change_id + 1:
+                self._load(last)
+                return True
+            ops = set(self.conn.execute(
+                "SELECT DISTINCT table_name, op FROM change_journal WHERE change_id > ? AND change_id <= ?",
+                (self.change_id, last)))
+            if not self._apply(ops, last):
+                self._load(last)
+            self.change_id = last
+        return True
+
+    def _apply(self, ops, last):
+        relink = False
+        if ("products", "update") in ops or ("products", "delete") in ops:
+            self._load_products()
+            relink = True
+        elif ("products", "insert") in ops:
+            self._append_products(self._last_id(self.product_ids))
+        if ("stocks", "update") in ops or ("stocks", "delete") in ops:
+            self._load_stocks()
+            relink = True
+        elif ("stocks", "insert") in ops:
+            self._load_stocks(self._last_id(self.stocks["stock_id"]))
+        if ("suppliers", "update") in ops or ("suppliers", "delete") in ops:
+            self._load_suppliers()
+        elif ("suppliers", "insert") in ops:
+            self._load_suppliers(self._last_id(self.suppliers["supplier_id"]))
+
+        last_sale = self._last_id(self.sales["sale_id"])
+        if ("sales", "update") in ops or ("sales", "delete") in ops:
+            if not self._apply_sale_changes(last, last_sale):
+                return False
+        if relink:
+            self.sales.data["product"][:len(self.sales)] = self._sale_products(self.sales["stock_id"])
+        if ("sales", "insert") in ops:
+            self._append_sales(_read_ints(
+                self.conn, SALES_SQL + "WHERE sale_id > ? ORDER BY sale_id", (last_sale,), 5))
+        return True
+
+    def _apply_sale_changes(self, last, last_sale):
+        # re-reads the sales the journal says were edited or deleted; newer
+        # ones are read with the appended rows anyway
+        changed = {}
+        for row_id, op in self.conn.execute(
+                "SELECT row_id, op FROM change_journal "
+                "WHERE change_id > ? AND change_id <= ? AND table_name = 'sales' AND op != 'insert' AND row_id <= ?",
+                (self.change_id, last, last_sale)):
+            changed[row_id] = changed.get(row_id, False) or op == "delete"
+        if not changed:
+            return True
+        ids = np.array(sorted(changed), dtype=np.int64)
+        current = _read_ints(
+            self.conn, SALES_SQL + "WHERE sale_id IN (SELECT value FROM json_each(?)) ORDER BY sale_id",
+            (json.dumps(ids.tolist()),), 5)
+        # a sale that is gone but was only edited was archived meanwhile
+        gone = np.setdiff1d(ids, current[:, 0])
+        if any(not changed[int(sale_id)] for sale_id in gone):
+            return False
+        positions = _positions(self.sales["sale_id"], current[:, 0])
+        held = positions >= 0
+        positions, current = positions[held], current[held]
+        for column, index in (("stock_id", 1), ("amount", 2), ("sold_at", 3)):
+            self.sales.data[column][positions] = current[:, index]
+        self.sales.data["product"][positions] = self._sale_products(current[:, 1])
+        removed = _positions(self.sales["sale_id"], gone)
+        removed = removed[removed >= 0]
+        if len(removed):
+            mask = np.ones(len(self.sales), dtype=bool)
+            mask[removed] = False
+            self.sales.keep(mask)
+        return True
+
+    def _per_product(self, column, start=None, end=None):
+        # a sales column summed per product position, for sales between
+        # start and end inclusive
+        product = self.sales["product"]
+        mask = product >= 0
+        if start is not None:
+            mask &= self.sales["sold_at"] >= _epoch(start)
+        if end is not None:
+            mask &= self.sales["sold_at"] <= _epoch(end)
+        return np.bincount(
+            product[mask], weights=self.sales[column][mask], minlength=len(self.product_ids)).astype(np.int64)
+
+    def _units_sold(self, start=None, end=None):
+        return self._per_product("amount", start, end)
+
+    def _received(self):
+        product = _positions(self.product_ids, self.stocks["product_id"])
+        held = product >= 0
+        return np.bincount(
+            product[held], weights=self.stocks["quantity"][held], minlength=len(self.product_ids)).astype(np.int64)
+
+    def product_totals(self):
+        # (product_id, product_name, received, sales, units sold, on hand,
+        # revenue at the current price)
+        received, sold = self._received(), self._units_sold()
+        revenue = sold * self.prices
+        return list(zip(
+            self.product_ids.tolist(), self.product_names.tolist(), received.tolist(),
+            self._per_product("count").tolist(), sold.tolist(), (received - sold).tolist(),
+            revenue.round(2).tolist()))
+
+    def valuation_by_supplier(self):
+        # (supplier_name, value of what is on hand at product_price), most
+        # valuable first; a product with several suppliers counts for each
+        value = (self._received() - self._units_sold()) * self.prices
+        product = _positions(self.product_ids, self.suppliers["product_id"])
+        held = product >= 0
+        names, supplier = np.unique(self.suppliers["name"][held].astype(str), return_inverse=True)
+        totals = np.bincount(supplier, weights=value[product[held]], minlength=len(names))
+        order = np.argsort(-totals, kind="stable")
+        return list(zip(names[order].tolist(), totals[order].round(2).tolist()))
+
+    def sell_through(self, start=None, end=None):
+        # (product_id, product_name, units sold, on hand, rate): units sold
+        # between start and end over those plus what is on hand now; the
+        # rate is None for a product with neither
+        sold = self._units_sold(start, end)
+        on_hand = self._received() - self._units_sold()
+        available = sold + on_hand
+        rate = np.divide(sold, available, out=np.zeros(len(sold)), where=available > 0)
+        return [
+            (pid, name, units, left, round(r, 4) if units + left > 0 else None)
+            for pid, name, units, left, r in zip(
+                self.product_ids.tolist(), self.product_names.tolist(),
+                sold.tolist(), on_hand.tolist(), rate.tolist())
+        ]
+
+    def nbytes(self):
+        return (self.product_ids.nbytes + self.prices.nbytes + self.product_names.nbytes
+                + self.stocks.nbytes() + self.suppliers.nbytes() + self.sales.nbytes())
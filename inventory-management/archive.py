@@ -0,0 +1,212 @@
+import argparse
+import glob
+import os
+import sys
+from connection import connect, load_config
+from inventory import _parse_timestamp
+from migrations import ROLLUPS, add_archive_batch_column
+
+ARCHIVE_BATCH_SIZE = 50000
+
+# Old sales are moved out of the hot sales table into one SQLite file per
+# month of sale time, listed in sales_archives. The hot database keeps a
+# per stock, per hour summary of what was moved (archived_sales, migration
+# 9), so balances, rollups and report totals still count archived sales
+# without opening the files; only queries for the sale rows themselves over
+# an old date range read them. Archived sales are history: they are no
+# longer edited or deleted one by one, but deleting their stock drops them
+# from the summary like its hot sales. Each archive row carries the batch
+# (archive_batches, migration 10) that copied it, and readers only count
+# rows of batches marked moved.
+ARCHIVE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS sales (
+        sale_id INTEGER PRIMARY KEY,
+        stock_id INTEGER NOT NULL,
+        amount_sold INTEGER NOT NULL,
+        sold_at TEXT NOT NULL,
+        batch_id INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_sales_sold_at ON sales(sold_at)",
+    "CREATE INDEX IF NOT EXISTS idx_sales_stock_id ON sales(stock_id)",
+]
+
+OLDEST_SALES_SQL = """
+    SELECT sale_id, stock_id, amount_sold, sold_at FROM sales
+    ORDER BY sold_at, sale_id LIMIT ?
+    """
+SUMMARIZE_SQL = f"""
+    INSERT INTO archived_sales (stock_id, hour, sales, amount_sold)
+    SELECT stock_id, {ROLLUPS["hour"][1].format("sold_at")}, COUNT(*), SUM(amount_sold)
+    FROM sales WHERE sale_id IN (SELECT sale_id FROM archive_batch)
+    GROUP BY 1, 2
+    ON CONFLICT (stock_id, hour) DO UPDATE
+    SET sales = sales + excluded.sales, amount_sold = amount_sold + excluded.amount_sold
+    """
+CATALOG_SQL = """
+    INSERT INTO sales_archives (month, path, sales, amount_sold) VALUES (?, ?, ?, ?)
+    ON CONFLICT (month) DO UPDATE
+    SET path = excluded.path, sales = sales + excluded.sales,
+        amount_sold = amount_sold + excluded.amount_sold, updated_at = CURRENT_TIMESTAMP
+    """
+
+def archive_dir(config):
+    if config.get("archive_dir"):
+        return config["archive_dir"]
+    if config["path"] == ":memory:":
+        raise ValueError("An in-memory database has no archive directory")
+    return os.path.join(os.path.dirname(os.path.abspath(config["path"])), "archive")
+
+def archive_path(directory, month):
+    return os.path.join(directory, f"sales-{month}.db")
+
+def _open_archive(config, path):
+    # archives are written a batch at a time and mostly read attached, so
+    # they use a plain rollback journal rather than WAL
+    conn = connect(dict(config, path=path, journal_mode="delete"))
+    for statement in ARCHIVE_SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    add_archive_batch_column(conn)
+    return conn
+
+def _discard_unfinished(conn, config, directory):
+    # Drops the copies of batches that a run reserved but never marked
+    # moved, from every archive file, so a sale deleted since that run died
+    # cannot be read back from them; returns how many went. Archive runs
+    # are not meant to overlap.
+    pending = [row[0] for row in conn.execute("SELECT batch_id FROM archive_batches WHERE NOT moved")]
+    if not pending:
+        return 0
+    marks = ",".join("?" * len(pending))
+    paths = {os.path.abspath(row[0]) for row in conn.execute("SELECT path FROM sales_archives")}
+    paths.update(os.path.abspath(path) for path in glob.glob(archive_path(glob.escape(directory), "*")))
+    dropped = 0
+    for path in sorted(paths):
+        if not os.path.exists(path):
+            continue
+        archive = _open_archive(config, path)
+        try:
+            dropped += archive.execute(f"DELETE FROM sales WHERE batch_id IN ({marks})", pending).rowcount
+            archive.commit()
+        finally:
+            archive.close()
+    conn.execute(f"DELETE FROM archive_batches WHERE batch_id IN ({marks})", pending)
+    conn.commit()
+    return dropped
+
+def archive_sales(conn, before=None, keep=None, config=None, batch_size=ARCHIVE_BATCH_SIZE):
+    # Moves every sale older than before, and beyond that the oldest ones
+    # until only keep are left, into the monthly files; returns how many
+    # moved. Each batch holds the write lock while it is copied, so nothing
+    # changes under it. The copy is committed before the hot rows are
+    # deleted and its batch marked moved: if the job dies in between,
+    # readers skip the copy and the next run drops it before starting.
+    if before is None and keep is None:
+        raise ValueError("Give a cutoff time, a number of sales to keep, or both")
+    if keep is not None and keep < 0:
+        raise ValueError("Sales to keep must not be negative")
+    config = config or load_config()
+    before = _parse_timestamp(before)
+    directory = archive_dir(config)
+    os.makedirs(directory, exist_ok=True)
+    _discard_unfinished(conn, config, directory)
+    cursor = conn.cursor()
+    excess = 0
+    if keep is not None:
+        cursor.execute("SELECT COUNT(*) FROM sales")
+        excess = cursor.fetchone()[0] - keep
+    archives = {}
+    moved = 0
+    try:
+        while True:
+            conn.commit()
+            cursor.execute("INSERT INTO archive_batches DEFAULT VALUES")
+            batch_id = cursor.lastrowid
+            conn.commit()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(OLDEST_SALES_SQL, (batch_size,))
+            fetched = cursor.fetchall()
+            rows = []
+            for row in fetched:
+                if excess > 0:
+                    excess -= 1
+                elif before is None or row[3] >= before:
+                    break
+                rows.append(row)
+            if not rows:
+                cursor.execute("DELETE FROM archive_batches WHERE batch_id=?", (batch_id,))
+                conn.commit()
+                break
+
+            months = {}
+            for row in rows:
+                months.setdefault(row[3][:7], []).append(row)
+            for month, month_rows in months.items():
+                if month not in archives:
+                    archives[month] = _open_archive(config, archive_path(directory, month))
+                archives[month].executemany(
+                    "INSERT OR REPLACE INTO sales (sale_id, stock_id, amount_sold, sold_at, batch_id) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (row + (batch_id,) for row in month_rows)
+                )
+                archives[month].commit()
+
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (sale_id INTEGER PRIMARY KEY)")
+            cursor.execute("DELETE FROM archive_batch")
+            cursor.executemany("INSERT INTO archive_batch (sale_id) VALUES (?)", ((row[0],) for row in rows))
+            cursor.execute(SUMMARIZE_SQL)
+            cursor.executemany(CATALOG_SQL, (
+                (month, os.path.abspath(archive_path(directory, month)),
+                 len(month_rows), sum(row[2] for row in month_rows))
+                for month, month_rows in months.items()
+            ))
+            cursor.execute("INSERT INTO archiving (active) VALUES (1)")
+            cursor.execute("DELETE FROM sales WHERE sale_id IN (SELECT sale_id FROM archive_batch)")
+            cursor.execute("DELETE FROM archiving")
+            cursor.execute("DELETE FROM archive_batch")
+            cursor.execute("UPDATE archive_batches SET moved = 1 WHERE batch_id=?", (batch_id,))
+            conn.commit()
+            moved += len(rows)
+            if len(rows) < len(fetched):
+                break
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        for archive in archives.values():
+            archive.close()
+    return moved
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Move old sales into monthly archive databases")
+    commands = parser.add_subparsers(dest="command", required=True)
+    move = commands.add_parser("move", help="archive sales older than a cutoff or beyond a row budget")
+    move.add_argument("--before", help="archive sales sold before this time (UTC, ISO format)")
+    move.add_argument("--keep", type=int, help="keep at most this many sales in the hot table")
+    move.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    commands.add_parser("list", help="list the archives")
+    args = parser.parse_args(argv)
+
+    from migrations import migrate
+    config = load_config()
+    conn = connect(config)
+    migrate(conn)
+    try:
+        if args.command == "move":
+            try:
+                moved = archive_sales(conn, args.before, args.keep, config, args.batch_size)
+            except ValueError as e:
+                parser.error(str(e))
+            print(f"Archived {moved} sales")
+        else:
+            for month, path, sales, amount_sold, updated_at in conn.execute(
+                    "SELECT month, path, sales, amount_sold, updated_at FROM sales_archives ORDER BY month"):
+                print(f"{month}: {sales} sales, {amount_sold} units, {path} (updated {updated_at})")
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,25 @@
+import sys
+
+def main(argv):
+    if argv not in ([], ["--rebuild"]):
+        print("Usage: python balances.py [--rebuild]")
+        return 2
+    from inventory import ProductManager, StockManager, Supplier, Sale
+    from migrations import migrate
+    pm = ProductManager()
+    Supplier(pm.conn)
+    Sale(pm.conn)
+    migrate(pm.conn)
+    stock_manager = StockManager(pm.conn)
+    if argv:
+        success, message = stock_manager.rebuild_balances()
+        print(message)
+        return 0 if success else 1
+    mismatches = stock_manager.check_balances()
+    for pid, stored, expected in mismatches:
+        print(f"product {pid}: stored {stored}, expected {expected}")
+    print(f"{len(mismatches)} products out of balance")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,186 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from analytics import AnalyticsSnapshot
+from connection import connect, load_config
+from dataset import SCALES, generate
+from inventory import Managers
+from migrations import ON_HAND_SQL
+
+# Per-product totals, on-hand value per supplier and sell-through over the
+# last 30 days, answered three ways: from the NumPy snapshot, as SQL
+# aggregates over the tables, and the way generate_reports used to, reading
+# the tables into pandas DataFrames and grouping those (skipped when pandas
+# is not installed). The snapshot's load and a refresh after new sales are
+# timed too, since that is what it costs to keep it current.
+
+SOLD_SQL = """
+    SELECT st.product_id, SUM(sa.amount_sold) AS sold
+    FROM sales sa JOIN stocks st ON sa.stock_id = st.stock_id
+    WHERE sa.sold_at >= ?
+    GROUP BY st.product_id
+    """
+
+def sql_queries(conn, since):
+    def product_totals():
+        return conn.execute(f"""
+            SELECT p.product_id, p.product_name,
+                COALESCE(r.received, 0), COALESCE(s.sales, 0), COALESCE(s.sold, 0),
+                COALESCE(r.received, 0) - COALESCE(s.sold, 0),
+                ROUND(COALESCE(s.sold, 0) * p.product_price, 2)
+            FROM products p
+            LEFT JOIN (SELECT product_id, SUM(stock_quantity) AS received FROM stocks GROUP BY product_id) r
+                ON r.product_id = p.product_id
+            LEFT JOIN (SELECT st.product_id, SUM(sa.sales) AS sales, SUM(sa.amount_sold) AS sold
+                       FROM (SELECT stock_id, 1 AS sales, amount_sold FROM sales
+                             UNION ALL
+                             SELECT stock_id, sales, amount_sold FROM archived_sales) sa
+                       JOIN stocks st ON sa.stock_id = st.stock_id
+                       GROUP BY st.product_id) s
+                ON s.product_id = p.product_id
+            ORDER BY p.product_id
+            """).fetchall()
+
+    def valuation(on_hand):
+        return lambda: conn.execute(f"""
+            SELECT su.supplier_name, SUM(b.on_hand * p.product_price) AS value
+            FROM suppliers su
+            JOIN products p ON su.product_id = p.product_id
+            JOIN ({on_hand}) b ON b.product_id = p.product_id
+            GROUP BY su.supplier_name
+            ORDER BY value DESC
+            """).fetchall()
+
+    def sell_through():
+        return conn.execute(f"""
+            SELECT b.product_id, COALESCE(s.sold, 0), b.on_hand
+            FROM ({ON_HAND_SQL}) b
+            LEFT JOIN ({SOLD_SQL}) s ON s.product_id = b.product_id
+            """, (since,)).fetchall()
+
+    return {
+        "product totals": product_totals,
+        "valuation by supplier": valuation(ON_HAND_SQL),
+        "valuation (inventory_balance)": valuation("SELECT product_id, on_hand FROM inventory_balance"),
+        "sell-through, 30 days": sell_through,
+    }
+
+def pandas_queries(conn, since):
+    import pandas as pd
+
+    def frames(*tables):
+        return [pd.read_sql(f"SELECT * FROM {table}", conn) for table in tables]
+
+    def sold(sales, stocks):
+        return sales.merge(stocks, on="stock_id").groupby("product_id")["amount_sold"].sum()
+
+    def on_hand(products, stocks, sales):
+        received = stocks.groupby("product_id")["stock_quantity"].sum()
+        left = received.reindex(products["product_id"], fill_value=0) - sold(sales, stocks).reindex(
+            products["product_id"], fill_value=0)
+        return left.rename("on_hand").reset_index()
+
+    def product_totals():
+        products, stocks, sales = frames("products", "stocks", "sales")
+        totals = products.set_index("product_id")
+        totals["received"] = stocks.groupby("product_id")["stock_quantity"].sum()
+        totals["sold"] = sold(sales, stocks)
+        totals = totals.fillna({"received": 0, "sold": 0})
+        totals["on_hand"] = totals["received"] - totals["sold"]
+        totals["revenue"] = totals["sold"] * totals["product_price"]
+        return totals
+
+    def valuation():
+        products, stocks, sales, suppliers = frames("products", "stocks", "sales", "suppliers")
+        value = products.merge(on_hand(products, stocks, sales), on="product_id")
+        value["value"] = value["on_hand"] * value["product_price"]
+        value = suppliers.merge(value, on="product_id").groupby("supplier_name")["value"].sum()
+        return value.sort_values(ascending=False)
+
+    def sell_through():
+        products, stocks, sales = frames("products", "stocks", "sales")
+        rates = on_hand(products, stocks, sales).set_index("product_id")
+        rates["sold"] = sold(sales[sales["sold_at"] >= since], stocks)
+        rates = rates.fillna({"sold": 0})
+        rates["rate"] = rates["sold"] / (rates["sold"] + rates["on_hand"])
+        return rates
+
+    return {
+        "product totals": product_totals,
+        "valuation by supplier": valuation,
+        "sell-through, 30 days": sell_through,
+    }
+
+def snapshot_queries(snapshot, since):
+    return {
+        "product totals": snapshot.product_totals,
+        "valuation by supplier": snapshot.valuation_by_supplier,
+        "sell-through, 30 days": lambda: snapshot.sell_through(since),
+    }
+
+def timed(operation, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compare the NumPy analytics snapshot with SQL and pandas")
+    parser.add_argument("--scale", default="1m", choices=list(SCALES))
+    parser.add_argument("--new-sales", type=int, default=1000, help="sales added before timing a refresh")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query; the best is reported")
+    parser.add_argument("--no-pandas", action="store_true", help="skip the pandas path")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        config = load_config()
+        config["path"] = os.path.join(workdir, "analytics.db")
+        m = Managers(connect(config))
+        conn = m.products.conn
+        started = time.perf_counter()
+        counts = generate(m, **SCALES[args.scale])
+        print(f"generated {counts} in {time.perf_counter() - started:.1f} s")
+        since = (datetime.now(timezone.utc) - timedelta(days=30)).strftime("%Y-%m-%d %H:%M:%S")
+
+        snapshot = AnalyticsSnapshot(conn)
+        started = time.perf_counter()
+        snapshot.load()
+        print(f"snapshot load {(time.perf_counter() - started) * 1000:.1f} ms, "
+              f"{snapshot.nbytes() / 2 ** 20:.1f} MiB")
+        sid = conn.execute("SELECT stock_id FROM stocks LIMIT 1").fetchone()[0]
+        m.sales.add_sales((sid, 1, None) for _ in range(args.new_sales))
+        started = time.perf_counter()
+        snapshot.refresh()
+        print(f"snapshot refresh after {args.new_sales} sales {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        paths = {"snapshot": snapshot_queries(snapshot, since), "SQL": sql_queries(conn, since)}
+        if not args.no_pandas:
+            try:
+                paths["pandas"] = pandas_queries(conn, since)
+            except ImportError:
+                print("pandas is not installed, skipping it")
+        results = {
+            path: {name: timed(query, args.repeat) for name, query in queries.items()}
+            for path, queries in paths.items()
+        }
+
+        names = list(paths["SQL"])
+        print(f"{'query':30}" + "".join(f"{path + ' ms':>14}" for path in paths))
+        for name in names:
+            cells = (results[path].get(name) for path in paths)
+            print(f"{name:30}" + "".join(f"{cell:14.1f}" if cell is not None else f"{'-':>14}" for cell in cells))
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
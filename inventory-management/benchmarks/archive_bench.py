@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from archive import archive_sales
+from connection import connect, load_config
+from dataset import SCALES, generate
+from inventory import Managers
+
+# The operations that slow down as sales history piles up, timed on the
+# full table and again after everything but the newest --keep sales has
+# been moved to the monthly archives.
+
+def busiest_stock(conn):
+    return conn.execute(
+        "SELECT stock_id FROM sales GROUP BY stock_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+
+def timed(operation):
+    started = time.perf_counter()
+    operation()
+    return (time.perf_counter() - started) * 1000
+
+def measure(m, conn):
+    sid = busiest_stock(conn)
+
+    def delete_stock():
+        # undone again, so both runs delete the same stock
+        conn.execute("SAVEPOINT bench")
+        conn.execute("DELETE FROM stocks WHERE stock_id=?", (sid,))
+        conn.execute("ROLLBACK TO bench")
+        conn.execute("RELEASE bench")
+
+    def report():
+        m.reports.clear()
+        m.reports.report()
+
+    return {
+        "get_all_sales": timed(m.sales.get_all_sales),
+        "delete_stock cascade": timed(delete_stock),
+        "report (uncached)": timed(report),
+    }
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compare sales queries before and after archiving old sales")
+    parser.add_argument("--scale", default="100k", choices=list(SCALES))
+    parser.add_argument("--keep", type=int, default=10000, help="sales left in the hot table")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        config = load_config()
+        config["path"] = os.path.join(workdir, "archive.db")
+        config["archive_dir"] = os.path.join(workdir, "archive")
+        m = Managers(connect(config))
+        conn = m.products.conn
+        generate(m, **SCALES[args.scale])
+
+        full = measure(m, conn)
+        started = time.perf_counter()
+        moved = archive_sales(conn, keep=args.keep, config=config)
+        print(f"archived {moved} sales in {time.perf_counter() - started:.2f} s")
+        hot = measure(m, conn)
+
+        print(f"{'operation':24} {'full ms':>10} {'archived ms':>12}")
+        for name in full:
+            print(f"{name:24} {full[name]:10.1f} {hot[name]:12.1f}")
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
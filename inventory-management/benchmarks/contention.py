@@ -0,0 +1,111 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from connection import connect, load_config
+from inventory import Managers
+
+# Several processes post baskets against the same small catalog until it is
+# sold out. Every writer has its own connection, as separate tills would, so
+# only SQLite's locking keeps them apart. Afterwards nothing may be oversold:
+# no product below zero, the units in the sales table equal the units the
+# writers were told they sold, and the balances agree with a full recount.
+
+def setup(config, products, quantity):
+    m = Managers(connect(config))
+    m.products.add_products((f"contended {i}", 1.0) for i in range(products))
+    pids = [row[0] for row in m.products.conn.execute("SELECT product_id FROM products")]
+    m.stocks.add_stocks((pid, quantity) for pid in pids)
+    sids = [row[0] for row in m.products.conn.execute("SELECT stock_id FROM stocks")]
+    m.products.conn.close()
+    return sids
+
+def writer(config, sids, max_lines, seed, start, results):
+    m = Managers(connect(config))
+    rng = random.Random(seed)
+    posted = refused = errors = units = 0
+    start.wait()
+    while True:
+        basket = [(rng.choice(sids), rng.randint(1, 3)) for _ in range(rng.randint(1, max_lines))]
+        success, message = m.sales.post_basket(basket)
+        if success:
+            posted += 1
+            units += sum(amount for _, amount in basket)
+            continue
+        if "Insufficient stock" in message:
+            refused += 1
+        else:
+            errors += 1
+        # a refusal only means one line ran short; stop once nothing is left
+        if m.products.conn.execute("SELECT MAX(on_hand) FROM inventory_balance").fetchone()[0] <= 0:
+            break
+    m.products.conn.close()
+    results.put((posted, refused, errors, units))
+
+def run(writers, products, quantity, max_lines, workdir):
+    config = load_config()
+    config["path"] = os.path.join(workdir, f"contention-{writers}.db")
+    sids = setup(config, products, quantity)
+    context = multiprocessing.get_context("spawn")
+    start, results = context.Event(), context.Queue()
+    processes = [
+        context.Process(target=writer, args=(config, sids, max_lines, seed, start, results))
+        for seed in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    started = time.perf_counter()
+    start.set()
+    totals = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    posted, refused, errors, units = (sum(column) for column in zip(*totals))
+    m = Managers(connect(config))
+    conn = m.products.conn
+    sold = conn.execute("SELECT COALESCE(SUM(amount_sold), 0) FROM sales").fetchone()[0]
+    negative = conn.execute("SELECT COUNT(*) FROM inventory_balance WHERE on_hand < 0").fetchone()[0]
+    drift = m.stocks.check_balances()
+    conn.close()
+    return {
+        "writers": writers,
+        "baskets": posted,
+        "refused": refused,
+        "errors": errors,
+        "seconds": elapsed,
+        "ok": negative == 0 and not drift and sold == units and sold <= products * quantity,
+        "sold": sold,
+        "supply": products * quantity,
+    }
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Post baskets from several processes at once and check for oversell")
+    parser.add_argument("--writers", default="1,2,4,8", help="comma separated writer counts to try")
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--quantity", type=int, default=200, help="units on hand per product")
+    parser.add_argument("--max-lines", type=int, default=3, help="most lines in one basket")
+    args = parser.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'writers':>7} {'baskets':>8} {'refused':>8} {'errors':>7} {'seconds':>8} {'baskets/s':>10}  sold/supply")
+        for writers in (int(count) for count in args.writers.split(",")):
+            result = run(writers, args.products, args.quantity, args.max_lines, workdir)
+            failed = failed or not result["ok"] or result["errors"]
+            print(
+                f"{writers:7} {result['baskets']:8} {result['refused']:8} {result['errors']:7} "
+                f"{result['seconds']:8.2f} {result['baskets'] / result['seconds']:10.0f}  "
+                f"{result['sold']}/{result['supply']} {'ok' if result['ok'] else 'OVERSOLD'}"
+            )
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,78 @@
+import bisect
+import random
+from datetime import datetime, timedelta, timezone
+
+# Named scales by number of sales; the rest of the catalog grows with them.
+SCALES = {
+    "1k": {"products": 100, "sales": 1_000},
+    "100k": {"products": 5_000, "sales": 100_000},
+    "1m": {"products": 50_000, "sales": 1_000_000},
+    "10m": {"products": 200_000, "sales": 10_000_000},
+}
+
+def generate(managers, products, sales, seed=0, max_stocks=4, max_suppliers=3, days=365):
+    # Each product gets 1..max_stocks stock entries and 1..max_suppliers
+    # suppliers; sales follow a Zipf-like popularity curve over stocks so a
+    # few items take most of the volume, as on a real till, and are spread
+    # over the last `days` days.
+    rng = random.Random(seed)
+    conn = managers.products.conn
+    last_pid = _max_id(conn, "products", "product_id")
+    managers.products.add_products(
+        (f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}", round(rng.uniform(0.5, 500), 2))
+        for i in range(products)
+    )
+    pids = _new_ids(conn, "products", "product_id", last_pid)
+
+    last_sid = _max_id(conn, "stocks", "stock_id")
+    managers.stocks.add_stocks(
+        (pid, rng.randint(1, 500))
+        for pid in pids
+        for _ in range(rng.randint(1, max_stocks))
+    )
+    sids = _new_ids(conn, "stocks", "stock_id", last_sid)
+
+    managers.suppliers.add_suppliers(
+        (pid, f"{rng.choice(WORDS).title()} {rng.choice(SUFFIXES)}")
+        for pid in pids
+        for _ in range(rng.randint(1, max_suppliers))
+    )
+
+    # every product gets a reorder point, some of them end up on alert
+    conn.executemany(
+        "INSERT OR REPLACE INTO reorder_points (product_id, reorder_point) VALUES (?, ?)",
+        ((pid, rng.randint(0, 100)) for pid in pids)
+    )
+    conn.commit()
+
+    rng.shuffle(sids)
+    cumulative, total = [], 0
+    for rank in range(len(sids)):
+        total += 1 / (rank + 1)
+        cumulative.append(total)
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    managers.sales.add_sales(
+        (
+            sids[bisect.bisect_left(cumulative, rng.random() * total)],
+            rng.randint(1, 5),
+            now - timedelta(seconds=rng.randrange(days * 86400)),
+        )
+        for _ in range(sales)
+    )
+    return {"products": len(pids), "stocks": len(sids), "sales": sales}
+
+def _max_id(conn, table, column):
+    return conn.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}").fetchone()[0]
+
+def _new_ids(conn, table, column, after):
+    # ids are AUTOINCREMENT, so everything above the old maximum is ours
+    rows = conn.execute(f"SELECT {column} FROM {table} WHERE {column} > ? ORDER BY {column}", (after,))
+    return [row[0] for row in rows]
+
+WORDS = (
+    "apple", "bolt", "cable", "drill", "eraser", "filter", "glove", "hammer",
+    "ink", "jar", "kettle", "lamp", "marker", "nail", "oil", "paper", "quilt",
+    "rope", "soap", "tape", "umbrella", "valve", "wire", "yarn", "zipper",
+)
+SUFFIXES = ("Ltd", "Traders", "Wholesale", "& Sons", "Supply Co", "Imports")
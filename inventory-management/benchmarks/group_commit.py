@@ -0,0 +1,90 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from connection import connect, load_config
+from inventory import Managers
+from writequeue import GROUP_COMMIT_MS, GROUP_COMMIT_RECORDS, WriteQueue
+
+# Sales per second from many concurrent callers, first with every sale
+# committed on its own (one connection per caller), then through the group
+# commit queue. Both commit with the same synchronous setting so the
+# difference is the number of fsyncs.
+
+def prepare(config, stocks):
+    m = Managers(connect(config))
+    pid = int(m.products.add_product("group commit", 1.0)[1].rsplit(":", 1)[1])
+    m.stocks.add_stocks((pid, 1000) for _ in range(stocks))
+    sids = [row[0] for row in m.products.conn.execute("SELECT stock_id FROM stocks WHERE product_id=?", (pid,))]
+    m.products.conn.close()
+    return sids
+
+def drive(callers, per_caller, sale):
+    failures = []
+
+    def caller(index):
+        for i in range(per_caller):
+            success, message = sale(index, i)
+            if not success:
+                failures.append(message)
+
+    threads = [threading.Thread(target=caller, args=(index,)) for index in range(callers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, failures
+
+def run_direct(config, sids, callers, per_caller):
+    managers = [Managers(connect(config, check_same_thread=False)) for _ in range(callers)]
+    elapsed, failures = drive(
+        callers, per_caller,
+        lambda index, i: managers[index].sales.add_sale(sids[(index + i) % len(sids)], 1)
+    )
+    for m in managers:
+        m.products.conn.close()
+    return elapsed, failures
+
+def run_queued(config, sids, callers, per_caller, max_delay_ms, max_batch):
+    writes = WriteQueue(config, max_delay_ms, max_batch, synchronous=None)
+    elapsed, failures = drive(
+        callers, per_caller,
+        lambda index, i: writes.add_sale(sids[(index + i) % len(sids)], 1).result()
+    )
+    metrics = writes.metrics()
+    writes.close()
+    return elapsed, failures, metrics
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compare per-sale commits with the group commit queue")
+    parser.add_argument("--callers", type=int, default=16)
+    parser.add_argument("--sales", type=int, default=200, help="sales per caller")
+    parser.add_argument("--synchronous", default="full", help="synchronous mode for both runs")
+    parser.add_argument("--delay-ms", type=float, default=GROUP_COMMIT_MS)
+    parser.add_argument("--batch", type=int, default=GROUP_COMMIT_RECORDS)
+    args = parser.parse_args(argv)
+
+    total = args.callers * args.sales
+    with tempfile.TemporaryDirectory() as workdir:
+        config = load_config()
+        config["path"] = os.path.join(workdir, "group_commit.db")
+        config["synchronous"] = args.synchronous
+        sids = prepare(config, args.callers)
+
+        elapsed, failures = run_direct(config, sids, args.callers, args.sales)
+        print(f"per-sale commit  {total / elapsed:10.0f} sales/s  {len(failures)} failed")
+        elapsed, failures, metrics = run_queued(config, sids, args.callers, args.sales, args.delay_ms, args.batch)
+        print(f"group commit     {total / elapsed:10.0f} sales/s  {len(failures)} failed")
+        for name, value in metrics.items():
+            print(f"  {name:20} {value:10.2f}" if isinstance(value, float) else f"  {name:20} {value:10}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,89 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+def request(base_url, method, path, body=None, token=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_client(base_url, token, stock_ids, deadline, read_ratio, latencies, failures):
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if rng.random() < read_ratio:
+            status, _ = request(base_url, "GET", f"/sales?limit=50&after_id={rng.randint(0, 1000)}", token=token)
+        else:
+            status, _ = request(base_url, "POST", "/sales", {
+                "stock_id": rng.choice(stock_ids), "amount_sold": rng.randint(1, 3)
+            }, token)
+        latencies.append(time.perf_counter() - start)
+        if status >= 500:
+            failures.append(status)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Load test for service.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--read-ratio", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    status, body = request(args.url, "POST", "/login", {"admin_id": args.user, "password": args.password})
+    if status != 200:
+        print(f"Login failed: {body.get('message')}")
+        return 1
+    token = body["token"]
+    # give the writers something to sell against
+    status, body = request(args.url, "POST", "/products", {"product_name": "load test", "product_price": 1}, token)
+    pid = int(body["message"].rsplit(":", 1)[1])
+    request(args.url, "POST", "/stocks/batch", {
+        "rows": [{"product_id": pid, "stock_quantity": 1000000} for _ in range(10)]
+    }, token)
+    _, stocks = request(args.url, "GET", "/stocks?sort_by=stock_id&descending=1&limit=10", token=token)
+    stock_ids = [row[0] for row in stocks]
+
+    latencies, failures = [], []
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=run_client, args=(
+            args.url, token, stock_ids, deadline, args.read_ratio, latencies, failures
+        ))
+        for _ in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(latencies)} requests in {elapsed:.1f}s with {args.clients} clients")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1000:.1f} ms, "
+          f"p99: {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"server errors: {len(failures)}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
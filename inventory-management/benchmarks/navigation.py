@@ -0,0 +1,73 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Time from clicking through to a screen until Tk has laid it out, with the
+# screen rebuilt on every visit (what navigation used to cost) and with the
+# cached frame only being raised. Needs a display; with a dataset the
+# listing screens have real pages to show.
+
+SCREENS = (
+    "main_menu", "product_management", "add_product", "edit_product", "products",
+    "stock_management", "add_stock", "stocks", "supplier_management", "suppliers",
+    "sales_management", "add_sale", "basket", "sales", "alerts",
+)
+
+def visit(root, app, name, rebuild):
+    if rebuild and name in app.screens:
+        app.screens.pop(name).frame.destroy()
+    started = time.perf_counter()
+    app.show(name)
+    root.update_idletasks()
+    return (time.perf_counter() - started) * 1000
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Measure screen navigation latency in the Tk app")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--scale", help="fill the database with a dataset scale from dataset.py first")
+    args = parser.parse_args(argv)
+
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"needs a display: {e}")
+        return 2
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["INVENTORY_DB_PATH"] = os.path.join(workdir, "navigation.db")
+        from connection import connect
+        from dataset import SCALES, generate
+        from inventory import Managers
+        if args.scale:
+            generate(Managers(connect()), **SCALES[args.scale])
+        from main import MainApp
+        app = MainApp(root)
+        root.update()
+
+        times = {"rebuild": {}, "cached": {}}
+        for mode in ("rebuild", "cached"):
+            for _ in range(args.rounds):
+                for name in SCREENS:
+                    times[mode].setdefault(name, []).append(visit(root, app, name, mode == "rebuild"))
+                    # let the reader deliver the screen's data before moving on
+                    root.update()
+
+        print(f"{'screen':22} {'rebuild ms':>11} {'cached ms':>10}")
+        for name in SCREENS:
+            print(f"{name:22} {statistics.median(times['rebuild'][name]):11.2f} "
+                  f"{statistics.median(times['cached'][name]):10.2f}")
+        overall = {mode: statistics.median(t for ts in times[mode].values() for t in ts) for mode in times}
+        print(f"{'all screens':22} {overall['rebuild']:11.2f} {overall['cached']:10.2f}")
+        app.db.close()
+        app.reader.close()
+        root.destroy()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
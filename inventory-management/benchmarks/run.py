@@ -0,0 +1,277 @@
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from connection import connect, load_config
+from dataset import SCALES, generate
+from inventory import Authentication, Managers, ProductManager, Sale, StockManager, Supplier
+from reports import SECTIONS
+
+# Timings slower than baseline * tolerance are regressions, unless the
+# difference is under the noise floor.
+DEFAULT_TOLERANCE = 1.5
+NOISE_FLOOR_MS = 0.05
+
+def measure(fn, setup=None, repeat=20):
+    times = []
+    for _ in range(repeat):
+        args = (setup() or ()) if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": times[0],
+        "median_ms": statistics.median(times),
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+        "mean_ms": statistics.fmean(times),
+    }
+
+def build_cases(m):
+    # name -> (fn, setup); setup runs untimed and returns fn's arguments
+    conn = m.products.conn
+
+    def any_id(table, column):
+        # random point in the id range, then the next existing row: O(log n)
+        low, high = conn.execute(f"SELECT MIN({column}), MAX({column}) FROM {table}").fetchone()
+        return conn.execute(
+            f"SELECT {column} FROM {table} WHERE {column} >= ? ORDER BY {column} LIMIT 1",
+            (random.randint(low, high),)
+        ).fetchone()[0]
+
+    def new_product():
+        return (int(m.products.add_product("bench", 1.0)[1].rsplit(":", 1)[1]),)
+
+    def new_stock():
+        return (int(m.stocks.add_stock(any_id("products", "product_id"), 5)[1].rsplit(":", 1)[1]),)
+
+    def stocked_stock():
+        # a fresh product with plenty on hand, so posting never runs short
+        return (int(m.stocks.add_stock(new_product()[0], 100000)[1].rsplit(":", 1)[1]),)
+
+    def new_supplier():
+        m.suppliers.add_supplier(any_id("products", "product_id"), "bench")
+        return (conn.execute("SELECT MAX(supplier_id) FROM suppliers").fetchone()[0],)
+
+    def new_sale():
+        m.sales.add_sale(any_id("stocks", "stock_id"), 1)
+        return (conn.execute("SELECT MAX(sale_id) FROM sales").fetchone()[0],)
+
+    def ids(table, column, count=100):
+        return ([any_id(table, column) for _ in range(count)],)
+
+    def new_products(count=100):
+        m.products.add_products([("bench", 1.0)] * count)
+        return ([row[0] for row in conn.execute(
+            "SELECT product_id FROM products ORDER BY product_id DESC LIMIT ?", (count,))],)
+
+    def new_sales(count=100):
+        m.sales.add_sales([(any_id("stocks", "stock_id"), 1)] * count)
+        return ([row[0] for row in conn.execute(
+            "SELECT sale_id FROM sales ORDER BY sale_id DESC LIMIT ?", (count,))],)
+
+    cases = {
+        "ProductManager.add_product": (lambda: m.products.add_product("bench", 9.99), None),
+        "ProductManager.add_products": (lambda: m.products.add_products([("bench", 1.0)] * 1000), None),
+        "ProductManager.edit_product": (
+            lambda pid: m.products.edit_product(pid, "bench", 2.0),
+            lambda: (any_id("products", "product_id"),)),
+        "ProductManager.delete_product": (m.products.delete_product, new_product),
+        "ProductManager.edit_many": (
+            lambda pids: m.products.edit_many([(pid, "bench", 2.0) for pid in pids]),
+            lambda: ids("products", "product_id")),
+        "ProductManager.delete_many": (m.products.delete_many, new_products),
+        "ProductManager.get_all_products": (m.products.get_all_products, None),
+        "ProductManager.get_product": (
+            m.products.get_product, lambda: (any_id("products", "product_id"),)),
+        "ProductManager.get_product (cold)": (
+            m.products.get_product,
+            lambda: (m.products.clear_cache(), any_id("products", "product_id"))[1:]),
+        "ProductManager.get_products": (
+            m.products.get_products,
+            lambda: ([any_id("products", "product_id") for _ in range(100)],)),
+        "ProductManager.clear_cache": (m.products.clear_cache, None),
+        "ProductManager.search_products (1 letter)": (lambda: m.products.search_products("c"), None),
+        "ProductManager.search_products": (lambda: m.products.search_products("cab dri"), None),
+        "ProductManager.get_products_page": (
+            lambda pid: m.products.get_products_page(after_id=pid),
+            lambda: (any_id("products", "product_id"),)),
+        "StockManager.add_stock": (
+            lambda pid: m.stocks.add_stock(pid, 10),
+            lambda: (any_id("products", "product_id"),)),
+        "StockManager.add_stocks": (
+            lambda pid: m.stocks.add_stocks([(pid, 1)] * 1000),
+            lambda: (any_id("products", "product_id"),)),
+        "StockManager.edit_stock": (
+            lambda sid: m.stocks.edit_stock(sid, 100),
+            lambda: (any_id("stocks", "stock_id"),)),
+        "StockManager.delete_stock": (m.stocks.delete_stock, new_stock),
+        "StockManager.edit_many": (
+            lambda sids: m.stocks.edit_many([(sid, 100) for sid in sids]),
+            lambda: ids("stocks", "stock_id")),
+        "StockManager.delete_many": (
+            m.stocks.delete_many,
+            lambda: ([new_stock()[0] for _ in range(100)],)),
+        "StockManager.get_all_stocks": (m.stocks.get_all_stocks, None),
+        "StockManager.get_stocks_page": (
+            lambda: m.stocks.get_stocks_page(sort_by="product_name"), None),
+        "StockManager.search_stocks": (lambda: m.stocks.search_stocks("ha"), None),
+        "StockManager.get_on_hand": (
+            m.stocks.get_on_hand, lambda: (any_id("products", "product_id"),)),
+        "StockManager.check_balances": (m.stocks.check_balances, None),
+        "StockManager.set_reorder_point": (
+            lambda pid: m.stocks.set_reorder_point(pid, 50),
+            lambda: (any_id("products", "product_id"),)),
+        "StockManager.clear_reorder_point": (
+            m.stocks.clear_reorder_point,
+            lambda: (any_id("reorder_points", "product_id"),)),
+        "StockManager.count_alerts": (m.stocks.count_alerts, None),
+        "StockManager.get_alerts_page": (lambda: m.stocks.get_alerts_page(sort_by="on_hand"), None),
+        "StockManager.rebuild_balances": (m.stocks.rebuild_balances, None),
+        "Supplier.add_supplier": (
+            lambda pid: m.suppliers.add_supplier(pid, "bench"),
+            lambda: (any_id("products", "product_id"),)),
+        "Supplier.add_suppliers": (
+            lambda pid: m.suppliers.add_suppliers([(pid, "bench")] * 1000),
+            lambda: (any_id("products", "product_id"),)),
+        "Supplier.edit_supplier": (
+            lambda sid, pid: m.suppliers.edit_supplier(sid, pid, "bench"),
+            lambda: (any_id("suppliers", "supplier_id"), any_id("products", "product_id"))),
+        "Supplier.delete_supplier": (m.suppliers.delete_supplier, new_supplier),
+        "Supplier.edit_many": (
+            lambda sids, pid: m.suppliers.edit_many([(sid, pid, "bench") for sid in sids]),
+            lambda: ids("suppliers", "supplier_id") + (any_id("products", "product_id"),)),
+        "Supplier.delete_many": (
+            m.suppliers.delete_many,
+            lambda: ([new_supplier()[0] for _ in range(100)],)),
+        "Supplier.get_all_suppliers": (m.suppliers.get_all_suppliers, None),
+        "Supplier.get_suppliers_page": (lambda: m.suppliers.get_suppliers_page(), None),
+        "Supplier.search_suppliers": (lambda: m.suppliers.search_suppliers("so"), None),
+        "Sale.add_sale": (
+            lambda sid: m.sales.add_sale(sid, 1),
+            lambda: (any_id("stocks", "stock_id"),)),
+        "Sale.post_sale": (lambda sid: m.sales.post_sale(sid, 1), stocked_stock),
+        "Sale.post_basket": (lambda sid: m.sales.post_basket([(sid, 1)] * 20), stocked_stock),
+        "Sale.add_sales": (
+            lambda sid: m.sales.add_sales([(sid, 1)] * 1000),
+            lambda: (any_id("stocks", "stock_id"),)),
+        "Sale.edit_sale": (
+            lambda sid: m.sales.edit_sale(sid, 2),
+            lambda: (any_id("sales", "sale_id"),)),
+        "Sale.delete_sale": (m.sales.delete_sale, new_sale),
+        "Sale.edit_many": (
+            lambda sids: m.sales.edit_many([(sid, 2) for sid in sids]),
+            lambda: ids("sales", "sale_id")),
+        "Sale.delete_many": (m.sales.delete_many, new_sales),
+        "Sale.get_all_sales": (m.sales.get_all_sales, None),
+        "Sale.get_sales_page": (
+            lambda sid: m.sales.get_sales_page(after_id=sid),
+            lambda: (any_id("sales", "sale_id"),)),
+        "Authentication.add_admin": (
+            lambda name: m.auth.add_admin(name, "bench"),
+            lambda: (f"bench-{time.perf_counter_ns()}",)),
+        "Authentication.login": (lambda: m.auth.login("bench-admin", "bench"), None),
+        "ReportEngine.report (cached)": (m.reports.report, None),
+        "ReportEngine.trend (day)": (m.reports.trend, None),
+        "ReportEngine.trend (week, one product)": (
+            lambda pid: m.reports.trend("week", pid),
+            lambda: (any_id("products", "product_id"),)),
+    }
+    for name in SECTIONS:
+        cases[f"ReportEngine.{name}"] = (
+            lambda name=name: m.reports.section(name), m.reports.clear)
+    return cases
+
+def missing_cases(cases):
+    # every public manager method should have a benchmark
+    missing = []
+    for cls in (ProductManager, StockManager, Supplier, Sale, Authentication):
+        for name, member in inspect.getmembers(cls, inspect.isfunction):
+            if not name.startswith("_") and f"{cls.__name__}.{name}" not in cases:
+                missing.append(f"{cls.__name__}.{name}")
+    return missing
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        before, after = previous["median_ms"], current["median_ms"]
+        if after > before * tolerance and after - before > NOISE_FLOOR_MS:
+            regressions.append((name, before, after))
+    return regressions
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark every manager method on synthetic data")
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", help="reuse this database instead of generating a fresh one")
+    parser.add_argument("--only", help="only run cases whose name contains this text")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    workdir = None
+    config = load_config()
+    if args.db:
+        config["path"] = args.db
+    else:
+        workdir = tempfile.TemporaryDirectory()
+        config["path"] = os.path.join(workdir.name, "bench.db")
+    m = Managers(connect(config))
+    if not args.db:
+        started = time.perf_counter()
+        counts = generate(m, **SCALES[args.scale])
+        print(f"generated {counts} in {time.perf_counter() - started:.1f}s")
+    m.auth.add_admin("bench-admin", "bench")
+
+    cases = build_cases(m)
+    for name in missing_cases(cases):
+        print(f"WARNING no benchmark for {name}")
+    results = {}
+    for name, (fn, setup) in cases.items():
+        if args.only and args.only not in name:
+            continue
+        # full scans of the big tables run fewer times
+        repeat = max(3, args.repeat // 5) if "get_all" in name or "balances" in name else args.repeat
+        results[name] = measure(fn, setup, repeat)
+        print(f"{name:45} median {results[name]['median_ms']:10.3f} ms   p95 {results[name]['p95_ms']:10.3f} ms")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "scale": args.scale if not args.db else args.db,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "journal_mode": config["journal_mode"],
+            "results": results,
+        }, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["scale"] != (args.scale if not args.db else args.db):
+        print(f"Baseline was recorded at scale {baseline['scale']}, not comparable")
+        return 2
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for name, before, after in regressions:
+        print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
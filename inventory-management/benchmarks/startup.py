@@ -0,0 +1,62 @@
+import os
+import re
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budgets in milliseconds, with room for slow terminals.
+BUDGETS_MS = {
+    "inventory": 150,
+    "main": 400,
+}
+
+# Modules only reports need; importing any of them at startup is a regression.
+HEAVY_MODULES = ("matplotlib", "pandas", "numpy", "PIL")
+
+# Data layer modules must not drag in the UI toolkit either.
+HEADLESS_MODULES = ("inventory", "migrations", "reports", "importer", "exporter", "balances", "charts", "writequeue", "warehouses", "journal", "diagnostics", "archive")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+def import_times(module, runs=5):
+    best_total, imported = None, set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=APP_DIR, capture_output=True, text=True, check=True
+        )
+        total = None
+        imported = set()
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            imported.add(match.group(4).split(".")[0])
+            if match.group(4) == module and not match.group(3):
+                total = int(match.group(2)) / 1000
+        if best_total is None or total < best_total:
+            best_total = total
+    return best_total, imported
+
+def main(argv):
+    failures = []
+    for module in HEADLESS_MODULES:
+        _, imported = import_times(module, runs=1)
+        for name in ("tkinter",) + HEAVY_MODULES:
+            if name in imported:
+                failures.append(f"{module} imports {name}")
+    for module, budget in BUDGETS_MS.items():
+        total, imported = import_times(module)
+        print(f"{module}: {total:.1f} ms (budget {budget} ms)")
+        if total > budget:
+            failures.append(f"{module} took {total:.1f} ms, budget is {budget} ms")
+        for name in HEAVY_MODULES:
+            if name in imported:
+                failures.append(f"{module} imports {name} at startup")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
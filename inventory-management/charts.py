@@ -0,0 +1,109 @@
+import base64
+import heapq
+import io
+from datetime import date
+
+TOP_N = 20
+PIE_TOP_N = 10
+DPI = 100
+MIN_PIE_LABEL_PCT = 2
+
+# name -> (report section, kind, title, x label, y label, colour, size in
+# inches, how many of the largest items to draw; the rest become "Other")
+CHARTS = {
+    "stock_per_product": (
+        "stock_per_product", "bar", "Stock Quantity per Product",
+        "Product", "Quantity", "skyblue", (8, 5), TOP_N),
+    "sales_per_product": (
+        "sales_per_product", "bar", "Total Sales per Product",
+        "Product", "Units Sold", "orange", (8, 5), TOP_N),
+    "sales_per_day": (
+        "sales_per_day", "line", "Units Sold per Day",
+        "Day", "Units Sold", "green", (8, 4), None),
+    "price_distribution": (
+        "price_distribution", "pie", "Price Distribution",
+        None, None, None, (8, 5), PIE_TOP_N),
+}
+
+def top_n(rows, n):
+    # the n largest (label, value) rows, then how many rows are left over and
+    # their total value
+    if len(rows) <= n + 1:
+        return list(rows), 0, 0
+    top = heapq.nlargest(n, rows, key=lambda row: row[1])
+    return top, len(rows) - n, sum(value for _, value in rows) - sum(value for _, value in top)
+
+class ChartRenderer:
+    # Draws report charts into PNG images, meant to run on a worker thread;
+    # the UI only has to show the image. Each chart keeps one matplotlib
+    # Figure that is cleared and redrawn rather than a new figure per visit,
+    # and the image is reused for as long as its key (the versions of the
+    # tables behind it) stays the same.
+    def __init__(self):
+        self.figures = {}
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, name, rows, key):
+        # returns base64 PNG data for tk.PhotoImage, or None for no data
+        cached = self.cache.get(name)
+        if cached and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        image = self._draw(name, rows) if rows else None
+        self.cache[name] = (key, image)
+        return image
+
+    def _figure(self, name, size):
+        # the object API keeps figures out of pyplot's global registry, so
+        # they are freed like any other object and need no GUI backend
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = self.figures.get(name)
+        if fig is None:
+            fig = self.figures[name] = Figure(figsize=size, dpi=DPI)
+            FigureCanvasAgg(fig)
+        else:
+            fig.clear()
+        return fig
+
+    def _draw(self, name, rows):
+        _, kind, title, xlabel, ylabel, color, size, limit = CHARTS[name]
+        others = 0
+        if limit:
+            rows, others, others_total = top_n(rows, limit)
+        if others and kind == "pie":
+            rows.append((f"Other ({others})", others_total))
+        elif others:
+            # a bar for the rest would dwarf the others, name it instead
+            title = f"{title}\nTop {limit}, {others} more with {others_total:,.0f} in total"
+        labels, values = zip(*rows)
+        fig = self._figure(name, size)
+        ax = fig.add_subplot()
+        if kind == "pie":
+            # thin slices get no text of their own, the legend names them all
+            wedges, _, _ = ax.pie(values, autopct=lambda pct: f"{pct:.1f}%" if pct >= MIN_PIE_LABEL_PCT else "")
+            ax.legend(wedges, [str(label) for label in labels], loc="center left",
+                      bbox_to_anchor=(1, 0.5), fontsize="small")
+        elif kind == "line":
+            ax.plot([date.fromisoformat(label) for label in labels], values, color=color)
+            fig.autofmt_xdate()
+        else:
+            ax.bar([str(label) for label in labels], values, color=color)
+            for label in ax.get_xticklabels():
+                label.set_rotation(45)
+                label.set_horizontalalignment("right")
+        ax.set_title(title)
+        if xlabel:
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        return base64.b64encode(buffer.getvalue())
+
+    def clear(self):
+        self.cache.clear()
+        self.figures.clear()
@@ -0,0 +1,133 @@
+import configparser
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+# Settings are read from these defaults, then the [database] section of the
+# config file (INVENTORY_CONFIG, or inventory.ini in the working directory),
+# then INVENTORY_DB_<NAME> environment variables.
+DEFAULTS = {
+    "path": "inventory.db",
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -20000,
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,
+    "readers": 4,
+    # where archive.py puts the monthly sales archives; empty means an
+    # archive directory next to the database
+    "archive_dir": "",
+}
+
+# Prepared statements kept per connection; the managers reuse a fixed set of
+# SQL strings, so after warm-up nothing is parsed twice.
+STATEMENT_CACHE_SIZE = 256
+
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SYNCHRONOUS_MODES = ("off", "normal", "full", "extra")
+INTEGER_SETTINGS = ("cache_size", "mmap_size", "busy_timeout", "readers")
+
+def load_config(path=None, environ=None):
+    environ = os.environ if environ is None else environ
+    config = dict(DEFAULTS)
+    path = path or environ.get("INVENTORY_CONFIG", "inventory.ini")
+    if os.path.exists(path):
+        parser = configparser.ConfigParser()
+        parser.read(path)
+        if parser.has_section("database"):
+            config.update(
+                (key, value) for key, value in parser.items("database") if key in DEFAULTS
+            )
+    for key in DEFAULTS:
+        value = environ.get(f"INVENTORY_DB_{key.upper()}")
+        if value is not None:
+            config[key] = value
+    for key in INTEGER_SETTINGS:
+        config[key] = int(config[key])
+    config["journal_mode"] = str(config["journal_mode"]).lower()
+    config["synchronous"] = str(config["synchronous"]).lower()
+    if config["journal_mode"] not in JOURNAL_MODES:
+        raise ValueError(f"Unknown journal_mode: {config['journal_mode']}")
+    if config["synchronous"] not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Unknown synchronous mode: {config['synchronous']}")
+    return config
+
+def connect(config=None, readonly=False, check_same_thread=True):
+    config = config or load_config()
+    conn = sqlite3.connect(
+        config["path"],
+        timeout=config["busy_timeout"] / 1000,
+        check_same_thread=check_same_thread,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA busy_timeout = {config['busy_timeout']}")
+    if config["path"] != ":memory:" and not readonly:
+        conn.execute(f"PRAGMA journal_mode = {config['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {config['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {config['cache_size']}")
+    conn.execute(f"PRAGMA mmap_size = {config['mmap_size']}")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+def readonly_uri(path):
+    # for ATTACH; sqlite3 accepts URIs there
+    return f"file:{quote(os.path.abspath(path))}?mode=ro"
+
+class ConnectionPool:
+    # One writer connection shared under a lock and up to config["readers"]
+    # read-only connections handed out one per caller. In WAL mode readers
+    # keep working while the writer commits.
+    def __init__(self, config=None):
+        self.config = config or load_config()
+        self.writer_lock = threading.Lock()
+        self.writer_conn = connect(self.config, check_same_thread=False)
+        self.idle_readers = queue.LifoQueue()
+        self.reader_count = 0
+        self.count_lock = threading.Lock()
+
+    @contextmanager
+    def writer(self):
+        with self.writer_lock:
+            try:
+                yield self.writer_conn
+            except Exception:
+                self.writer_conn.rollback()
+                raise
+
+    @contextmanager
+    def reader(self):
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.idle_readers.put(conn)
+
+    def _acquire_reader(self):
+        try:
+            return self.idle_readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self.count_lock:
+            if self.reader_count < self.config["readers"]:
+                self.reader_count += 1
+                return connect(self.config, readonly=True, check_same_thread=False)
+        try:
+            return self.idle_readers.get(timeout=self.config["busy_timeout"] / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError("No reader connection available") from None
+
+    def close(self):
+        with self.writer_lock:
+            self.writer_conn.close()
+        while True:
+            try:
+                self.idle_readers.get_nowait().close()
+            except queue.Empty:
+                return
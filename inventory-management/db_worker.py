@@ -0,0 +1,80 @@
+import queue
+import threading
+
+POLL_INTERVAL_MS = 20
+
+class DatabaseWorker:
+    # Runs database jobs on one background thread that owns its own connection.
+    # Results are handed back to Tk by polling with root.after, so callbacks
+    # always run on the UI thread.
+    def __init__(self, root, setup, on_busy=None, on_error=None):
+        self.root = root
+        self.on_busy = on_busy
+        self.on_error = on_error
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.generation = 0
+        self.pending = 0
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, args=(setup,), daemon=True)
+        self.thread.start()
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def submit(self, job, on_done=None, on_error=None, cancellable=True):
+        # writes should pass cancellable=False so they are never dropped
+        generation = self.generation if cancellable else None
+        self.pending += 1
+        self._notify_busy()
+        self.jobs.put((generation, job, on_done, on_error))
+
+    def cancel_pending(self):
+        self.generation += 1
+
+    def close(self):
+        self.jobs.put(None)
+
+    def _is_stale(self, generation):
+        return generation is not None and generation != self.generation
+
+    def _run(self, setup):
+        try:
+            context, setup_error = setup(), None
+        except Exception as e:
+            context, setup_error = None, e
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                return
+            generation, job, on_done, on_error = item
+            if self._is_stale(generation):
+                self.results.put((generation, None, None, None))
+                continue
+            if setup_error is not None:
+                self.results.put((generation, on_error or self.on_error, None, setup_error))
+                continue
+            try:
+                self.results.put((generation, on_done, job(context), None))
+            except Exception as e:
+                self.results.put((generation, on_error or self.on_error, None, e))
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    generation, callback, result, error = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                self.pending -= 1
+                if callback is None or self._is_stale(generation):
+                    continue
+                callback(error if error is not None else result)
+        finally:
+            self._notify_busy()
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _notify_busy(self):
+        busy = self.pending > 0
+        if busy != self.busy:
+            self.busy = busy
+            if self.on_busy:
+                self.on_busy(busy)
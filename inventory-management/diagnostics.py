@@ -0,0 +1,238 @@
+import functools
+import json
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+
+SLOW_STATEMENT_MS = 50
+# at most this many slow statements keep their query plan
+SLOW_PLANS = 100
+# upper bounds of the latency histogram buckets, in ms; the last bucket is open
+BUCKETS_MS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MANAGERS = ("products", "stocks", "suppliers", "sales", "auth", "reports")
+LOCKING = ("BEGIN IMMEDIATE", "BEGIN EXCLUSIVE")
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+# The trace callback gets each statement with its parameters filled in;
+# statements are grouped with the literals taken out again. Lines starting
+# with "--" are SQLite's own statements (FTS upkeep and the like) and are
+# kept as they are.
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.IGNORECASE)
+_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+
+def normalize(sql):
+    sql = " ".join(sql.split())
+    if sql.startswith("--"):
+        return sql
+    sql = _LITERALS.sub("?", sql)
+    return _LISTS.sub("?, ...", sql)
+
+class Timings:
+    # a latency histogram plus the rows and errors seen by the same calls
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.errors = 0
+
+    def add(self, ms, rows=0, error=False):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.calls += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        self.errors += error
+
+    def percentile(self, fraction):
+        # the upper bound of the bucket the call at that rank fell into
+        rank, seen = fraction * self.calls, 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "errors": self.errors,
+            "histogram": {
+                f"<={bound}" if bound is not None else f">{BUCKETS_MS[-1]}": count
+                for bound, count in zip(BUCKETS_MS + (None,), self.counts) if count
+            },
+        }
+
+def _rows(result, changes):
+    # rows a manager call returned, or for a write the rows it changed
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        return sum(len(value) for value in result.values() if isinstance(value, list))
+    return changes
+
+class Tracer:
+    # Times every public manager method and every statement SQLite runs on
+    # an instrumented connection. Nothing is installed until instrument()
+    # is called, so with tracing off the managers run untouched.
+    #
+    # A statement is timed from when SQLite starts it until the next one
+    # starts or the manager call returns, so fetching its rows counts too.
+    # Trigger programs report their statement's text again; those repeats
+    # are folded into the statement. Rows are the rows it changed, triggers
+    # included. Lock wait is the time spent in BEGIN IMMEDIATE getting the
+    # write lock; a deferred transaction waits inside its first write
+    # instead, which shows up as that statement's latency. Statements slower
+    # than slow_ms get their EXPLAIN QUERY PLAN captured once the manager
+    # call has returned.
+    def __init__(self, slow_ms=SLOW_STATEMENT_MS):
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.callbacks = {}
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.methods = {}
+            self.statements = {}
+            self.lock_wait = Timings()
+            self.slow = {}
+
+    def instrument(self, managers):
+        conn = managers.products.conn
+        callback = self.callbacks[conn] = lambda sql: self._statement(conn, sql)
+        conn.set_trace_callback(callback)
+        for attr in MANAGERS:
+            manager = getattr(managers, attr)
+            for name in dir(type(manager)):
+                if not name.startswith("_") and callable(getattr(type(manager), name)):
+                    method = getattr(manager, name)
+                    if not hasattr(method, "__wrapped__"):
+                        setattr(manager, name, self._wrap(f"{type(manager).__name__}.{name}", method, conn))
+        return managers
+
+    def uninstrument(self, managers):
+        conn = managers.products.conn
+        conn.set_trace_callback(None)
+        self.callbacks.pop(conn, None)
+        for attr in MANAGERS:
+            manager = getattr(managers, attr)
+            for name, value in list(vars(manager).items()):
+                if hasattr(value, "__wrapped__"):
+                    delattr(manager, name)
+        return managers
+
+    def _wrap(self, name, method, conn):
+        @functools.wraps(method)
+        def traced(*args, **kwargs):
+            local = self.local
+            local.depth = getattr(local, "depth", 0) + 1
+            changes = conn.total_changes
+            started = time.perf_counter()
+            result, error = None, True
+            try:
+                result = method(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                finished = time.perf_counter()
+                self._finish_statement(finished)
+                local.depth -= 1
+                rows = _rows(result, conn.total_changes - changes)
+                with self.lock:
+                    timings = self.methods.get(name)
+                    if timings is None:
+                        timings = self.methods[name] = Timings()
+                    timings.add((finished - started) * 1000, rows, error)
+                if not local.depth and getattr(local, "explain", None):
+                    self._explain(conn)
+        return traced
+
+    def _statement(self, conn, sql):
+        now = time.perf_counter()
+        local = self.local
+        if not getattr(local, "depth", 0):
+            # only statements run by a manager call are timed
+            return
+        current = getattr(local, "statement", None)
+        if current and current[0] == sql and current[3] is conn:
+            return
+        self._finish_statement(now)
+        local.statement = (sql, now, conn.total_changes, conn)
+
+    def _finish_statement(self, now):
+        local = self.local
+        current = getattr(local, "statement", None)
+        if current is None:
+            return
+        local.statement = None
+        sql, started, changes, conn = current
+        ms = (now - started) * 1000
+        key = normalize(sql)
+        with self.lock:
+            timings = self.statements.get(key)
+            if timings is None:
+                timings = self.statements[key] = Timings()
+            timings.add(ms, conn.total_changes - changes)
+            if key.upper().startswith(LOCKING):
+                self.lock_wait.add(ms)
+            if ms < self.slow_ms:
+                return
+            slow = self.slow.get(key)
+            if slow is not None:
+                slow["calls"] += 1
+                slow["max_ms"] = round(max(slow["max_ms"], ms), 3)
+                return
+            if len(self.slow) >= SLOW_PLANS:
+                return
+            self.slow[key] = {"sql": sql, "calls": 1, "max_ms": round(ms, 3), "plan": []}
+        if key.upper().startswith(EXPLAINABLE):
+            local.explain = getattr(local, "explain", [])
+            local.explain.append((key, sql))
+
+    def _explain(self, conn):
+        # runs on the connection's own thread, with tracing paused so the
+        # EXPLAIN itself is not counted
+        pending, self.local.explain = self.local.explain, []
+        conn.set_trace_callback(None)
+        try:
+            for key, sql in pending:
+                try:
+                    plan = [detail for _, _, _, detail in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+                except sqlite3.Error as e:
+                    plan = [f"not available: {e}"]
+                with self.lock:
+                    if key in self.slow:
+                        self.slow[key]["plan"] = plan
+        finally:
+            conn.set_trace_callback(self.callbacks.get(conn))
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                "slow_ms": self.slow_ms,
+                "lock_wait": self.lock_wait.to_dict(),
+                "methods": {name: timings.to_dict() for name, timings in sorted(self.methods.items())},
+                "statements": {sql: timings.to_dict() for sql, timings in sorted(
+                    self.statements.items(), key=lambda item: -item[1].total_ms)},
+                "slow": sorted(
+                    ({"statement": key, **slow, "plan": list(slow["plan"])} for key, slow in self.slow.items()),
+                    key=lambda slow: -slow["max_ms"]),
+            }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
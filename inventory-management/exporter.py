@@ -0,0 +1,167 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+from reports import SECTIONS
+
+EXPORT_CHUNK_SIZE = 5000
+
+# Tables are exported in id order so a dump can continue from the last id of
+# the previous one (--since). Report sections are aggregates and always
+# exported whole.
+TABLES = {
+    "products": ("""
+        SELECT product_id, product_name, product_price
+        FROM products WHERE product_id > ? ORDER BY product_id
+        """, ("product_id", "product_name", "product_price")),
+    "stocks": ("""
+        SELECT s.stock_id, s.product_id, p.product_name, s.stock_quantity
+        FROM stocks s
+        JOIN products p ON s.product_id = p.product_id
+        WHERE s.stock_id > ? ORDER BY s.stock_id
+        """, ("stock_id", "product_id", "product_name", "stock_quantity")),
+    "suppliers": ("""
+        SELECT s.supplier_id, s.product_id, p.product_name, s.supplier_name
+        FROM suppliers s
+        JOIN products p ON s.product_id = p.product_id
+        WHERE s.supplier_id > ? ORDER BY s.supplier_id
+        """, ("supplier_id", "product_id", "product_name", "supplier_name")),
+    "sales": ("""
+        SELECT sa.sale_id, sa.stock_id, p.product_name, sa.amount_sold, sa.sold_at
+        FROM sales sa
+        JOIN stocks st ON sa.stock_id = st.stock_id
+        JOIN products p ON st.product_id = p.product_id
+        WHERE sa.sale_id > ? ORDER BY sa.sale_id
+        """, ("sale_id", "stock_id", "product_name", "amount_sold", "sold_at")),
+    # every insert, update and delete, for dumps that follow changes rather
+    # than reloading whole tables
+    "changes": ("""
+        SELECT change_id, table_name, op, row_id, changes, changed_at
+        FROM change_journal WHERE change_id > ? ORDER BY change_id
+        """, ("change_id", "table_name", "op", "row_id", "changes", "changed_at")),
+}
+
+REPORT_COLUMNS = {
+    "stock_per_product": ("product_name", "stock_quantity"),
+    "sales_per_product": ("product_name", "amount_sold"),
+    "price_distribution": ("product_name", "product_price"),
+    "sales_per_day": ("day", "units_sold"),
+    "totals": ("products", "stocks", "suppliers", "sales", "units_sold"),
+}
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+def stream_rows(conn, sql, params=(), chunk_size=EXPORT_CHUNK_SIZE):
+    # yields lists of at most chunk_size rows; only one chunk is held at a time
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+def source(kind, since=None):
+    if kind in TABLES:
+        sql, columns = TABLES[kind]
+        return sql, (since or 0,), columns
+    if kind in SECTIONS:
+        if since is not None:
+            raise ValueError(f"{kind} is a report and cannot be exported incrementally")
+        return SECTIONS[kind][0], (), REPORT_COLUMNS[kind]
+    raise ValueError(f"Unknown export: {kind}")
+
+def format_for(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower().lstrip(".")
+    if extension in ("ndjson", "json"):
+        return "jsonl"
+    return extension if extension in FORMATS else "csv"
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+def write_csv(chunks, columns, path):
+    with _open_text(path) as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+
+def write_jsonl(chunks, columns, path):
+    with _open_text(path) as f:
+        for rows in chunks:
+            f.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+def write_parquet(chunks, columns, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export needs pyarrow installed") from None
+    # each chunk becomes one row group; .gz selects gzip column compression
+    compression = "gzip" if path.endswith(".gz") else "snappy"
+    writer = None
+    try:
+        for rows in chunks:
+            table = pa.Table.from_pydict({
+                column: [row[i] for row in rows] for i, column in enumerate(columns)
+            })
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression=compression)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({column: [] for column in columns}), path, compression=compression)
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "parquet": write_parquet}
+
+def export(conn, kind, path, fmt=None, since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # returns (rows written, last id written) so the next incremental dump
+    # can pass the last id as since; for reports the last id is None
+    sql, params, columns = source(kind, since)
+    fmt = fmt or format_for(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format: {fmt}")
+    progress = {"count": 0, "last_id": since}
+
+    def counted(chunks):
+        for rows in chunks:
+            progress["count"] += len(rows)
+            if kind in TABLES:
+                progress["last_id"] = rows[-1][0]
+            yield rows
+
+    WRITERS[fmt](counted(stream_rows(conn, sql, params, chunk_size)), columns, path)
+    return progress["count"], progress["last_id"]
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Export tables or report sections to CSV, JSONL or Parquet")
+    parser.add_argument("kind", choices=list(TABLES) + list(SECTIONS))
+    parser.add_argument("path", help="output file; a .gz suffix compresses it")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--since", type=int, help="only rows with an id above this one")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    from connection import connect
+    conn = connect(readonly=True)
+    try:
+        count, last_id = export(conn, args.kind, args.path, args.format, args.since, args.chunk_size)
+    except ValueError as e:
+        print(e)
+        return 2
+    finally:
+        conn.close()
+    print(f"Exported {count} {args.kind} to {args.path}")
+    if last_id is not None:
+        print(f"Last id: {last_id}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
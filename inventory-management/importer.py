@@ -0,0 +1,62 @@
+import csv
+import json
+import os
+import sys
+
+FIELDS = {
+    "products": ("product_name", "product_price"),
+    "stocks": ("product_id", "stock_quantity"),
+    "suppliers": ("product_id", "supplier_name"),
+    "sales": ("stock_id", "amount_sold", "sold_at"),
+}
+
+def read_records(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson"):
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # keep the row numbering intact, the bulk add reports it
+                    yield None
+        else:
+            yield from csv.DictReader(f)
+
+def iter_rows(records, fields):
+    for record in records:
+        if not isinstance(record, dict):
+            yield None
+            continue
+        yield tuple(record.get(field) for field in fields)
+
+def import_file(add_many, kind, path, chunk_size=None):
+    rows = iter_rows(read_records(path), FIELDS[kind])
+    if chunk_size is None:
+        return add_many(rows)
+    return add_many(rows, chunk_size)
+
+def main(argv):
+    if len(argv) != 2 or argv[0] not in FIELDS:
+        print(f"Usage: python importer.py {{{'|'.join(FIELDS)}}} FILE.csv|FILE.jsonl")
+        return 2
+    from inventory import ProductManager, StockManager, Supplier, Sale
+    from migrations import migrate
+    kind, path = argv
+    pm = ProductManager()
+    loaders = {
+        "products": pm.add_products,
+        "stocks": StockManager(pm.conn).add_stocks,
+        "suppliers": Supplier(pm.conn).add_suppliers,
+        "sales": Sale(pm.conn).add_sales,
+    }
+    migrate(pm.conn)
+    inserted, errors = import_file(loaders[kind], kind, path)
+    for index, message in errors:
+        print(f"record {index + 1}: {message}")
+    print(f"Imported {inserted} {kind}, {len(errors)} rejected")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,980 @@
+import re
+import sqlite3
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from itertools import islice
+from connection import connect
+from migrations import migrate, ON_HAND_SQL, REFRESH_ALERTS
+from reports import ReportEngine
+
+BULK_CHUNK_SIZE = 5000
+PAGE_SIZE = 200
+SEARCH_LIMIT = 10
+PRODUCT_CACHE_SIZE = 10000
+
+def _chunked(rows, size):
+    rows = iter(rows)
+    offset = 0
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield offset, chunk
+        offset += len(chunk)
+
+def _existing_ids(cursor, table, column, ids):
+    found = set()
+    ids = list(ids)
+    # stay well below SQLite's bound-parameter limit
+    for start in range(0, len(ids), 900):
+        part = ids[start:start + 900]
+        cursor.execute(
+            f"SELECT {column} FROM {table} WHERE {column} IN ({','.join('?' * len(part))})",
+            part
+        )
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+def _keyset_page(cursor, select, id_column, sort_columns, after_id, limit, sort_by, after_value, descending):
+    op, direction = ("<", "DESC") if descending else (">", "ASC")
+    where, params = "", []
+    if sort_by is None or sort_columns[sort_by] == id_column:
+        if after_id is not None:
+            where, params = f"WHERE {id_column} {op} ?", [after_id]
+        order = f"{id_column} {direction}"
+    else:
+        column = sort_columns[sort_by]
+        if after_id is not None:
+            where, params = f"WHERE ({column}, {id_column}) {op} (?, ?)", [after_value, after_id]
+        order = f"{column} {direction}, {id_column} {direction}"
+    cursor.execute(f"{select} {where} ORDER BY {order} LIMIT ?", params + [limit])
+    return cursor.fetchall()
+
+def _insert_batch(conn, sql, batch, errors, label):
+    if not batch:
+        return 0
+    try:
+        conn.executemany(sql, [params for _, params in batch])
+        conn.commit()
+        return len(batch)
+    except sqlite3.Error:
+        conn.rollback()
+    # some row was rejected by the database, retry one by one to report it
+    inserted = 0
+    for index, params in batch:
+        try:
+            conn.execute(sql, params)
+            inserted += 1
+        except sqlite3.Error as e:
+            errors.append((index, f"Error adding {label}: {e}"))
+    conn.commit()
+    return inserted
+
+def _match_query(text):
+    # every word typed must start a word of the name; quoting each one keeps
+    # FTS5 query syntax in the input from being interpreted
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text or ""))
+
+def _search(cursor, sql, text, limit):
+    query = _match_query(text)
+    if not query:
+        return []
+    # matches come back in id order, which lets LIMIT stop the scan early;
+    # ranking would have to score every match of a one-letter prefix
+    cursor.execute(sql, (query, limit))
+    return cursor.fetchall()
+
+def _parse_price(value):
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid price. Please enter a number") from None
+    if price <= 0:
+        raise ValueError("Price must be positive")
+    return price
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid ID") from None
+
+def _fields(row, *sizes):
+    # the fields of a bulk row, or None when it is not a row of one of the
+    # accepted sizes (a blank JSONL record, a CSV line with extra cells)
+    try:
+        if len(row) in sizes:
+            return tuple(row)
+    except TypeError:
+        pass
+    return None
+
+def _parse_timestamp(value):
+    # sale times are stored as UTC text in CURRENT_TIMESTAMP's format; an
+    # empty value (a blank CSV cell) means none was given
+    if value is None or isinstance(value, str) and not value.strip():
+        return None
+    try:
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError("Invalid sale time") from None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+class Repository:
+    # Shared write path for the managers. Every mutation is a single
+    # statement: "not found" comes from cursor.rowcount and a missing parent
+    # from the foreign key, instead of a SELECT beforehand. The SQL strings
+    # are class constants so each is prepared once and then served from the
+    # connection's statement cache.
+    LABEL = None
+    NOT_FOUND = None
+    PARENT_NOT_FOUND = None
+    UPDATE_SQL = None
+    DELETE_SQL = None
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+
+    def _error_message(self, error, verb):
+        if (self.PARENT_NOT_FOUND and isinstance(error, sqlite3.IntegrityError)
+                and "FOREIGN KEY" in str(error)):
+            return self.PARENT_NOT_FOUND
+        return f"Error {verb} {self.LABEL}: {error}"
+
+    def _write(self, sql, params, verb, message):
+        try:
+            self.cursor.execute(sql, params)
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            return False, self._error_message(e, verb)
+        if self.cursor.rowcount == 0:
+            # the statement still opened a transaction; end it so the write
+            # lock is not held
+            self.conn.rollback()
+            return False, self.NOT_FOUND
+        self.conn.commit()
+        return True, message
+
+    def _write_many(self, sql, rows, prepare, verb):
+        changed, errors, batch = 0, [], []
+        for index, row in enumerate(rows):
+            try:
+                batch.append((index, prepare(*row)))
+            except TypeError:
+                errors.append((index, "Invalid row"))
+            except ValueError as e:
+                errors.append((index, str(e)))
+        try:
+            for index, params in batch:
+                try:
+                    self.cursor.execute(sql, params)
+                except sqlite3.IntegrityError as e:
+                    errors.append((index, self._error_message(e, verb)))
+                    continue
+                if self.cursor.rowcount == 0:
+                    errors.append((index, self.NOT_FOUND))
+                else:
+                    changed += 1
+            self.conn.commit()
+        except sqlite3.Error as e:
+            # nothing from this batch was kept
+            self.conn.rollback()
+            failed = {index for index, _ in errors}
+            errors += [(index, self._error_message(e, verb)) for index, _ in batch if index not in failed]
+            return 0, sorted(errors)
+        return changed, sorted(errors)
+
+    def _delete_params(self, row_id):
+        return (_parse_id(row_id),)
+
+    def edit_many(self, rows):
+        # rows hold the same arguments as the single edit method
+        return self._write_many(self.UPDATE_SQL, rows, self._update_params, "updating")
+
+    def delete_many(self, ids):
+        return self._write_many(self.DELETE_SQL, ((row_id,) for row_id in ids), self._delete_params, "deleting")
+
+class Product:
+    __slots__ = ("product_id", "product_name", "product_price")
+
+    def __init__(self, product_id=None, product_name="", product_price=0.0):
+        self.product_id = product_id
+        self.product_name = product_name
+        self.product_price = product_price
+
+    def __repr__(self):
+        return f"Product({self.product_id!r}, {self.product_name!r}, {self.product_price!r})"
+
+class ProductManager(Repository):
+    LABEL = "product"
+    NOT_FOUND = "No such product found"
+    INSERT_SQL = "INSERT INTO products (product_name, product_price) VALUES (?, ?)"
+    UPDATE_SQL = "UPDATE products SET product_name=?, product_price=? WHERE product_id=?"
+    DELETE_SQL = "DELETE FROM products WHERE product_id=?"
+    SELECT_SQL = "SELECT product_id, product_name, product_price FROM products"
+    SORT_COLUMNS = {
+        "product_id": "product_id",
+        "product_name": "product_name",
+        "product_price": "product_price",
+    }
+
+    def __init__(self, conn=None, cache_size=PRODUCT_CACHE_SIZE):
+        super().__init__(conn or connect())
+        self._create_tables()
+        # Identity map: while a product stays cached, every lookup returns the
+        # same Product object. Entries are dropped by this manager's own
+        # writes, and the whole map when PRAGMA data_version shows that
+        # another connection has committed.
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.data_version = None
+
+    def _create_tables(self):
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            product_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_name TEXT NOT NULL,
+            product_price REAL NOT NULL CHECK(product_price > 0)
+        )
+        """)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stocks (
+            stock_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            stock_quantity INTEGER NOT NULL CHECK(stock_quantity >= 0),
+            FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
+        )
+        """)
+        self.conn.commit()
+
+    def add_product(self, product_name, product_price):
+        try:
+            product_price = _parse_price(product_price)
+        except ValueError as e:
+            return False, str(e)
+        try:
+            self.cursor.execute(self.INSERT_SQL, (product_name, product_price))
+            self.conn.commit()
+            return True, f"Product added successfully with ID: {self.cursor.lastrowid}"
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            return False, self._error_message(e, "adding")
+
+    def add_products(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        inserted, errors = 0, []
+        for offset, chunk in _chunked(rows, chunk_size):
+            batch = []
+            for index, row in enumerate(chunk, offset):
+                row = _fields(row, 2)
+                if row is None:
+                    errors.append((index, "Invalid row"))
+                    continue
+                try:
+                    product_name, product_price = row
+                    product_price = float(product_price)
+                except (TypeError, ValueError):
+                    errors.append((index, "Invalid price. Please enter a number"))
+                    continue
+                if product_price <= 0:
+                    errors.append((index, "Price must be positive"))
+                    continue
+                batch.append((index, (product_name, product_price)))
+            inserted += _insert_batch(self.conn, self.INSERT_SQL, batch, errors, "product")
+        return inserted, sorted(errors)
+
+    def _forget(self, pid):
+        # entries are keyed by the int id, whatever type the caller passed;
+        # an id that is not a whole number drops the whole map
+        try:
+            self.cache.pop(_parse_id(pid), None)
+        except ValueError:
+            self.cache.clear()
+
+    def delete_product(self, pid):
+        self._forget(pid)
+        return self._write(self.DELETE_SQL, (pid,), "deleting", "Product deleted successfully")
+
+    def _update_params(self, pid, product_name, product_price):
+        return product_name, _parse_price(product_price), pid
+
+    def edit_product(self, pid, product_name, product_price):
+        try:
+            params = self._update_params(pid, product_name, product_price)
+        except ValueError as e:
+            return False, str(e)
+        self._forget(pid)
+        return self._write(self.UPDATE_SQL, params, "updating", "Product updated successfully")
+
+    def edit_many(self, rows):
+        rows = list(rows)
+        for row in rows:
+            if isinstance(row, (tuple, list)) and row:
+                self._forget(row[0])
+        return super().edit_many(rows)
+
+    def delete_many(self, ids):
+        ids = list(ids)
+        for pid in ids:
+            self._forget(pid)
+        return super().delete_many(ids)
+
+    def _check_data_version(self):
+        self.cursor.execute("PRAGMA data_version")
+        version = self.cursor.fetchone()[0]
+        if version != self.data_version:
+            self.cache.clear()
+            self.data_version = version
+
+    def _remember(self, row):
+        product = self.cache[row[0]] = Product(*row)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return product
+
+    def get_product(self, pid):
+        # looked up by the int id the cache is keyed by; an id that is not a
+        # whole number matches no product
+        try:
+            pid = _parse_id(pid)
+        except ValueError:
+            return None
+        self._check_data_version()
+        product = self.cache.get(pid)
+        if product is not None:
+            self.cache_hits += 1
+            self.cache.move_to_end(pid)
+            return product
+        self.cache_misses += 1
+        self.cursor.execute(self.SELECT_SQL + " WHERE product_id=?", (pid,))
+        row = self.cursor.fetchone()
+        return self._remember(row) if row else None
+
+    def get_products(self, ids):
+        # {product_id: Product} for the ids that exist
+        self._check_data_version()
+        found, missing = {}, []
+        for pid in ids:
+            try:
+                pid = _parse_id(pid)
+            except ValueError:
+                continue
+            product = self.cache.get(pid)
+            if product is None:
+                missing.append(pid)
+                continue
+            self.cache_hits += 1
+            self.cache.move_to_end(pid)
+            found[pid] = product
+        self.cache_misses += len(missing)
+        for start in range(0, len(missing), 900):
+            part = missing[start:start + 900]
+            self.cursor.execute(
+                f"{self.SELECT_SQL} WHERE product_id IN ({','.join('?' * len(part))})", part
+            )
+            for row in self.cursor.fetchall():
+                found[row[0]] = self._remember(row)
+        return found
+
+    def clear_cache(self):
+        self.cache.clear()
+
+    def get_all_products(self):
+        self.cursor.execute("SELECT * FROM products")
+        return self.cursor.fetchall()
+
+    def get_products_page(self, after_id=None, limit=PAGE_SIZE, sort_by=None, after_value=None, descending=False):
+        return _keyset_page(
+            self.cursor, self.SELECT_SQL, "product_id", self.SORT_COLUMNS,
+            after_id, limit, sort_by, after_value, descending
+        )
+
+    def search_products(self, text, limit=SEARCH_LIMIT):
+        return _search(self.cursor, """
+            SELECT p.product_id, p.product_name, p.product_price
+            FROM products_fts f
+            JOIN products p ON p.product_id = f.rowid
+            WHERE products_fts MATCH ?
+            ORDER BY f.rowid LIMIT ?
+            """, text, limit)
+
+class StockManager(Repository):
+    LABEL = "stock"
+    NOT_FOUND = "No such stock ID exists"
+    PARENT_NOT_FOUND = "No such product ID exists"
+    INSERT_SQL = "INSERT INTO stocks (product_id, stock_quantity) VALUES (?, ?)"
+    UPDATE_SQL = "UPDATE stocks SET stock_quantity=? WHERE stock_id=?"
+    DELETE_SQL = "DELETE FROM stocks WHERE stock_id=?"
+    SELECT_SQL = """
+        SELECT s.stock_id, p.product_id, p.product_name, s.stock_quantity 
+        FROM stocks s
+        JOIN products p ON s.product_id = p.product_id
+        """
+    SORT_COLUMNS = {
+        "stock_id": "s.stock_id",
+        "product_id": "p.product_id",
+        "product_name": "p.product_name",
+        "stock_quantity": "s.stock_quantity",
+    }
+
+    # products at or below their reorder point, kept by triggers (migration 6)
+    ALERTS_SQL = """
+        SELECT a.product_id, p.product_name, a.on_hand, a.reorder_point, a.raised_at
+        FROM stock_alerts a
+        JOIN products p ON a.product_id = p.product_id
+        """
+    ALERT_SORT_COLUMNS = {
+        "product_id": "a.product_id",
+        "product_name": "p.product_name",
+        "on_hand": "a.on_hand",
+        "reorder_point": "a.reorder_point",
+        "raised_at": "a.raised_at",
+    }
+
+    def _add_params(self, pid, quantity):
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid input. Please enter numbers") from None
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        return pid, quantity
+
+    def add_stock(self, pid, quantity):
+        try:
+            params = self._add_params(pid, quantity)
+        except ValueError as e:
+            return False, str(e)
+        try:
+            self.cursor.execute(self.INSERT_SQL, params)
+            self.conn.commit()
+            return True, f"Stock added successfully! Stock ID: {self.cursor.lastrowid}"
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            return False, self._error_message(e, "adding")
+
+    def add_stocks(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        inserted, errors = 0, []
+        for offset, chunk in _chunked(rows, chunk_size):
+            parsed = []
+            for index, row in enumerate(chunk, offset):
+                row = _fields(row, 2)
+                if row is None:
+                    errors.append((index, "Invalid row"))
+                    continue
+                try:
+                    pid, quantity = row
+                    pid, quantity = int(pid), int(quantity)
+                except (TypeError, ValueError):
+                    errors.append((index, "Invalid input. Please enter numbers"))
+                    continue
+                if quantity <= 0:
+                    errors.append((index, "Quantity must be positive"))
+                    continue
+                parsed.append((index, (pid, quantity)))
+            known = _existing_ids(self.cursor, "products", "product_id", {params[0] for _, params in parsed})
+            batch = []
+            for index, params in parsed:
+                if params[0] in known:
+                    batch.append((index, params))
+                else:
+                    errors.append((index, "No such product ID exists"))
+            inserted += _insert_batch(self.conn, self.INSERT_SQL, batch, errors, "stock")
+        return inserted, sorted(errors)
+
+    def _update_params(self, sid, quantity):
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid input") from None
+        if quantity < 0:
+            raise ValueError("Quantity cannot be negative")
+        return quantity, sid
+
+    def edit_stock(self, sid, quantity):
+        try:
+            params = self._update_params(sid, quantity)
+        except ValueError as e:
+            return False, str(e)
+        return self._write(self.UPDATE_SQL, params, "updating", "Stock updated successfully!")
+
+    def delete_stock(self, sid):
+        return self._write(self.DELETE_SQL, (sid,), "deleting", "Stock deleted successfully!")
+
+    def get_all_stocks(self):
+        self.cursor.execute(self.SELECT_SQL)
+        return self.cursor.fetchall()
+
+    def get_on_hand(self, pid):
+        self.cursor.execute("SELECT on_hand FROM inventory_balance WHERE product_id=?", (pid,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def check_balances(self):
+        self.cursor.execute(f"""
+        SELECT e.product_id, b.on_hand, e.on_hand
+        FROM ({ON_HAND_SQL}) e
+        LEFT JOIN inventory_balance b ON b.product_id = e.product_id
+        WHERE b.on_hand IS NULL OR b.on_hand != e.on_hand
+        """)
+        return self.cursor.fetchall()
+
+    def rebuild_balances(self):
+        try:
+            self.cursor.execute("DELETE FROM inventory_balance")
+            self.cursor.execute("INSERT INTO inventory_balance (product_id, on_hand) " + ON_HAND_SQL)
+            rebuilt = self.cursor.rowcount
+            # the rebuild inserts rows, which the alert triggers do not watch
+            for statement in REFRESH_ALERTS:
+                self.cursor.execute(statement)
+            self.conn.commit()
+            return True, f"Rebuilt on-hand balance for {rebuilt} products"
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            return False, f"Error rebuilding balances: {e}"
+
+    def set_reorder_point(self, pid, reorder_point):
+        try:
+            reorder_point = int(reorder_point)
+        except (TypeError, ValueError):
+            return False, "Invalid input"
+        if reorder_point < 0:
+            return False, "Reorder point cannot be negative"
+        try:
+            self.cursor.execute("""
+                INSERT INTO reorder_points (product_id, reorder_point) VALUES (?, ?)
+                ON CONFLICT (product_id) DO UPDATE SET reorder_point = excluded.reorder_point
+                """, (pid, reorder_point))
+            self.conn.commit()
+            return True, f"Reorder point set to {reorder_point}"
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            if isinstance(e, sqlite3.IntegrityError) and "FOREIGN KEY" in str(e):
+                return False, self.PARENT_NOT_FOUND
+            return False, f"Error setting reorder point: {e}"
+
+    def clear_reorder_point(self, pid):
+        try:
+            self.cursor.execute("DELETE FROM reorder_points WHERE product_id=?", (pid,))
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            return False, f"Error clearing reorder point: {e}"
+        if self.cursor.rowcount == 0:
+            self.conn.rollback()
+            return False, "No reorder point set for this product"
+        self.conn.commit()
+        return True, "Reorder point cleared"
+
+    def count_alerts(self):
+        self.cursor.execute("SELECT COUNT(*) FROM stock_alerts")
+        return self.cursor.fetchone()[0]
+
+    def get_alerts_page(self, after_id=None, limit=PAGE_SIZE, sort_by=None, after_value=None, descending=False):
+        return _keyset_page(
+            self.cursor, self.ALERTS_SQL, "a.product_id", self.ALERT_SORT_COLUMNS,
+            after_id, limit, sort_by, after_value, descending
+        )
+
+    def get_stocks_page(self, after_id=None, limit=PAGE_SIZE, sort_by=None, after_value=None, descending=False):
+        return _keyset_page(
+            self.cursor, self.SELECT_SQL, "s.stock_id", self.SORT_COLUMNS,
+            after_id, limit, sort_by, after_value, descending
+        )
+
+    def search_stocks(self, text, limit=SEARCH_LIMIT):
+        # stocks of the products whose name matches
+        return _search(self.cursor, """
+            SELECT s.stock_id, p.product_id, p.product_name, s.stock_quantity
+            FROM products_fts f
+            JOIN products p ON p.product_id = f.rowid
+            JOIN stocks s ON s.product_id = p.product_id
+            WHERE products_fts MATCH ?
+            ORDER BY f.rowid LIMIT ?
+            """, text, limit)
+
+class Supplier(Repository):
+    LABEL = "supplier"
+    NOT_FOUND = "No such supplier ID exists"
+    PARENT_NOT_FOUND = "No such product id exists"
+    INSERT_SQL = "INSERT INTO suppliers (product_id, supplier_name) VALUES (?, ?)"
+    UPDATE_SQL = "UPDATE suppliers SET product_id=?, supplier_name=? WHERE supplier_id=?"
+    DELETE_SQL = "DELETE FROM suppliers WHERE supplier_id=?"
+    SELECT_SQL = """
+        SELECT s.supplier_id, p.product_id, p.product_name, s.supplier_name 
+        FROM suppliers s
+        JOIN products p ON s.product_id = p.product_id
+        """
+    SORT_COLUMNS = {
+        "supplier_id": "s.supplier_id",
+        "product_id": "p.product_id",
+        "product_name": "p.product_name",
+        "supplier_name": "s.supplier_name",
+    }
+
+    def __init__(self, conn):
+        super().__init__(conn)
+        self._create_table()
+
+    def _create_table(self):
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS suppliers (
+            supplier_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            supplier_name TEXT NOT NULL,
+            FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
+        )
+        """)
+        self.conn.commit()
+
+    def add_supplier(self, pid, supplier_name):
+        try:
+            self.cursor.execute(self.INSERT_SQL, (pid, supplier_name))
+            self.conn.commit()
+            return True, "Supplier added successfully"
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            return False, self._error_message(e, "adding")
+
+    def add_suppliers(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        inserted, errors = 0, []
+        for offset, chunk in _chunked(rows, chunk_size):
+            parsed = []
+            for index, row in enumerate(chunk, offset):
+                row = _fields(row, 2)
+                if row is None:
+                    errors.append((index, "Invalid row"))
+                    continue
+                try:
+                    pid, supplier_name = row
+                    pid = int(pid)
+                except (TypeError, ValueError):
+                    errors.append((index, "Invalid product ID"))
+                    continue
+                parsed.append((index, (pid, supplier_name)))
+            known = _existing_ids(self.cursor, "products", "product_id", {params[0] for _, params in parsed})
+            batch = []
+            for index, params in parsed:
+                if params[0] in known:
+                    batch.append((index, params))
+                else:
+                    errors.append((index, "No such product id exists"))
+            inserted += _insert_batch(self.conn, self.INSERT_SQL, batch, errors, "supplier")
+        return inserted, sorted(errors)
+
+    def _update_params(self, sid, pid, supplier_name):
+        return pid, supplier_name, sid
+
+    def edit_supplier(self, sid, pid, supplier_name):
+        return self._write(
+            self.UPDATE_SQL, self._update_params(sid, pid, supplier_name),
+            "updating", "Supplier updated successfully"
+        )
+
+    def delete_supplier(self, sid):
+        return self._write(self.DELETE_SQL, (sid,), "deleting", "Supplier deleted successfully")
+
+    def get_all_suppliers(self):
+        self.cursor.execute(self.SELECT_SQL)
+        return self.cursor.fetchall()
+
+    def get_suppliers_page(self, after_id=None, limit=PAGE_SIZE, sort_by=None, after_value=None, descending=False):
+        return _keyset_page(
+            self.cursor, self.SELECT_SQL, "s.supplier_id", self.SORT_COLUMNS,
+            after_id, limit, sort_by, after_value, descending
+        )
+
+    def search_suppliers(self, text, limit=SEARCH_LIMIT):
+        return _search(self.cursor, """
+            SELECT s.supplier_id, p.product_id, p.product_name, s.supplier_name
+            FROM suppliers_fts f
+            JOIN suppliers s ON s.supplier_id = f.rowid
+            JOIN products p ON s.product_id = p.product_id
+            WHERE suppliers_fts MATCH ?
+            ORDER BY f.rowid LIMIT ?
+            """, text, limit)
+
+class Sale(Repository):
+    LABEL = "sale"
+    NOT_FOUND = "No such sale id exists"
+    PARENT_NOT_FOUND = "No such stock id exists"
+    INSERT_SQL = "INSERT INTO sales (stock_id, amount_sold, sold_at) VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP))"
+    # inserts nothing when the stock's product has less than the amount on hand
+    POST_SQL = """
+        INSERT INTO sales (stock_id, amount_sold, sold_at)
+        SELECT st.stock_id, ?, COALESCE(?, CURRENT_TIMESTAMP)
+        FROM stocks st
+        JOIN inventory_balance b ON b.product_id = st.product_id
+        WHERE st.stock_id = ? AND b.on_hand >= ?
+        """
+    AVAILABLE_SQL = """
+        SELECT b.on_hand
+        FROM stocks st
+        JOIN inventory_balance b ON b.product_id = st.product_id
+        WHERE st.stock_id = ?
+        """
+    UPDATE_SQL = "UPDATE sales SET amount_sold=? WHERE sale_id=?"
+    DELETE_SQL = "DELETE FROM sales WHERE sale_id=?"
+    SELECT_SQL = """
+        SELECT s.sale_id, st.stock_id, p.product_name, s.amount_sold, s.sold_at
+        FROM sales s
+        JOIN stocks st ON s.stock_id = st.stock_id
+        JOIN products p ON st.product_id = p.product_id
+        """
+    SORT_COLUMNS = {
+        "sale_id": "s.sale_id",
+        "stock_id": "st.stock_id",
+        "product_name": "p.product_name",
+        "amount_sold": "s.amount_sold",
+        "sold_at": "s.sold_at",
+    }
+
+    def __init__(self, conn):
+        super().__init__(conn)
+        self._create_table()
+
+    def _create_table(self):
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sales (
+            sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            stock_id INTEGER NOT NULL,
+            amount_sold INTEGER NOT NULL,
+            sold_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (stock_id) REFERENCES stocks(stock_id) ON DELETE CASCADE
+        )
+        """)
+        self.conn.commit()
+
+    def _parse_amount(self, amount):
+        try:
+            amount = int(amount)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid input") from None
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        return amount
+
+    def _add_params(self, sid, amount, sold_at=None):
+        return sid, self._parse_amount(amount), _parse_timestamp(sold_at)
+
+    def add_sale(self, sid, amount, sold_at=None):
+        try:
+            params = self._add_params(sid, amount, sold_at)
+        except ValueError as e:
+            return False, str(e)
+        try:
+            self.cursor.execute(self.INSERT_SQL, params)
+            self.conn.commit()
+            return True, "Sale added successfully"
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            return False, self._error_message(e, "adding")
+
+    def _parse_sales(self, chunk, offset, errors):
+        # (index, (stock id, amount, sold at)) for the rows of a bulk chunk
+        # that are well formed; the others go to errors
+        parsed = []
+        for index, row in enumerate(chunk, offset):
+            row = _fields(row, 2, 3)
+            if row is None:
+                errors.append((index, "Invalid row"))
+                continue
+            try:
+                # the sale time is optional and defaults to now
+                sid, amount, sold_at = row if len(row) == 3 else (*row, None)
+                sid, amount = int(sid), int(amount)
+            except (TypeError, ValueError):
+                errors.append((index, "Invalid input"))
+                continue
+            if amount <= 0:
+                errors.append((index, "Amount must be positive"))
+                continue
+            try:
+                sold_at = _parse_timestamp(sold_at)
+            except ValueError as e:
+                errors.append((index, str(e)))
+                continue
+            parsed.append((index, (sid, amount, sold_at)))
+        return parsed
+
+    def add_sales(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        inserted, errors = 0, []
+        for offset, chunk in _chunked(rows, chunk_size):
+            parsed = self._parse_sales(chunk, offset, errors)
+            known = _existing_ids(self.cursor, "stocks", "stock_id", {params[0] for _, params in parsed})
+            batch = []
+            for index, params in parsed:
+                if params[0] in known:
+                    batch.append((index, params))
+                else:
+                    errors.append((index, "No such stock id exists"))
+            inserted += _insert_batch(self.conn, self.INSERT_SQL, batch, errors, "sale")
+        return inserted, sorted(errors)
+
+    def post_sales(self, rows, chunk_size=BULK_CHUNK_SIZE):
+        # Like add_sales, but every row is posted as post_sale would: one
+        # that would oversell is refused and reported, the others are sold.
+        # Each chunk holds the write lock from its first check to its commit.
+        inserted, errors = 0, []
+        for offset, chunk in _chunked(rows, chunk_size):
+            parsed = self._parse_sales(chunk, offset, errors)
+            if not parsed:
+                continue
+            posted, refused = 0, []
+            try:
+                self.conn.commit()
+                self.cursor.execute("BEGIN IMMEDIATE")
+                for index, params in parsed:
+                    shortfall = self._post_line(*params)
+                    if shortfall:
+                        refused.append((index, shortfall))
+                    else:
+                        posted += 1
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                errors += [(index, self._error_message(e, "posting")) for index, _ in parsed]
+                continue
+            inserted += posted
+            errors += refused
+        return inserted, sorted(errors)
+
+    def _post(self, lines):
+        # Posts every line or none of them. The write lock is taken up front
+        # (BEGIN IMMEDIATE) so no other till can sell between our check and
+        # our insert; each insert only happens while the product still has
+        # enough on hand, and the balance trigger takes it off straight away,
+        # so later lines of the same basket see what earlier ones sold.
+        # Returns None, or (line index, message) for the line that stopped it.
+        parsed = []
+        for index, line in enumerate(lines):
+            line = _fields(line, 2, 3)
+            if line is None:
+                return index, "Invalid row"
+            try:
+                sid, amount, sold_at = line if len(line) == 3 else (*line, None)
+                parsed.append((_parse_id(sid), self._parse_amount(amount), _parse_timestamp(sold_at)))
+            except TypeError:
+                return index, "Invalid input"
+            except ValueError as e:
+                return index, str(e)
+        if not parsed:
+            return 0, "Nothing to post"
+        try:
+            self.conn.commit()
+            self.cursor.execute("BEGIN IMMEDIATE")
+            for index, params in enumerate(parsed):
+                shortfall = self._post_line(*params)
+                if shortfall:
+                    self.conn.rollback()
+                    return index, shortfall
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            return 0, self._error_message(e, "posting")
+        return None
+
+    def _post_line(self, sid, amount, sold_at):
+        # inside an open transaction; returns why the line was not sold, if
+        # it was not
+        self.cursor.execute(self.POST_SQL, (amount, sold_at, sid, amount))
+        if self.cursor.rowcount:
+            return None
+        self.cursor.execute(self.AVAILABLE_SQL, (sid,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return self.PARENT_NOT_FOUND
+        return f"Insufficient stock: {max(row[0], 0)} available"
+
+    def post_sale(self, sid, amount, sold_at=None):
+        # like add_sale, but refuses to sell more than is on hand
+        failed = self._post([(sid, amount, sold_at)])
+        if failed:
+            return False, failed[1]
+        return True, "Sale added successfully"
+
+    def post_basket(self, lines):
+        # lines are (stock id, amount[, sold at]); the basket is sold whole or
+        # not at all
+        lines = list(lines)
+        failed = self._post(lines)
+        if failed:
+            return False, f"Line {failed[0] + 1}: {failed[1]}" if len(lines) > 1 else failed[1]
+        return True, f"Basket posted: {len(lines)} sales"
+
+    def _update_params(self, sid, amount):
+        return self._parse_amount(amount), sid
+
+    def edit_sale(self, sid, amount):
+        try:
+            params = self._update_params(sid, amount)
+        except ValueError as e:
+            return False, str(e)
+        return self._write(self.UPDATE_SQL, params, "updating", "Sale updated successfully")
+
+    def delete_sale(self, sid):
+        return self._write(self.DELETE_SQL, (sid,), "deleting", "Sale deleted successfully")
+
+    def get_all_sales(self):
+        self.cursor.execute(self.SELECT_SQL)
+        return self.cursor.fetchall()
+
+    def get_sales_page(self, after_id=None, limit=PAGE_SIZE, sort_by=None, after_value=None, descending=False):
+        return _keyset_page(
+            self.cursor, self.SELECT_SQL, "s.sale_id", self.SORT_COLUMNS,
+            after_id, limit, sort_by, after_value, descending
+        )
+
+class Authentication:
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self._create_table()
+
+    def _create_table(self):
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS authentication (
+            admin_id TEXT PRIMARY KEY,
+            password TEXT
+        )
+        """)
+        self.conn.commit()
+
+    def _hash_password(self, password):
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def add_admin(self, admin_id, password):
+        hashed_password = self._hash_password(password)
+        try:
+            self.cursor.execute(
+                "INSERT INTO authentication (admin_id, password) VALUES (?, ?)",
+                (admin_id, hashed_password)
+            )
+            self.conn.commit()
+            return True, "Admin created successfully"
+        except sqlite3.IntegrityError:
+            return False, "Username already exists"
+
+    def login(self, admin_id, password):
+        hashed_password = self._hash_password(password)
+        self.cursor.execute(
+            "SELECT 1 FROM authentication WHERE admin_id=? AND password=?",
+            (admin_id, hashed_password)
+        )
+        result = self.cursor.fetchone()
+        return bool(result), "Successfully logged in" if result else "Invalid credentials"
+
+class Managers:
+    def __init__(self, conn=None):
+        self.products = ProductManager(conn)
+        self.stocks = StockManager(self.products.conn)
+        self.suppliers = Supplier(self.products.conn)
+        self.sales = Sale(self.products.conn)
+        self.auth = Authentication(self.products.conn)
+        migrate(self.products.conn)
+        self.reports = ReportEngine(self.products.conn)
@@ -0,0 +1,142 @@
+import argparse
+import json
+import sys
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+JOURNAL_BATCH_SIZE = 1000
+JOURNAL_KEEP_DAYS = 7
+
+# One row of change_journal; changes is a dict: every column for an insert,
+# the changed columns with their new values for an update, the old row for
+# a delete.
+Change = namedtuple("Change", "change_id table_name op row_id changes changed_at")
+
+def read_changes(conn, after_id=0, limit=JOURNAL_BATCH_SIZE, tables=None):
+    # the next changes after after_id, oldest first
+    sql = "SELECT change_id, table_name, op, row_id, changes, changed_at FROM change_journal WHERE change_id > ?"
+    params = [after_id]
+    if tables:
+        sql += f" AND table_name IN ({','.join('?' * len(tables))})"
+        params += list(tables)
+    cursor = conn.execute(sql + " ORDER BY change_id LIMIT ?", params + [limit])
+    return [
+        Change(change_id, table_name, op, row_id, json.loads(changes) if changes else {}, changed_at)
+        for change_id, table_name, op, row_id, changes, changed_at in cursor.fetchall()
+    ]
+
+def last_change_id(conn):
+    return conn.execute("SELECT COALESCE(MAX(change_id), 0) FROM change_journal").fetchone()[0]
+
+class JournalConsumer:
+    # Tails the journal from where this consumer last acknowledged, so a
+    # downstream job only looks at what changed since its previous run. The
+    # position lives in journal_consumers and survives restarts; compaction
+    # never removes changes a registered consumer has not acknowledged.
+    # A new consumer starts from the oldest change kept, or with
+    # start="latest" from now on.
+    def __init__(self, conn, name, batch_size=JOURNAL_BATCH_SIZE, tables=None, start="earliest"):
+        if start not in ("earliest", "latest"):
+            raise ValueError(f"Unknown start: {start}")
+        self.conn = conn
+        self.name = name
+        self.batch_size = batch_size
+        self.tables = tables
+        self.conn.execute(
+            "INSERT OR IGNORE INTO journal_consumers (name, position) VALUES (?, ?)",
+            (name, last_change_id(conn) if start == "latest" else 0)
+        )
+        self.conn.commit()
+
+    def position(self):
+        row = self.conn.execute("SELECT position FROM journal_consumers WHERE name=?", (self.name,)).fetchone()
+        return row[0] if row else 0
+
+    def poll(self):
+        # the next batch; reading it does not move the position
+        return read_changes(self.conn, self.position(), self.batch_size, self.tables)
+
+    def ack(self, change_id):
+        # everything up to change_id has been handled
+        self.conn.execute(
+            "UPDATE journal_consumers SET position = MAX(position, ?), updated_at = CURRENT_TIMESTAMP WHERE name=?",
+            (change_id, self.name)
+        )
+        self.conn.commit()
+
+    def batches(self):
+        # each batch is acknowledged once the loop body has finished with it
+        # and asks for the next one
+        while True:
+            batch = self.poll()
+            if not batch:
+                return
+            yield batch
+            self.ack(batch[-1].change_id)
+
+def consumers(conn):
+    # (name, position, changes still to read, last acknowledged at)
+    last = last_change_id(conn)
+    return [
+        (name, position, last - position, updated_at)
+        for name, position, updated_at in conn.execute(
+            "SELECT name, position, updated_at FROM journal_consumers ORDER BY name")
+    ]
+
+def drop_consumer(conn, name):
+    conn.execute("DELETE FROM journal_consumers WHERE name=?", (name,))
+    conn.commit()
+
+def compact(conn, keep_days=JOURNAL_KEEP_DAYS):
+    # Removes changes older than keep_days that every registered consumer
+    # has acknowledged; returns how many went. Ids are never reused, so a
+    # consumer can always tell where it stands.
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime("%Y-%m-%d %H:%M:%S")
+    cursor = conn.execute("""
+        DELETE FROM change_journal
+        WHERE change_id <= (SELECT COALESCE(MIN(position), (SELECT MAX(change_id) FROM change_journal))
+                            FROM journal_consumers)
+            AND changed_at < ?
+        """, (cutoff,))
+    conn.commit()
+    return cursor.rowcount
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Read or compact the change journal")
+    commands = parser.add_subparsers(dest="command", required=True)
+    tail = commands.add_parser("tail", help="print new changes as JSON lines and acknowledge them")
+    tail.add_argument("consumer")
+    tail.add_argument("--table", action="append", dest="tables", help="only changes to this table")
+    tail.add_argument("--latest", action="store_true", help="a new consumer skips existing changes")
+    tail.add_argument("--batch-size", type=int, default=JOURNAL_BATCH_SIZE)
+    compaction = commands.add_parser("compact", help="remove old changes every consumer has read")
+    compaction.add_argument("--keep-days", type=float, default=JOURNAL_KEEP_DAYS)
+    commands.add_parser("consumers", help="list consumers and how far behind they are")
+    drop = commands.add_parser("drop", help="forget a consumer")
+    drop.add_argument("consumer")
+    args = parser.parse_args(argv)
+
+    from connection import connect
+    from migrations import migrate
+    conn = connect()
+    migrate(conn)
+    try:
+        if args.command == "tail":
+            consumer = JournalConsumer(
+                conn, args.consumer, args.batch_size, args.tables, "latest" if args.latest else "earliest")
+            for batch in consumer.batches():
+                for change in batch:
+                    print(json.dumps(change._asdict()))
+        elif args.command == "compact":
+            print(f"Removed {compact(conn, args.keep_days)} changes")
+        elif args.command == "consumers":
+            for name, position, lag, updated_at in consumers(conn):
+                print(f"{name}: at {position}, {lag} behind, last read {updated_at}")
+        else:
+            drop_consumer(conn, args.consumer)
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,832 +1,894 @@
-import sqlite3
-import hashlib
-import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-import pandas as pd
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-class Product:
-    def __init__(self, product_id=None, product_name="", product_price=0.0):
-        self.product_id = product_id
-        self.product_name = product_name
-        self.product_price = product_price
-
-class ProductManager:
-    def __init__(self):
-        self.conn = sqlite3.connect("inventory.db")
-        self.conn.execute("PRAGMA foreign_keys = ON")
-        self.cursor = self.conn.cursor()
-        self._create_tables()
-
-    def _create_tables(self):
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS products (
-            product_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_name TEXT NOT NULL,
-            product_price REAL NOT NULL CHECK(product_price > 0)
-        )
-        """)
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS stocks (
-            stock_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_id INTEGER NOT NULL,
-            stock_quantity INTEGER NOT NULL CHECK(stock_quantity >= 0),
-            FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
-        )
-        """)
-        self.conn.commit()
-
-    def add_product(self, product_name, product_price):
-        try:
-            product_price = float(product_price)
-            if product_price <= 0:
-                return False, "Price must be positive"
-            self.cursor.execute(
-                "INSERT INTO products (product_name, product_price) VALUES (?, ?)",
-                (product_name, product_price)
-            )
-            self.conn.commit()
-            return True, f"Product added successfully with ID: {self.cursor.lastrowid}"
-        except ValueError:
-            return False, "Invalid price. Please enter a number"
-        except sqlite3.Error as e:
-            return False, f"Error adding product: {e}"
-
-    def delete_product(self, pid):
-        try:
-            self.cursor.execute("SELECT 1 FROM products WHERE product_id=?", (pid,))
-            if not self.cursor.fetchone():
-                return False, "No such product found"
-            self.cursor.execute("DELETE FROM products WHERE product_id=?", (pid,))
-            self.conn.commit()
-            return True, "Product deleted successfully"
-        except sqlite3.Error as e:
-            return False, f"Error deleting product: {e}"
-
-    def edit_product(self, pid, product_name, product_price):
-        try:
-            product_price = float(product_price)
-            if product_price <= 0:
-                return False, "Price must be positive"
-            self.cursor.execute("SELECT * FROM products WHERE product_id=?", (pid,))
-            if not self.cursor.fetchone():
-                return False, "No such product found"
-            self.cursor.execute(
-                "UPDATE products SET product_name=?, product_price=? WHERE product_id=?",
-                (product_name, product_price, pid)
-            )
-            self.conn.commit()
-            return True, "Product updated successfully"
-        except ValueError:
-            return False, "Invalid price. Please enter a number"
-        except sqlite3.Error as e:
-            return False, f"Error updating product: {e}"
-
-    def get_all_products(self):
-        self.cursor.execute("SELECT * FROM products")
-        return self.cursor.fetchall()
-
-class StockManager:
-    def __init__(self, conn):
-        self.conn = conn
-        self.cursor = conn.cursor()
-
-    def add_stock(self, pid, quantity):
-        try:
-            quantity = int(quantity)
-            if quantity <= 0:
-                return False, "Quantity must be positive"
-            self.cursor.execute("SELECT 1 FROM products WHERE product_id=?", (pid,))
-            if not self.cursor.fetchone():
-                return False, "No such product ID exists"
-            self.cursor.execute(
-                "INSERT INTO stocks (product_id, stock_quantity) VALUES (?, ?)",
-                (pid, quantity)
-            )
-            self.conn.commit()
-            return True, f"Stock added successfully! Stock ID: {self.cursor.lastrowid}"
-        except ValueError:
-            return False, "Invalid input. Please enter numbers"
-        except sqlite3.Error as e:
-            return False, f"Error adding stock: {e}"
-
-    def edit_stock(self, sid, quantity):
-        try:
-            quantity = int(quantity)
-            if quantity < 0:
-                return False, "Quantity cannot be negative"
-            self.cursor.execute("SELECT * FROM stocks WHERE stock_id=?", (sid,))
-            if not self.cursor.fetchone():
-                return False, "No such stock ID exists"
-            self.cursor.execute(
-                "UPDATE stocks SET stock_quantity=? WHERE stock_id=?",
-                (quantity, sid)
-            )
-            self.conn.commit()
-            return True, "Stock updated successfully!"
-        except ValueError:
-            return False, "Invalid input"
-        except sqlite3.Error as e:
-            return False, f"Error updating stock: {e}"
-
-    def delete_stock(self, sid):
-        try:
-            self.cursor.execute("SELECT 1 FROM stocks WHERE stock_id=?", (sid,))
-            if not self.cursor.fetchone():
-                return False, "No such stock ID exists"
-            self.cursor.execute("DELETE FROM stocks WHERE stock_id=?", (sid,))
-            self.conn.commit()
-            return True, "Stock deleted successfully!"
-        except sqlite3.Error as e:
-            return False, f"Error deleting stock: {e}"
-
-    def get_all_stocks(self):
-        self.cursor.execute("""
-        SELECT s.stock_id, p.product_id, p.product_name, s.stock_quantity 
-        FROM stocks s
-        JOIN products p ON s.product_id = p.product_id
-        """)
-        return self.cursor.fetchall()
-
-class Supplier:
-    def __init__(self, conn):
-        self.conn = conn
-        self.cursor = conn.cursor()
-        self._create_table()
-
-    def _create_table(self):
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS suppliers (
-            supplier_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_id INTEGER NOT NULL,
-            supplier_name TEXT NOT NULL,
-            FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
-        )
-        """)
-        self.conn.commit()
-
-    def add_supplier(self, pid, supplier_name):
-        try:
-            self.cursor.execute("SELECT 1 FROM products WHERE product_id=?", (pid,))
-            if not self.cursor.fetchone():
-                return False, "No such product id exists"
-            self.cursor.execute(
-                "INSERT INTO suppliers (product_id, supplier_name) VALUES (?, ?)",
-                (pid, supplier_name)
-            )
-            self.conn.commit()
-            return True, "Supplier added successfully"
-        except sqlite3.Error as e:
-            return False, f"Error adding supplier: {e}"
-
-    def edit_supplier(self, sid, pid, supplier_name):
-        try:
-            self.cursor.execute("SELECT 1 FROM suppliers WHERE supplier_id=?", (sid,))
-            if not self.cursor.fetchone():
-                return False, "No such supplier ID exists"
-            self.cursor.execute("SELECT 1 FROM products WHERE product_id=?", (pid,))
-            if not self.cursor.fetchone():
-                return False, "No such product id exists"
-            self.cursor.execute(
-                "UPDATE suppliers SET product_id=?, supplier_name=? WHERE supplier_id=?",
-                (pid, supplier_name, sid)
-            )
-            self.conn.commit()
-            return True, "Supplier updated successfully"
-        except sqlite3.Error as e:
-            return False, f"Error updating supplier: {e}"
-
-    def delete_supplier(self, sid):
-        try:
-            self.cursor.execute("SELECT 1 FROM suppliers WHERE supplier_id=?", (sid,))
-            if not self.cursor.fetchone():
-                return False, "No such supplier ID exists"
-            self.cursor.execute("DELETE FROM suppliers WHERE supplier_id=?", (sid,))
-            self.conn.commit()
-            return True, "Supplier deleted successfully"
-        except sqlite3.Error as e:
-            return False, f"Error deleting supplier: {e}"
-
-    def get_all_suppliers(self):
-        self.cursor.execute("""
-        SELECT s.supplier_id, p.product_id, p.product_name, s.supplier_name 
-        FROM suppliers s
-        JOIN products p ON s.product_id = p.product_id
-        """)
-        return self.cursor.fetchall()
-
-class Sale:
-    def __init__(self, conn):
-        self.conn = conn
-        self.cursor = conn.cursor()
-        self._create_table()
-
-    def _create_table(self):
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sales (
-            sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            stock_id INTEGER NOT NULL,
-            amount_sold INTEGER NOT NULL,
-            FOREIGN KEY (stock_id) REFERENCES stocks(stock_id) ON DELETE CASCADE
-        )
-        """)
-        self.conn.commit()
-
-    def add_sale(self, sid, amount):
-        try:
-            amount = int(amount)
-            if amount <= 0:
-                return False, "Amount must be positive"
-            self.cursor.execute("SELECT 1 FROM stocks WHERE stock_id=?", (sid,))
-            if not self.cursor.fetchone():
-                return False, "No such stock id exists"
-            self.cursor.execute(
-                "INSERT INTO sales (stock_id, amount_sold) VALUES (?, ?)",
-                (sid, amount)
-            )
-            self.conn.commit()
-            return True, "Sale added successfully"
-        except sqlite3.Error as e:
-            return False, f"Error adding sale: {e}"
-
-    def edit_sale(self, sid, amount):
-        try:
-            amount = int(amount)
-            if amount <= 0:
-                return False, "Amount must be positive"
-            self.cursor.execute("SELECT 1 FROM sales WHERE sale_id=?", (sid,))
-            if not self.cursor.fetchone():
-                return False, "No such sale id exists"
-            self.cursor.execute(
-                "UPDATE sales SET amount_sold=? WHERE sale_id=?",
-                (amount, sid)
-            )
-            self.conn.commit()
-            return True, "Sale updated successfully"
-        except sqlite3.Error as e:
-            return False, f"Error updating sale: {e}"
-
-    def delete_sale(self, sid):
-        try:
-            self.cursor.execute("SELECT 1 FROM sales WHERE sale_id=?", (sid,))
-            if not self.cursor.fetchone():
-                return False, "No such sale id exists"
-            self.cursor.execute("DELETE FROM sales WHERE sale_id=?", (sid,))
-            self.conn.commit()
-            return True, "Sale deleted successfully"
-        except sqlite3.Error as e:
-            return False, f"Error deleting sale: {e}"
-
-    def get_all_sales(self):
-        self.cursor.execute("""
-        SELECT s.sale_id, st.stock_id, p.product_name, s.amount_sold 
-        FROM sales s
-        JOIN stocks st ON s.stock_id = st.stock_id
-        JOIN products p ON st.product_id = p.product_id
-        """)
-        return self.cursor.fetchall()
-
-class Authentication:
-    def __init__(self, conn):
-        self.conn = conn
-        self.cursor = conn.cursor()
-        self._create_table()
-
-    def _create_table(self):
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS authentication (
-            admin_id TEXT PRIMARY KEY,
-            password TEXT
-        )
-        """)
-        self.conn.commit()
-
-    def _hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
-
-    def add_admin(self, admin_id, password):
-        hashed_password = self._hash_password(password)
-        try:
-            self.cursor.execute(
-                "INSERT INTO authentication (admin_id, password) VALUES (?, ?)",
-                (admin_id, hashed_password)
-            )
-            self.conn.commit()
-            return True, "Admin created successfully"
-        except sqlite3.IntegrityError:
-            return False, "Username already exists"
-
-    def login(self, admin_id, password):
-        hashed_password = self._hash_password(password)
-        self.cursor.execute(
-            "SELECT 1 FROM authentication WHERE admin_id=? AND password=?",
-            (admin_id, hashed_password)
-        )
-        result = self.cursor.fetchone()
-        return bool(result), "Successfully logged in" if result else "Invalid credentials"
-
-class MainApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Product Management System")
-        self.pm = ProductManager()
-        self.supplier_manager = Supplier(self.pm.conn)
-        self.sale_manager = Sale(self.pm.conn)
-        self.auth = Authentication(self.pm.conn)
-        self.create_login_window()
-
-    def create_login_window(self):
-        self.clear_window()
-        tk.Label(self.root, text="Product Management System", font=("Arial", 16)).pack(pady=10)
-        tk.Label(self.root, text="Username:").pack()
-        self.username_entry = tk.Entry(self.root)
-        self.username_entry.pack()
-        tk.Label(self.root, text="Password:").pack()
-        self.password_entry = tk.Entry(self.root, show="*")
-        self.password_entry.pack()
-        tk.Button(self.root, text="Login", command=self.handle_login).pack(pady=10)
-        tk.Button(self.root, text="Create Admin", command=self.handle_create_admin).pack()
-
-    def clear_window(self):
-        for widget in self.root.winfo_children():
-            widget.destroy()
-
-    def handle_login(self):
-        username = self.username_entry.get()
-        password = self.password_entry.get()
-        success, message = self.auth.login(username, password)
-        messagebox.showinfo("Login", message)
-        if success:
-            self.create_main_menu()
-        else:
-            self.create_login_window()
-
-    def handle_create_admin(self):
-        username = self.username_entry.get()
-        password = self.password_entry.get()
-        success, message = self.auth.add_admin(username, password)
-        messagebox.showinfo("Create Admin", message)
-
-    def create_main_menu(self):
-        self.clear_window()
-        tk.Label(self.root, text="Product Management System", font=("Arial", 16)).pack(pady=10)
-        tk.Button(self.root, text="Product Management", command=self.product_management).pack(pady=5)
-        tk.Button(self.root, text="Stock Management", command=self.stock_management).pack(pady=5)
-        tk.Button(self.root, text="Supplier Management", command=self.supplier_management).pack(pady=5)
-        tk.Button(self.root, text="Sales Management", command=self.sales_management).pack(pady=5)
-        tk.Button(self.root, text="Generate Reports", command=self.generate_reports).pack(pady=5)
-        tk.Button(self.root, text="Exit", command=self.root.quit).pack(pady=5)
-
-    def product_management(self):
-        self.clear_window()
-        tk.Label(self.root, text="Product Management", font=("Arial", 14)).pack(pady=10)
-        tk.Button(self.root, text="Add Product", command=self.add_product_ui).pack(pady=5)
-        tk.Button(self.root, text="Edit Product", command=self.edit_product_ui).pack(pady=5)
-        tk.Button(self.root, text="Delete Product", command=self.delete_product_ui).pack(pady=5)
-        tk.Button(self.root, text="View All Products", command=self.view_all_products).pack(pady=5)
-        tk.Button(self.root, text="Back to Main Menu", command=self.create_main_menu).pack(pady=5)
-
-    def add_product_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Add Product", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Product Name:").pack()
-        name_entry = tk.Entry(self.root)
-        name_entry.pack()
-        tk.Label(self.root, text="Product Price:").pack()
-        price_entry = tk.Entry(self.root)
-        price_entry.pack()
-        tk.Button(self.root, text="Add", command=lambda: self.handle_add_product(name_entry.get(), price_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.product_management).pack(pady=5)
-
-    def handle_add_product(self, name, price):
-        success, message = self.pm.add_product(name, price)
-        messagebox.showinfo("Add Product", message)
-        if success:
-            self.product_management()
-
-    def edit_product_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Edit Product", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Product ID:").pack()
-        pid_entry = tk.Entry(self.root)
-        pid_entry.pack()
-        tk.Label(self.root, text="New Product Name:").pack()
-        name_entry = tk.Entry(self.root)
-        name_entry.pack()
-        tk.Label(self.root, text="New Product Price:").pack()
-        price_entry = tk.Entry(self.root)
-        price_entry.pack()
-        tk.Button(self.root, text="Update", command=lambda: self.handle_edit_product(pid_entry.get(), name_entry.get(), price_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.product_management).pack(pady=5)
-
-    def handle_edit_product(self, pid, name, price):
-        try:
-            pid = int(pid)
-            success, message = self.pm.edit_product(pid, name, price)
-            messagebox.showinfo("Edit Product", message)
-            if success:
-                self.product_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid product ID")
-
-    def delete_product_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Delete Product", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Product ID:").pack()
-        pid_entry = tk.Entry(self.root)
-        pid_entry.pack()
-        tk.Button(self.root, text="Delete", command=lambda: self.handle_delete_product(pid_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.product_management).pack(pady=5)
-
-    def handle_delete_product(self, pid):
-        try:
-            pid = int(pid)
-            success, message = self.pm.delete_product(pid)
-            messagebox.showinfo("Delete Product", message)
-            if success:
-                self.product_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid product ID")
-
-    def view_all_products(self):
-        self.clear_window()
-        tk.Label(self.root, text="All Products", font=("Arial", 14)).pack(pady=10)
-        tree = ttk.Treeview(self.root, columns=("ID", "Name", "Price"), show="headings")
-        tree.heading("ID", text="Product ID")
-        tree.heading("Name", text="Product Name")
-        tree.heading("Price", text="Price")
-        tree.pack(fill="both", expand=True)
-        for product in self.pm.get_all_products():
-            tree.insert("", "end", values=product)
-        tk.Button(self.root, text="Back", command=self.product_management).pack(pady=5)
-
-    def stock_management(self):
-        self.clear_window()
-        tk.Label(self.root, text="Stock Management", font=("Arial", 14)).pack(pady=10)
-        tk.Button(self.root, text="Add Stock", command=self.add_stock_ui).pack(pady=5)
-        tk.Button(self.root, text="Edit Stock", command=self.edit_stock_ui).pack(pady=5)
-        tk.Button(self.root, text="Delete Stock", command=self.delete_stock_ui).pack(pady=5)
-        tk.Button(self.root, text="View All Stocks", command=self.view_all_stocks).pack(pady=5)
-        tk.Button(self.root, text="Back to Main Menu", command=self.create_main_menu).pack(pady=5)
-
-    def add_stock_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Add Stock", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Product ID:").pack()
-        pid_entry = tk.Entry(self.root)
-        pid_entry.pack()
-        tk.Label(self.root, text="Quantity:").pack()
-        quantity_entry = tk.Entry(self.root)
-        quantity_entry.pack()
-        tk.Button(self.root, text="Add", command=lambda: self.handle_add_stock(pid_entry.get(), quantity_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.stock_management).pack(pady=5)
-
-    def handle_add_stock(self, pid, quantity):
-        try:
-            pid = int(pid)
-            success, message = StockManager(self.pm.conn).add_stock(pid, quantity)
-            messagebox.showinfo("Add Stock", message)
-            if success:
-                self.stock_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid input")
-
-    def edit_stock_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Edit Stock", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Stock ID:").pack()
-        sid_entry = tk.Entry(self.root)
-        sid_entry.pack()
-        tk.Label(self.root, text="New Quantity:").pack()
-        quantity_entry = tk.Entry(self.root)
-        quantity_entry.pack()
-        tk.Button(self.root, text="Update", command=lambda: self.handle_edit_stock(sid_entry.get(), quantity_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.stock_management).pack(pady=5)
-
-    def handle_edit_stock(self, sid, quantity):
-        try:
-            sid = int(sid)
-            success, message = StockManager(self.pm.conn).edit_stock(sid, quantity)
-            messagebox.showinfo("Edit Stock", message)
-            if success:
-                self.stock_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid input")
-
-    def delete_stock_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Delete Stock", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Stock ID:").pack()
-        sid_entry = tk.Entry(self.root)
-        sid_entry.pack()
-        tk.Button(self.root, text="Delete", command=lambda: self.handle_delete_stock(sid_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.stock_management).pack(pady=5)
-
-    def handle_delete_stock(self, sid):
-        try:
-            sid = int(sid)
-            success, message = StockManager(self.pm.conn).delete_stock(sid)
-            messagebox.showinfo("Delete Stock", message)
-            if success:
-                self.stock_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid stock ID")
-
-    def view_all_stocks(self):
-        self.clear_window()
-        tk.Label(self.root, text="All Stocks", font=("Arial", 14)).pack(pady=10)
-        tree = ttk.Treeview(self.root, columns=("Stock ID", "Product ID", "Product Name", "Quantity"), show="headings")
-        tree.heading("Stock ID", text="Stock ID")
-        tree.heading("Product ID", text="Product ID")
-        tree.heading("Product Name", text="Product Name")
-        tree.heading("Quantity", text="Quantity")
-        tree.pack(fill="both", expand=True)
-        for stock in StockManager(self.pm.conn).get_all_stocks():
-            tree.insert("", "end", values=stock)
-        tk.Button(self.root, text="Back", command=self.stock_management).pack(pady=5)
-
-    def supplier_management(self):
-        self.clear_window()
-        tk.Label(self.root, text="Supplier Management", font=("Arial", 14)).pack(pady=10)
-        tk.Button(self.root, text="Add Supplier", command=self.add_supplier_ui).pack(pady=5)
-        tk.Button(self.root, text="Edit Supplier", command=self.edit_supplier_ui).pack(pady=5)
-        tk.Button(self.root, text="Delete Supplier", command=self.delete_supplier_ui).pack(pady=5)
-        tk.Button(self.root, text="View All Suppliers", command=self.view_all_suppliers).pack(pady=5)
-        tk.Button(self.root, text="Back to Main Menu", command=self.create_main_menu).pack(pady=5)
-
-    def add_supplier_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Add Supplier", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Product ID:").pack()
-        pid_entry = tk.Entry(self.root)
-        pid_entry.pack()
-        tk.Label(self.root, text="Supplier Name:").pack()
-        name_entry = tk.Entry(self.root)
-        name_entry.pack()
-        tk.Button(self.root, text="Add", command=lambda: self.handle_add_supplier(pid_entry.get(), name_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.supplier_management).pack(pady=5)
-
-    def handle_add_supplier(self, pid, name):
-        try:
-            pid = int(pid)
-            success, message = self.supplier_manager.add_supplier(pid, name)
-            messagebox.showinfo("Add Supplier", message)
-            if success:
-                self.supplier_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid product ID")
-
-    def edit_supplier_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Edit Supplier", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Supplier ID:").pack()
-        sid_entry = tk.Entry(self.root)
-        sid_entry.pack()
-        tk.Label(self.root, text="New Product ID:").pack()
-        pid_entry = tk.Entry(self.root)
-        pid_entry.pack()
-        tk.Label(self.root, text="New Supplier Name:").pack()
-        name_entry = tk.Entry(self.root)
-        name_entry.pack()
-        tk.Button(self.root, text="Update", command=lambda: self.handle_edit_supplier(sid_entry.get(), pid_entry.get(), name_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.supplier_management).pack(pady=5)
-
-    def handle_edit_supplier(self, sid, pid, name):
-        try:
-            sid = int(sid)
-            pid = int(pid)
-            success, message = self.supplier_manager.edit_supplier(sid, pid, name)
-            messagebox.showinfo("Edit Supplier", message)
-            if success:
-                self.supplier_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid input")
-
-    def delete_supplier_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Delete Supplier", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Supplier ID:").pack()
-        sid_entry = tk.Entry(self.root)
-        sid_entry.pack()
-        tk.Button(self.root, text="Delete", command=lambda: self.handle_delete_supplier(sid_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.supplier_management).pack(pady=5)
-
-    def handle_delete_supplier(self, sid):
-        try:
-            sid = int(sid)
-            success, message = self.supplier_manager.delete_supplier(sid)
-            messagebox.showinfo("Delete Supplier", message)
-            if success:
-                self.supplier_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid supplier ID")
-
-    def view_all_suppliers(self):
-        self.clear_window()
-        tk.Label(self.root, text="All Suppliers", font=("Arial", 14)).pack(pady=10)
-        tree = ttk.Treeview(self.root, columns=("Supplier ID", "Product ID", "Product Name", "Supplier Name"), show="headings")
-        tree.heading("Supplier ID", text="Supplier ID")
-        tree.heading("Product ID", text="Product ID")
-        tree.heading("Product Name", text="Product Name")
-        tree.heading("Supplier Name", text="Supplier Name")
-        tree.pack(fill="both", expand=True)
-        for supplier in self.supplier_manager.get_all_suppliers():
-            tree.insert("", "end", values=supplier)
-        tk.Button(self.root, text="Back", command=self.supplier_management).pack(pady=5)
-
-    def sales_management(self):
-        self.clear_window()
-        tk.Label(self.root, text="Sales Management", font=("Arial", 14)).pack(pady=10)
-        tk.Button(self.root, text="Add Sale", command=self.add_sale_ui).pack(pady=5)
-        tk.Button(self.root, text="Edit Sale", command=self.edit_sale_ui).pack(pady=5)
-        tk.Button(self.root, text="Delete Sale", command=self.delete_sale_ui).pack(pady=5)
-        tk.Button(self.root, text="View All Sales", command=self.view_all_sales).pack(pady=5)
-        tk.Button(self.root, text="Back to Main Menu", command=self.create_main_menu).pack(pady=5)
-
-    def add_sale_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Add Sale", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Stock ID:").pack()
-        sid_entry = tk.Entry(self.root)
-        sid_entry.pack()
-        tk.Label(self.root, text="Amount Sold:").pack()
-        amount_entry = tk.Entry(self.root)
-        amount_entry.pack()
-        tk.Button(self.root, text="Add", command=lambda: self.handle_add_sale(sid_entry.get(), amount_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.sales_management).pack(pady=5)
-
-    def handle_add_sale(self, sid, amount):
-        try:
-            sid = int(sid)
-            success, message = self.sale_manager.add_sale(sid, amount)
-            messagebox.showinfo("Add Sale", message)
-            if success:
-                self.sales_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid input")
-
-    def edit_sale_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Edit Sale", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Sale ID:").pack()
-        sid_entry = tk.Entry(self.root)
-        sid_entry.pack()
-        tk.Label(self.root, text="New Amount Sold:").pack()
-        amount_entry = tk.Entry(self.root)
-        amount_entry.pack()
-        tk.Button(self.root, text="Update", command=lambda: self.handle_edit_sale(sid_entry.get(), amount_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.sales_management).pack(pady=5)
-
-    def handle_edit_sale(self, sid, amount):
-        try:
-            sid = int(sid)
-            success, message = self.sale_manager.edit_sale(sid, amount)
-            messagebox.showinfo("Edit Sale", message)
-            if success:
-                self.sales_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid input")
-
-    def delete_sale_ui(self):
-        self.clear_window()
-        tk.Label(self.root, text="Delete Sale", font=("Arial", 14)).pack(pady=10)
-        tk.Label(self.root, text="Sale ID:").pack()
-        sid_entry = tk.Entry(self.root)
-        sid_entry.pack()
-        tk.Button(self.root, text="Delete", command=lambda: self.handle_delete_sale(sid_entry.get())).pack(pady=5)
-        tk.Button(self.root, text="Back", command=self.sales_management).pack(pady=5)
-
-    def handle_delete_sale(self, sid):
-        try:
-            sid = int(sid)
-            success, message = self.sale_manager.delete_sale(sid)
-            messagebox.showinfo("Delete Sale", message)
-            if success:
-                self.sales_management()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid sale ID")
-
-    def view_all_sales(self):
-        self.clear_window()
-        tk.Label(self.root, text="All Sales", font=("Arial", 14)).pack(pady=10)
-        tree = ttk.Treeview(self.root, columns=("Sale ID", "Stock ID", "Product Name", "Amount Sold"), show="headings")
-        tree.heading("Sale ID", text="Sale ID")
-        tree.heading("Stock ID", text="Stock ID")
-        tree.heading("Product Name", text="Product Name")
-        tree.heading("Amount Sold", text="Amount Sold")
-        tree.pack(fill="both", expand=True)
-        for sale in self.sale_manager.get_all_sales():
-            tree.insert("", "end", values=sale)
-        tk.Button(self.root, text="Back", command=self.sales_management).pack(pady=5)
-
-    def generate_reports(self):
-        self.clear_window()
-        tk.Label(self.root, text="Reports", font=("Arial", 14)).pack(pady=10)
-        cursor = self.pm.conn.cursor()
-
-        # Products Report
-        cursor.execute("SELECT * FROM products")
-        products = cursor.fetchall()
-        products_df = pd.DataFrame(products, columns=["Product ID", "Product Name", "Price"])
-        tk.Label(self.root, text="Products Report", font=("Arial", 12)).pack()
-        tree = ttk.Treeview(self.root, columns=("Product ID", "Product Name", "Price"), show="headings")
-        tree.heading("Product ID", text="Product ID")
-        tree.heading("Product Name", text="Product Name")
-        tree.heading("Price", text="Price")
-        tree.pack(fill="both", expand=True)
-        for product in products:
-            tree.insert("", "end", values=product)
-
-        # Stock Report
-        cursor.execute("""
-        SELECT s.stock_id, p.product_name, s.stock_quantity 
-        FROM stocks s 
-        JOIN products p ON s.product_id = p.product_id
-        """)
-        stocks = cursor.fetchall()
-        stocks_df = pd.DataFrame(stocks, columns=["Stock ID", "Product Name", "Quantity"])
-        tk.Label(self.root, text="Stock Report", font=("Arial", 12)).pack()
-        tree = ttk.Treeview(self.root, columns=("Stock ID", "Product Name", "Quantity"), show="headings")
-        tree.heading("Stock ID", text="Stock ID")
-        tree.heading("Product Name", text="Product Name")
-        tree.heading("Quantity", text="Quantity")
-        tree.pack(fill="both", expand=True)
-        for stock in stocks:
-            tree.insert("", "end", values=stock)
-
-        # Supplier Report
-        cursor.execute("""
-        SELECT sup.supplier_id, p.product_name, sup.supplier_name
-        FROM suppliers sup
-        JOIN products p ON sup.product_id = p.product_id
-        """)
-        suppliers = cursor.fetchall()
-        suppliers_df = pd.DataFrame(suppliers, columns=["Supplier ID", "Product Name", "Supplier Name"])
-        tk.Label(self.root, text="Suppliers Report", font=("Arial", 12)).pack()
-        tree = ttk.Treeview(self.root, columns=("Supplier ID", "Product Name", "Supplier Name"), show="headings")
-        tree.heading("Supplier ID", text="Supplier ID")
-        tree.heading("Product Name", text="Product Name")
-        tree.heading("Supplier Name", text="Supplier Name")
-        tree.pack(fill="both", expand=True)
-        for supplier in suppliers:
-            tree.insert("", "end", values=supplier)
-
-        # Sales Report
-        cursor.execute("""
-        SELECT sa.sale_id, p.product_name, sa.amount_sold
-        FROM sales sa
-        JOIN stocks st ON sa.stock_id = st.stock_id
-        JOIN products p ON st.product_id = p.product_id
-        """)
-        sales = cursor.fetchall()
-        sales_df = pd.DataFrame(sales, columns=["Sale ID", "Product Name", "Amount Sold"])
-        tk.Label(self.root, text="Sales Report", font=("Arial", 12)).pack()
-        tree = ttk.Treeview(self.root, columns=("Sale ID", "Product Name", "Amount Sold"), show="headings")
-        tree.heading("Sale ID", text="Sale ID")
-        tree.heading("Product Name", text="Product Name")
-        tree.heading("Amount Sold", text="Amount Sold")
-        tree.pack(fill="both", expand=True)
-        for sale in sales:
-            tree.insert("", "end", values=sale)
-
-        # Visualizations
-        if not stocks_df.empty:
-            fig, ax = plt.subplots(figsize=(8, 5))
-            ax.bar(stocks_df["Product Name"], stocks_df["Quantity"], color='skyblue')
-            ax.set_title("Stock Quantity per Product")
-            ax.set_xlabel("Product")
-            ax.set_ylabel("Quantity")
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            canvas = FigureCanvasTkAgg(fig, master=self.root)
-            canvas.draw()
-            canvas.get_tk_widget().pack()
-
-        if not sales_df.empty:
-            sales_summary = sales_df.groupby("Product Name")["Amount Sold"].sum()
-            fig, ax = plt.subplots(figsize=(8, 5))
-            sales_summary.plot(kind="bar", color='orange', ax=ax)
-            ax.set_title("Total Sales per Product")
-            ax.set_xlabel("Product")
-            ax.set_ylabel("Units Sold")
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            canvas = FigureCanvasTkAgg(fig, master=self.root)
-            canvas.draw()
-            canvas.get_tk_widget().pack()
-
-        if not products_df.empty:
-            fig, ax = plt.subplots(figsize=(6, 6))
-            ax.pie(products_df["Price"], labels=products_df["Product Name"], autopct='%1.1f%%')
-            ax.set_title("Price Distribution")
-            canvas = FigureCanvasTkAgg(fig, master=self.root)
-            canvas.draw()
-            canvas.get_tk_widget().pack()
-
-        tk.Button(self.root, text="Back to Main Menu", command=self.create_main_menu).pack(pady=5)
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    app = MainApp(root)
-    root.mainloop()
\ No newline at end of file
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from collections import deque
+from connection import connect
+from inventory import PAGE_SIZE, Managers
+from db_worker import DatabaseWorker
+from charts import CHARTS, ChartRenderer
+from diagnostics import Tracer
+
+class PagedTreeview:
+    # Keeps at most max_pages pages of rows in the tree and fetches the
+    # neighbouring page by key, on the database worker, as the user scrolls
+    # towards either edge. fetch_page(managers, **kwargs) runs on the worker.
+    # With autoload=False nothing is fetched until the first reload().
+    def __init__(self, master, columns, db, fetch_page, page_size=PAGE_SIZE, max_pages=5, autoload=True):
+        self.columns = columns
+        self.db = db
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.sort_by = None
+        self.descending = False
+        self.generation = 0
+        self.frame = tk.Frame(master)
+        self.tree = ttk.Treeview(self.frame, columns=[key for key, _ in columns], show="headings")
+        for key, heading in columns:
+            self.tree.heading(key, text=heading, command=lambda k=key: self.sort(k))
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.pages = deque()
+        self.loading = False
+        if autoload:
+            self.reload()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def reload(self):
+        self.generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self.pages = deque()
+        self.has_before = False
+        self.has_after = True
+        self._load(True)
+
+    def sort(self, key):
+        if self.sort_by == key:
+            self.descending = not self.descending
+        else:
+            self.sort_by, self.descending = key, False
+        self.reload()
+
+    def _row_key(self, row):
+        keys = [key for key, _ in self.columns]
+        return row[0], row[keys.index(self.sort_by)] if self.sort_by else None
+
+    def _load(self, forward):
+        self.loading = True
+        if forward:
+            key = self.pages[-1][2] if self.pages else None
+        else:
+            key = self.pages[0][1]
+        after_id, after_value = key if key else (None, None)
+        kwargs = dict(
+            after_id=after_id, limit=self.page_size, sort_by=self.sort_by,
+            after_value=after_value, descending=self.descending != (not forward)
+        )
+        fetch_page, generation = self.fetch_page, self.generation
+        self.db.submit(
+            lambda m: fetch_page(m, **kwargs),
+            lambda rows: self._apply(rows, forward, generation)
+        )
+
+    def _apply(self, rows, forward, generation):
+        if generation != self.generation:
+            return
+        # keep the rows on screen in place while pages are added and dropped
+        top = round(float(self.tree.yview()[0]) * len(self.tree.get_children()))
+        shift = self._add_after(rows) if forward else self._add_before(rows[::-1])
+        total = len(self.tree.get_children())
+        if total:
+            self.tree.yview_moveto((top + shift) / total)
+        self.loading = False
+
+    def _add_after(self, rows):
+        self.has_after = len(rows) == self.page_size
+        if not rows:
+            return 0
+        items = [self.tree.insert("", "end", values=row) for row in rows]
+        self.pages.append((items, self._row_key(rows[0]), self._row_key(rows[-1])))
+        if len(self.pages) <= self.max_pages:
+            return 0
+        dropped = self.pages.popleft()[0]
+        self.tree.delete(*dropped)
+        self.has_before = True
+        return -len(dropped)
+
+    def _add_before(self, rows):
+        self.has_before = len(rows) == self.page_size
+        if not rows:
+            return 0
+        items = [self.tree.insert("", index, values=row) for index, row in enumerate(rows)]
+        self.pages.appendleft((items, self._row_key(rows[0]), self._row_key(rows[-1])))
+        if len(self.pages) > self.max_pages:
+            self.tree.delete(*self.pages.pop()[0])
+            self.has_after = True
+        return len(items)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.loading or not self.pages:
+            return
+        if float(last) >= 0.9 and self.has_after:
+            self._load(True)
+        elif float(first) <= 0.1 and self.has_before:
+            self._load(False)
+
+SEARCH_DELAY_MS = 250
+ALERT_REFRESH_MS = 5000
+
+class SearchEntry:
+    # An ID entry that also takes part of a name. Once typing pauses for
+    # delay ms the text is searched on the database worker and the top
+    # matches are listed under the entry; picking one fills in its ID.
+    # search(managers, text) runs on the worker and returns rows whose first
+    # value is the ID, describe(row) gives the text shown for a match.
+    def __init__(self, master, db, search, describe, delay=SEARCH_DELAY_MS):
+        self.db = db
+        self.search = search
+        self.describe = describe
+        self.delay = delay
+        self.rows = []
+        self.pending = None
+        self.generation = 0
+        self.frame = tk.Frame(master)
+        self.entry = tk.Entry(self.frame)
+        self.entry.pack()
+        self.matches = tk.Listbox(self.frame, width=50)
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Down>", lambda event: self._focus_matches())
+        self.matches.bind("<<ListboxSelect>>", self._on_select)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def get(self):
+        return self.entry.get()
+
+    def clear(self):
+        self.generation += 1
+        self.entry.delete(0, "end")
+        self._show([], self.generation)
+
+    def _on_key(self, event):
+        if event.keysym in ("Down", "Up", "Return", "Tab"):
+            return
+        if self.pending:
+            self.frame.after_cancel(self.pending)
+        self.pending = self.frame.after(self.delay, self._search)
+
+    def _search(self):
+        self.pending = None
+        if not self.entry.winfo_exists():
+            return
+        self.generation += 1
+        text = self.entry.get().strip()
+        if not text or text.isdigit():
+            self._show([], self.generation)
+            return
+        search, generation = self.search, self.generation
+        self.db.submit(lambda m: search(m, text), lambda rows: self._show(rows, generation))
+
+    def _show(self, rows, generation):
+        # a newer search or a pick has happened since this one was sent
+        if generation != self.generation:
+            return
+        self.rows = rows
+        self.matches.delete(0, "end")
+        for row in rows:
+            self.matches.insert("end", f"{row[0]}: {self.describe(row)}")
+        if rows:
+            self.matches.config(height=len(rows))
+            self.matches.pack()
+        else:
+            self.matches.pack_forget()
+
+    def _focus_matches(self):
+        if self.rows:
+            self.matches.focus_set()
+            self.matches.selection_set(0)
+
+    def _on_select(self, event):
+        selection = self.matches.curselection()
+        if not selection:
+            return
+        row_id = self.rows[selection[0]][0]
+        self.generation += 1
+        self.entry.delete(0, "end")
+        self.entry.insert(0, str(row_id))
+        self._show([], self.generation)
+        self.entry.focus_set()
+
+# kind -> (search run on the worker, text shown for a match)
+SEARCHES = {
+    "product": (
+        lambda m, text: m.products.search_products(text),
+        lambda row: f"{row[1]} ({row[2]})"),
+    "stock": (
+        lambda m, text: m.stocks.search_stocks(text),
+        lambda row: f"{row[2]}, {row[3]} in stock"),
+    "supplier": (
+        lambda m, text: m.suppliers.search_suppliers(text),
+        lambda row: f"{row[3]} for {row[2]}"),
+}
+
+class Screen:
+    # One page of the UI, built once into its own frame and raised whenever
+    # it is shown again, so what was typed into it survives navigation.
+    # Each binding is [tables, refresh, key]: refresh() reloads part of the
+    # screen and only runs when one of its tables has been written to since
+    # the last time (key holds the versions it last loaded). on_show runs
+    # every time the screen is raised.
+    def __init__(self, frame):
+        self.frame = frame
+        self.fields = []
+        self.bindings = []
+        self.reset = None
+        self.on_show = None
+
+    def bind(self, tables, refresh):
+        self.bindings.append([tables, refresh, None])
+
+class MainApp:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Product Management System")
+        self.busy_workers = set()
+        # only ever used from jobs on self.reader
+        self.charts = ChartRenderer()
+        # shared by both workers' managers while tracing is on
+        self.tracer = Tracer()
+        self.tracing = False
+        schema_ready = threading.Event()
+
+        def open_writer():
+            try:
+                return Managers()
+            finally:
+                schema_ready.set()
+
+        def open_reader():
+            schema_ready.wait()
+            return Managers(connect(readonly=True))
+
+        # writes and logins go to self.db, listings and reports to self.reader
+        # so that with WAL they never wait for each other
+        self.db = DatabaseWorker(
+            root, open_writer,
+            on_busy=lambda busy: self.set_busy("writer", busy), on_error=self.show_db_error
+        )
+        self.reader = DatabaseWorker(
+            root, open_reader,
+            on_busy=lambda busy: self.set_busy("reader", busy), on_error=self.show_db_error
+        )
+        # every screen's frame sits in the same grid cell; showing one raises it
+        self.container = tk.Frame(root)
+        self.container.pack(fill="both", expand=True)
+        self.container.grid_rowconfigure(0, weight=1)
+        self.container.grid_columnconfigure(0, weight=1)
+        self.screens = {}
+        self.current = None
+        self.alert_poll = None
+        if os.environ.get("INVENTORY_TRACE"):
+            self.set_tracing(True)
+        self.show("login")
+
+    def show(self, name):
+        self.leave()
+        screen = self.screens.get(name)
+        if screen is None:
+            frame = tk.Frame(self.container)
+            frame.grid(row=0, column=0, sticky="nsew")
+            screen = self.screens[name] = Screen(frame)
+            getattr(self, f"build_{name}")(screen)
+        self.current = name
+        screen.frame.tkraise()
+        self.refresh(screen)
+        if screen.on_show:
+            screen.on_show()
+
+    def go(self, name):
+        return lambda: self.show(name)
+
+    def leave(self):
+        # results for the screen being left are no longer wanted; whatever of
+        # it was still loading is reloaded on the next visit
+        screen = self.screens.get(self.current)
+        if screen and self.reader.pending:
+            for binding in screen.bindings:
+                binding[2] = None
+        self.db.cancel_pending()
+        self.reader.cancel_pending()
+
+    def refresh(self, screen):
+        if not screen.bindings:
+            return
+
+        def check(versions):
+            for binding in screen.bindings:
+                tables, refresh, key = binding
+                current = tuple(versions.get(table) for table in tables)
+                if current != key:
+                    binding[2] = current
+                    refresh()
+
+        self.reader.submit(lambda m: m.reports.table_versions(), check)
+
+    def saved(self, back):
+        # a form that was saved starts empty next time
+        screen = self.screens[self.current]
+
+        def done():
+            self.reset_form(screen)
+            self.show(back)
+        return done
+
+    def reset_form(self, screen):
+        for field in screen.fields:
+            if isinstance(field, SearchEntry):
+                field.clear()
+            else:
+                field.delete(0, "end")
+        if screen.reset:
+            screen.reset()
+
+    def title(self, screen, text, size=14):
+        tk.Label(screen.frame, text=text, font=("Arial", size)).pack(pady=10)
+
+    def button(self, screen, text, command, pady=5):
+        tk.Button(screen.frame, text=text, command=command).pack(pady=pady)
+
+    def field(self, screen, label, kind=None, **options):
+        # kind makes it an ID entry that also searches by name
+        tk.Label(screen.frame, text=label).pack()
+        if kind:
+            search, describe = SEARCHES[kind]
+            entry = SearchEntry(screen.frame, self.reader, search, describe)
+        else:
+            entry = tk.Entry(screen.frame, **options)
+        entry.pack()
+        screen.fields.append(entry)
+        return entry
+
+    def table(self, screen, tables, columns, fetch_page):
+        tree = PagedTreeview(screen.frame, columns, self.reader, fetch_page, autoload=False)
+        tree.pack(fill="both", expand=True)
+        screen.bind(tables, tree.reload)
+        return tree
+
+    def set_busy(self, worker, busy):
+        if busy:
+            self.busy_workers.add(worker)
+        else:
+            self.busy_workers.discard(worker)
+        self.root.config(cursor="watch" if self.busy_workers else "")
+
+    def show_db_error(self, error):
+        messagebox.showerror("Error", f"Database error: {error}")
+
+    def run_write(self, title, job, on_success=None):
+        def done(result):
+            success, message = result
+            messagebox.showinfo(title, message)
+            if success and on_success:
+                on_success()
+        self.db.submit(job, done, cancellable=False)
+
+    def build_login(self, screen):
+        self.title(screen, "Product Management System", 16)
+        self.username_entry = self.field(screen, "Username:")
+        self.password_entry = self.field(screen, "Password:", show="*")
+        self.button(screen, "Login", self.handle_login, 10)
+        self.button(screen, "Create Admin", self.handle_create_admin, 0)
+
+    def handle_login(self):
+        username = self.username_entry.get()
+        password = self.password_entry.get()
+        self.db.submit(lambda m: m.auth.login(username, password), self.login_done, cancellable=False)
+
+    def login_done(self, result):
+        success, message = result
+        messagebox.showinfo("Login", message)
+        self.password_entry.delete(0, "end")
+        if success:
+            self.show_main_menu()
+        else:
+            self.show("login")
+
+    def handle_create_admin(self):
+        username = self.username_entry.get()
+        password = self.password_entry.get()
+        self.run_write("Create Admin", lambda m: m.auth.add_admin(username, password))
+
+    def build_main_menu(self, screen):
+        self.title(screen, "Product Management System", 16)
+        self.button(screen, "Product Management", self.go("product_management"))
+        self.button(screen, "Stock Management", self.go("stock_management"))
+        self.button(screen, "Supplier Management", self.go("supplier_management"))
+        self.button(screen, "Sales Management", self.go("sales_management"))
+        self.button(screen, "Generate Reports", self.go("reports"))
+        alerts_button = tk.Button(screen.frame, text="Low Stock Alerts", command=self.go("alerts"))
+        alerts_button.pack(pady=5)
+        self.button(screen, "Diagnostics", self.go("diagnostics"))
+        self.button(screen, "Exit", self.root.quit)
+        screen.bind(("stock_alerts",), lambda: self.reader.submit(
+            lambda m: m.stocks.count_alerts(), lambda count: self.show_alert_count(alerts_button, count)))
+
+    def show_main_menu(self):
+        self.show("main_menu")
+        if self.alert_poll:
+            self.root.after_cancel(self.alert_poll)
+        self.alert_poll = self.root.after(ALERT_REFRESH_MS, self.poll_alerts)
+
+    def poll_alerts(self):
+        # keeps the badge current while the menu is up; the count itself is
+        # only fetched again once the alerts have changed
+        self.alert_poll = None
+        if self.current == "main_menu":
+            self.refresh(self.screens["main_menu"])
+            self.alert_poll = self.root.after(ALERT_REFRESH_MS, self.poll_alerts)
+
+    def show_alert_count(self, button, count):
+        button.config(text=f"Low Stock Alerts ({count})", fg="red" if count else "black")
+
+    def build_alerts(self, screen):
+        self.title(screen, "Low Stock Alerts")
+        self.table(screen, ("stock_alerts", "products"), [
+            ("product_id", "Product ID"),
+            ("product_name", "Product Name"),
+            ("on_hand", "On Hand"),
+            ("reorder_point", "Reorder Point"),
+            ("raised_at", "Since"),
+        ], lambda m, **kw: m.stocks.get_alerts_page(**kw))
+        self.button(screen, "Back to Main Menu", self.show_main_menu)
+
+    def build_product_management(self, screen):
+        self.title(screen, "Product Management")
+        self.button(screen, "Add Product", self.go("add_product"))
+        self.button(screen, "Edit Product", self.go("edit_product"))
+        self.button(screen, "Delete Product", self.go("delete_product"))
+        self.button(screen, "View All Products", self.go("products"))
+        self.button(screen, "Back to Main Menu", self.show_main_menu)
+
+    def build_add_product(self, screen):
+        self.title(screen, "Add Product")
+        name_entry = self.field(screen, "Product Name:")
+        price_entry = self.field(screen, "Product Price:")
+        self.button(screen, "Add", lambda: self.handle_add_product(name_entry.get(), price_entry.get()))
+        self.button(screen, "Back", self.go("product_management"))
+
+    def handle_add_product(self, name, price):
+        self.run_write("Add Product", lambda m: m.products.add_product(name, price), self.saved("product_management"))
+
+    def build_edit_product(self, screen):
+        self.title(screen, "Edit Product")
+        pid_entry = self.field(screen, "Product ID:", "product")
+        name_entry = self.field(screen, "New Product Name:")
+        price_entry = self.field(screen, "New Product Price:")
+        self.button(screen, "Update", lambda: self.handle_edit_product(pid_entry.get(), name_entry.get(), price_entry.get()))
+        self.button(screen, "Back", self.go("product_management"))
+
+    def handle_edit_product(self, pid, name, price):
+        try:
+            pid = int(pid)
+            self.run_write("Edit Product", lambda m: m.products.edit_product(pid, name, price), self.saved("product_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid product ID")
+
+    def build_delete_product(self, screen):
+        self.title(screen, "Delete Product")
+        pid_entry = self.field(screen, "Product ID:", "product")
+        self.button(screen, "Delete", lambda: self.handle_delete_product(pid_entry.get()))
+        self.button(screen, "Back", self.go("product_management"))
+
+    def handle_delete_product(self, pid):
+        try:
+            pid = int(pid)
+            self.run_write("Delete Product", lambda m: m.products.delete_product(pid), self.saved("product_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid product ID")
+
+    def build_products(self, screen):
+        self.title(screen, "All Products")
+        self.table(screen, ("products",), [
+            ("product_id", "Product ID"),
+            ("product_name", "Product Name"),
+            ("product_price", "Price"),
+        ], lambda m, **kw: m.products.get_products_page(**kw))
+        self.button(screen, "Back", self.go("product_management"))
+
+    def build_stock_management(self, screen):
+        self.title(screen, "Stock Management")
+        self.button(screen, "Add Stock", self.go("add_stock"))
+        self.button(screen, "Edit Stock", self.go("edit_stock"))
+        self.button(screen, "Delete Stock", self.go("delete_stock"))
+        self.button(screen, "View All Stocks", self.go("stocks"))
+        self.button(screen, "Set Reorder Point", self.go("reorder_point"))
+        self.button(screen, "Back to Main Menu", self.show_main_menu)
+
+    def build_add_stock(self, screen):
+        self.title(screen, "Add Stock")
+        pid_entry = self.field(screen, "Product ID:", "product")
+        quantity_entry = self.field(screen, "Quantity:")
+        self.button(screen, "Add", lambda: self.handle_add_stock(pid_entry.get(), quantity_entry.get()))
+        self.button(screen, "Back", self.go("stock_management"))
+
+    def handle_add_stock(self, pid, quantity):
+        try:
+            pid = int(pid)
+            self.run_write("Add Stock", lambda m: m.stocks.add_stock(pid, quantity), self.saved("stock_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid input")
+
+    def build_edit_stock(self, screen):
+        self.title(screen, "Edit Stock")
+        sid_entry = self.field(screen, "Stock ID:", "stock")
+        quantity_entry = self.field(screen, "New Quantity:")
+        self.button(screen, "Update", lambda: self.handle_edit_stock(sid_entry.get(), quantity_entry.get()))
+        self.button(screen, "Back", self.go("stock_management"))
+
+    def handle_edit_stock(self, sid, quantity):
+        try:
+            sid = int(sid)
+            self.run_write("Edit Stock", lambda m: m.stocks.edit_stock(sid, quantity), self.saved("stock_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid input")
+
+    def build_delete_stock(self, screen):
+        self.title(screen, "Delete Stock")
+        sid_entry = self.field(screen, "Stock ID:", "stock")
+        self.button(screen, "Delete", lambda: self.handle_delete_stock(sid_entry.get()))
+        self.button(screen, "Back", self.go("stock_management"))
+
+    def handle_delete_stock(self, sid):
+        try:
+            sid = int(sid)
+            self.run_write("Delete Stock", lambda m: m.stocks.delete_stock(sid), self.saved("stock_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid stock ID")
+
+    def build_reorder_point(self, screen):
+        self.title(screen, "Set Reorder Point")
+        pid_entry = self.field(screen, "Product ID:", "product")
+        point_entry = self.field(screen, "Reorder Point (empty to clear):")
+        self.button(screen, "Save", lambda: self.handle_reorder_point(pid_entry.get(), point_entry.get()))
+        self.button(screen, "Back", self.go("stock_management"))
+
+    def handle_reorder_point(self, pid, point):
+        try:
+            pid = int(pid)
+        except ValueError:
+            messagebox.showerror("Error", "Invalid product ID")
+            return
+        if point.strip():
+            self.run_write("Set Reorder Point", lambda m: m.stocks.set_reorder_point(pid, point), self.saved("stock_management"))
+        else:
+            self.run_write("Clear Reorder Point", lambda m: m.stocks.clear_reorder_point(pid), self.saved("stock_management"))
+
+    def build_stocks(self, screen):
+        self.title(screen, "All Stocks")
+        self.table(screen, ("stocks", "products"), [
+            ("stock_id", "Stock ID"),
+            ("product_id", "Product ID"),
+            ("product_name", "Product Name"),
+            ("stock_quantity", "Quantity"),
+        ], lambda m, **kw: m.stocks.get_stocks_page(**kw))
+        self.button(screen, "Back", self.go("stock_management"))
+
+    def build_supplier_management(self, screen):
+        self.title(screen, "Supplier Management")
+        self.button(screen, "Add Supplier", self.go("add_supplier"))
+        self.button(screen, "Edit Supplier", self.go("edit_supplier"))
+        self.button(screen, "Delete Supplier", self.go("delete_supplier"))
+        self.button(screen, "View All Suppliers", self.go("suppliers"))
+        self.button(screen, "Back to Main Menu", self.show_main_menu)
+
+    def build_add_supplier(self, screen):
+        self.title(screen, "Add Supplier")
+        pid_entry = self.field(screen, "Product ID:", "product")
+        name_entry = self.field(screen, "Supplier Name:")
+        self.button(screen, "Add", lambda: self.handle_add_supplier(pid_entry.get(), name_entry.get()))
+        self.button(screen, "Back", self.go("supplier_management"))
+
+    def handle_add_supplier(self, pid, name):
+        try:
+            pid = int(pid)
+            self.run_write("Add Supplier", lambda m: m.suppliers.add_supplier(pid, name), self.saved("supplier_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid product ID")
+
+    def build_edit_supplier(self, screen):
+        self.title(screen, "Edit Supplier")
+        sid_entry = self.field(screen, "Supplier ID:", "supplier")
+        pid_entry = self.field(screen, "New Product ID:", "product")
+        name_entry = self.field(screen, "New Supplier Name:")
+        self.button(screen, "Update", lambda: self.handle_edit_supplier(sid_entry.get(), pid_entry.get(), name_entry.get()))
+        self.button(screen, "Back", self.go("supplier_management"))
+
+    def handle_edit_supplier(self, sid, pid, name):
+        try:
+            sid = int(sid)
+            pid = int(pid)
+            self.run_write("Edit Supplier", lambda m: m.suppliers.edit_supplier(sid, pid, name), self.saved("supplier_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid input")
+
+    def build_delete_supplier(self, screen):
+        self.title(screen, "Delete Supplier")
+        sid_entry = self.field(screen, "Supplier ID:", "supplier")
+        self.button(screen, "Delete", lambda: self.handle_delete_supplier(sid_entry.get()))
+        self.button(screen, "Back", self.go("supplier_management"))
+
+    def handle_delete_supplier(self, sid):
+        try:
+            sid = int(sid)
+            self.run_write("Delete Supplier", lambda m: m.suppliers.delete_supplier(sid), self.saved("supplier_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid supplier ID")
+
+    def build_suppliers(self, screen):
+        self.title(screen, "All Suppliers")
+        self.table(screen, ("suppliers", "products"), [
+            ("supplier_id", "Supplier ID"),
+            ("product_id", "Product ID"),
+            ("product_name", "Product Name"),
+            ("supplier_name", "Supplier Name"),
+        ], lambda m, **kw: m.suppliers.get_suppliers_page(**kw))
+        self.button(screen, "Back", self.go("supplier_management"))
+
+    def build_sales_management(self, screen):
+        self.title(screen, "Sales Management")
+        self.button(screen, "Add Sale", self.go("add_sale"))
+        self.button(screen, "Checkout Basket", self.go("basket"))
+        self.button(screen, "Edit Sale", self.go("edit_sale"))
+        self.button(screen, "Delete Sale", self.go("delete_sale"))
+        self.button(screen, "View All Sales", self.go("sales"))
+        self.button(screen, "Back to Main Menu", self.show_main_menu)
+
+    def build_add_sale(self, screen):
+        self.title(screen, "Add Sale")
+        sid_entry = self.field(screen, "Stock ID:", "stock")
+        amount_entry = self.field(screen, "Amount Sold:")
+        self.button(screen, "Add", lambda: self.handle_add_sale(sid_entry.get(), amount_entry.get()))
+        self.button(screen, "Back", self.go("sales_management"))
+
+    def handle_add_sale(self, sid, amount):
+        try:
+            sid = int(sid)
+            self.run_write("Add Sale", lambda m: m.sales.post_sale(sid, amount), self.saved("sales_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid input")
+
+    def build_basket(self, screen):
+        self.title(screen, "Checkout Basket")
+        sid_entry = self.field(screen, "Stock ID:", "stock")
+        amount_entry = self.field(screen, "Amount Sold:")
+        lines = []
+        basket = tk.Listbox(screen.frame, width=50, height=8)
+        self.button(screen, "Add to Basket", lambda: self.handle_basket_line(
+            lines, basket, sid_entry.get(), amount_entry.get()))
+        basket.pack(pady=5)
+        self.button(screen, "Post Basket", lambda: self.handle_post_basket(lines))
+        self.button(screen, "Back", self.go("sales_management"))
+
+        def reset():
+            lines.clear()
+            basket.delete(0, "end")
+        screen.reset = reset
+
+    def handle_basket_line(self, lines, basket, sid, amount):
+        try:
+            sid, amount = int(sid), int(amount)
+        except ValueError:
+            messagebox.showerror("Error", "Invalid input")
+            return
+        if amount <= 0:
+            messagebox.showerror("Error", "Amount must be positive")
+            return
+        lines.append((sid, amount))
+        basket.insert(tk.END, f"Stock {sid} x {amount}")
+
+    def handle_post_basket(self, lines):
+        if not lines:
+            messagebox.showerror("Error", "Basket is empty")
+            return
+        lines = list(lines)
+        self.run_write("Checkout Basket", lambda m: m.sales.post_basket(lines), self.saved("sales_management"))
+
+    def build_edit_sale(self, screen):
+        self.title(screen, "Edit Sale")
+        sid_entry = self.field(screen, "Sale ID:")
+        amount_entry = self.field(screen, "New Amount Sold:")
+        self.button(screen, "Update", lambda: self.handle_edit_sale(sid_entry.get(), amount_entry.get()))
+        self.button(screen, "Back", self.go("sales_management"))
+
+    def handle_edit_sale(self, sid, amount):
+        try:
+            sid = int(sid)
+            self.run_write("Edit Sale", lambda m: m.sales.edit_sale(sid, amount), self.saved("sales_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid input")
+
+    def build_delete_sale(self, screen):
+        self.title(screen, "Delete Sale")
+        sid_entry = self.field(screen, "Sale ID:")
+        self.button(screen, "Delete", lambda: self.handle_delete_sale(sid_entry.get()))
+        self.button(screen, "Back", self.go("sales_management"))
+
+    def handle_delete_sale(self, sid):
+        try:
+            sid = int(sid)
+            self.run_write("Delete Sale", lambda m: m.sales.delete_sale(sid), self.saved("sales_management"))
+        except ValueError:
+            messagebox.showerror("Error", "Invalid sale ID")
+
+    def build_sales(self, screen):
+        self.title(screen, "All Sales")
+        self.table(screen, ("sales", "stocks", "products"), [
+            ("sale_id", "Sale ID"),
+            ("stock_id", "Stock ID"),
+            ("product_name", "Product Name"),
+            ("amount_sold", "Amount Sold"),
+            ("sold_at", "Sold At"),
+        ], lambda m, **kw: m.sales.get_sales_page(**kw))
+        self.button(screen, "Back", self.go("sales_management"))
+
+    def build_reports(self, screen):
+        self.title(screen, "Reports")
+        for title, tables, columns, fetch_page in (
+            ("Products Report", ("products",), [
+                ("product_id", "Product ID"),
+                ("product_name", "Product Name"),
+                ("product_price", "Price"),
+            ], lambda m, **kw: m.products.get_products_page(**kw)),
+            ("Stock Report", ("stocks", "products"), [
+                ("stock_id", "Stock ID"),
+                ("product_id", "Product ID"),
+                ("product_name", "Product Name"),
+                ("stock_quantity", "Quantity"),
+            ], lambda m, **kw: m.stocks.get_stocks_page(**kw)),
+            ("Suppliers Report", ("suppliers", "products"), [
+                ("supplier_id", "Supplier ID"),
+                ("product_id", "Product ID"),
+                ("product_name", "Product Name"),
+                ("supplier_name", "Supplier Name"),
+            ], lambda m, **kw: m.suppliers.get_suppliers_page(**kw)),
+            ("Sales Report", ("sales", "stocks", "products"), [
+                ("sale_id", "Sale ID"),
+                ("stock_id", "Stock ID"),
+                ("product_name", "Product Name"),
+                ("amount_sold", "Amount Sold"),
+                ("sold_at", "Sold At"),
+            ], lambda m, **kw: m.sales.get_sales_page(**kw)),
+        ):
+            tk.Label(screen.frame, text=title, font=("Arial", 12)).pack()
+            self.table(screen, tables, columns, fetch_page)
+
+        totals = tk.Label(screen.frame)
+        totals.pack(pady=5)
+        images = [tk.Label(screen.frame) for _ in CHARTS]
+        for label in images:
+            label.pack()
+        self.button(screen, "Back to Main Menu", self.show_main_menu)
+        screen.bind(("products", "stocks", "suppliers", "sales"), lambda: self.generate_reports(totals, images))
+
+    def generate_reports(self, totals, labels):
+        charts = self.charts
+
+        def build(m):
+            # charts are drawn here on the reader, the UI thread only shows them
+            versions = m.reports.table_versions()
+            report = m.reports.report(versions=versions)
+            images = [
+                charts.render(name, report[section], m.reports.key(section, versions))
+                for name, (section, *_) in CHARTS.items()
+            ]
+            return report, images
+
+        self.reader.submit(build, lambda result: self.show_reports(totals, labels, *result))
+
+    def show_reports(self, totals, labels, report, images):
+        products, stocks, suppliers, sales, units_sold = report["totals"][0]
+        totals.config(
+            text=f"{products} products, {stocks} stock entries, {suppliers} suppliers, "
+                 f"{sales} sales ({units_sold} units sold)"
+        )
+        for label, image in zip(labels, images):
+            photo = tk.PhotoImage(data=image) if image is not None else ""
+            label.config(image=photo)
+            label.image = photo
+
+    def build_diagnostics(self, screen):
+        self.title(screen, "Diagnostics")
+        status = tk.Label(screen.frame)
+        status.pack()
+        buttons = tk.Frame(screen.frame)
+        buttons.pack(pady=5)
+        toggle = tk.Button(buttons, command=lambda: toggle_tracing())
+        toggle.pack(side="left", padx=2)
+        for text, command in (
+            ("Reset", lambda: reset()),
+            ("Refresh", lambda: render()),
+            ("Save JSON", self.save_diagnostics),
+        ):
+            tk.Button(buttons, text=text, command=command).pack(side="left", padx=2)
+
+        tables = {}
+        for section, columns in (
+            ("methods", [("name", "Manager Method", 220)]),
+            ("statements", [("name", "Statement", 420)]),
+        ):
+            tk.Label(screen.frame, text=section.capitalize(), font=("Arial", 12)).pack()
+            columns = columns + [(key, heading, 70) for key, heading in (
+                ("calls", "Calls"), ("mean_ms", "Mean ms"), ("p95_ms", "p95 ms"),
+                ("max_ms", "Max ms"), ("rows", "Rows"), ("errors", "Errors"),
+            )]
+            tree = ttk.Treeview(screen.frame, columns=[key for key, _, _ in columns], show="headings", height=8)
+            for key, heading, width in columns:
+                tree.heading(key, text=heading)
+                tree.column(key, width=width, stretch=key == "name")
+            tree.pack(fill="both", expand=True)
+            tables[section] = (tree, columns)
+        tk.Label(screen.frame, text="Slow Statements", font=("Arial", 12)).pack()
+        slow = tk.Text(screen.frame, height=10, wrap="word")
+        slow.pack(fill="both", expand=True)
+        self.button(screen, "Back to Main Menu", self.show_main_menu)
+
+        def render():
+            toggle.config(text="Stop Tracing" if self.tracing else "Start Tracing")
+            self.show_diagnostics(self.tracer.snapshot(), status, tables, slow)
+
+        def toggle_tracing():
+            self.set_tracing(not self.tracing)
+            render()
+
+        def reset():
+            self.tracer.reset()
+            render()
+        screen.on_show = render
+
+    def set_tracing(self, enabled):
+        # the managers belong to the workers' threads, so they are wrapped
+        # and unwrapped there
+        self.tracing = enabled
+        change = self.tracer.instrument if enabled else self.tracer.uninstrument
+        for worker in (self.db, self.reader):
+            worker.submit(change, cancellable=False)
+
+    def show_diagnostics(self, snapshot, status, tables, slow):
+        lock_wait = snapshot["lock_wait"]
+        status.config(text=(
+            f"Tracing {'on' if self.tracing else 'off'}, collected since {snapshot['since']}. "
+            f"Lock wait: {lock_wait['total_ms']:.1f} ms over {lock_wait['calls']} BEGIN IMMEDIATE, "
+            f"p95 {lock_wait['p95_ms']} ms. Plans kept for statements over {snapshot['slow_ms']} ms."
+        ))
+        for section, (tree, columns) in tables.items():
+            tree.delete(*tree.get_children())
+            for name, timings in snapshot[section].items():
+                tree.insert("", "end", values=[name] + [timings[key] for key, _, _ in columns[1:]])
+        slow.delete("1.0", "end")
+        for entry in snapshot["slow"]:
+            slow.insert("end", f"{entry['max_ms']} ms max, {entry['calls']} slow calls\n{entry['statement']}\n")
+            for line in entry["plan"]:
+                slow.insert("end", f"    {line}\n")
+            slow.insert("end", "\n")
+
+    def save_diagnostics(self):
+        path = filedialog.asksaveasfilename(
+            title="Save Diagnostics", defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            self.tracer.dump(path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save diagnostics: {e}")
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = MainApp(root)
+    root.mainloop()
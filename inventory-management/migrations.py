@@ -0,0 +1,743 @@
+import os
+import sqlite3
+import sys
+
+# Stock received minus units sold, computed from scratch for every product;
+# archived=False for databases from before sales could be archived.
+def _on_hand_sql(archived=True):
+    archived_sold = """
+        - COALESCE((SELECT SUM(a.amount_sold) FROM archived_sales a
+                    JOIN stocks st ON a.stock_id = st.stock_id
+                    WHERE st.product_id = p.product_id), 0)""" if archived else ""
+    return f"""
+    SELECT p.product_id,
+        COALESCE((SELECT SUM(st.stock_quantity) FROM stocks st
+                  WHERE st.product_id = p.product_id), 0)
+        - COALESCE((SELECT SUM(sa.amount_sold) FROM sales sa
+                    JOIN stocks st ON sa.stock_id = st.stock_id
+                    WHERE st.product_id = p.product_id), 0){archived_sold} AS on_hand
+    FROM products p
+    """
+
+ON_HAND_SQL = _on_hand_sql()
+
+# Tables whose writes bump a counter in table_versions, so caches can tell
+# which of them changed since they last looked.
+VERSIONED_TABLES = ("products", "stocks", "suppliers", "sales")
+
+# Units sold per product and time bucket, kept by triggers on sales and
+# stocks. unit -> (table, SQL expression turning a sale time into its bucket);
+# weeks start on Monday.
+ROLLUPS = {
+    "hour": ("sales_hourly", "strftime('%Y-%m-%d %H:00', {})"),
+    "day": ("sales_daily", "date({})"),
+    "week": ("sales_weekly", "date({}, 'weekday 0', '-6 days')"),
+}
+
+def _add_sale_timestamp(cursor):
+    # databases created before the column existed; their old sales are
+    # stamped with the time of the migration
+    cursor.execute("PRAGMA table_info(sales)")
+    if "sold_at" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE sales ADD COLUMN sold_at TEXT")
+    cursor.execute("UPDATE sales SET sold_at = CURRENT_TIMESTAMP WHERE sold_at IS NULL")
+
+def _stamp_new_sales(cursor):
+    # ALTER TABLE cannot add a column with a non-constant default, so sales
+    # tables upgraded by _add_sale_timestamp have none; fill it in instead
+    cursor.execute("PRAGMA table_info(sales)")
+    if any(row[1] == "sold_at" and row[4] is None for row in cursor.fetchall()):
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS sales_stamp_insert AFTER INSERT ON sales
+        WHEN NEW.sold_at IS NULL
+        BEGIN
+            UPDATE sales SET sold_at = CURRENT_TIMESTAMP WHERE sale_id = NEW.sale_id;
+        END
+        """)
+
+def _rollup_sale_triggers(table, bucket):
+    # a sale inserted without a time on an upgraded database is stamped
+    # after the fact (see _stamp_new_sales); until then it counts as now
+    new_sold_at = "COALESCE(NEW.sold_at, CURRENT_TIMESTAMP)"
+    old_sold_at = "COALESCE(OLD.sold_at, CURRENT_TIMESTAMP)"
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_sale_insert AFTER INSERT ON sales
+        BEGIN
+            INSERT INTO {table} (product_id, bucket, units_sold)
+            SELECT product_id, {bucket.format(new_sold_at)}, NEW.amount_sold
+            FROM stocks WHERE stock_id = NEW.stock_id
+            ON CONFLICT (product_id, bucket) DO UPDATE SET units_sold = units_sold + excluded.units_sold;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_sale_update AFTER UPDATE OF stock_id, amount_sold, sold_at ON sales
+        BEGIN
+            UPDATE {table} SET units_sold = units_sold - OLD.amount_sold
+            WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = OLD.stock_id)
+                AND bucket = {bucket.format(old_sold_at)};
+            INSERT INTO {table} (product_id, bucket, units_sold)
+            SELECT product_id, {bucket.format(new_sold_at)}, NEW.amount_sold
+            FROM stocks WHERE stock_id = NEW.stock_id
+            ON CONFLICT (product_id, bucket) DO UPDATE SET units_sold = units_sold + excluded.units_sold;
+        END
+        """,
+    ]
+
+def _rollup_statements(table, bucket, foreign_key=True):
+    # foreign_key=False for databases that hold sales but not the products
+    references = ",\n            FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE" if foreign_key else ""
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            product_id INTEGER NOT NULL,
+            bucket TEXT NOT NULL,
+            units_sold INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (product_id, bucket){references}
+        ) WITHOUT ROWID
+        """,
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table}(bucket)",
+    ] + _rollup_sale_triggers(table, bucket) + [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_sale_delete AFTER DELETE ON sales
+        BEGIN
+            UPDATE {table} SET units_sold = units_sold - OLD.amount_sold
+            WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = OLD.stock_id)
+                AND bucket = {bucket.format("OLD.sold_at")};
+        END
+        """,
+        # BEFORE, for the same reason as balance_stock_delete
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_stock_delete BEFORE DELETE ON stocks
+        BEGIN
+            UPDATE {table} SET units_sold = units_sold - COALESCE((
+                SELECT SUM(amount_sold) FROM sales
+                WHERE stock_id = OLD.stock_id AND {bucket.format("sold_at")} = {table}.bucket), 0)
+            WHERE product_id = OLD.product_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_stock_move AFTER UPDATE OF product_id ON stocks
+        WHEN OLD.product_id != NEW.product_id
+        BEGIN
+            UPDATE {table} SET units_sold = units_sold - COALESCE((
+                SELECT SUM(amount_sold) FROM sales
+                WHERE stock_id = OLD.stock_id AND {bucket.format("sold_at")} = {table}.bucket), 0)
+            WHERE product_id = OLD.product_id;
+            INSERT INTO {table} (product_id, bucket, units_sold)
+            SELECT NEW.product_id, {bucket.format("sold_at")}, SUM(amount_sold)
+            FROM sales WHERE stock_id = NEW.stock_id
+            GROUP BY 2
+            ON CONFLICT (product_id, bucket) DO UPDATE SET units_sold = units_sold + excluded.units_sold;
+        END
+        """,
+        f"DELETE FROM {table}",
+        f"""
+        INSERT INTO {table} (product_id, bucket, units_sold)
+        SELECT st.product_id, {bucket.format("sa.sold_at")}, SUM(sa.amount_sold)
+        FROM sales sa
+        JOIN stocks st ON sa.stock_id = st.stock_id
+        GROUP BY 1, 2
+        """,
+    ]
+
+# Full-text indexes over names: table -> (id column, name column). The FTS
+# tables hold only the index and read the text back from the table itself.
+SEARCHABLE = {
+    "products": ("product_id", "product_name"),
+    "suppliers": ("supplier_id", "supplier_name"),
+}
+
+def _search_statements(table, id_column, name_column):
+    fts = f"{table}_fts"
+    return [
+        # prefix indexes make the short prefixes typed into autocomplete cheap
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {name_column}, content='{table}', content_rowid='{id_column}', prefix='1 2 3'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts} (rowid, {name_column}) VALUES (NEW.{id_column}, NEW.{name_column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {name_column} ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {name_column}) VALUES ('delete', OLD.{id_column}, OLD.{name_column});
+            INSERT INTO {fts} (rowid, {name_column}) VALUES (NEW.{id_column}, NEW.{name_column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {name_column}) VALUES ('delete', OLD.{id_column}, OLD.{name_column});
+        END
+        """,
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+    ]
+
+# Products at or below their reorder point. stock_alerts holds exactly these
+# rows; triggers on inventory_balance and reorder_points re-check only the
+# product that changed, these statements re-check all of them.
+LOW_STOCK_SQL = """
+    SELECT b.product_id, b.on_hand, r.reorder_point
+    FROM inventory_balance b
+    JOIN reorder_points r ON r.product_id = b.product_id
+    WHERE b.on_hand <= r.reorder_point
+    """
+
+REFRESH_ALERTS = [
+    f"DELETE FROM stock_alerts WHERE product_id NOT IN (SELECT product_id FROM ({LOW_STOCK_SQL}))",
+    f"""
+    INSERT INTO stock_alerts (product_id, on_hand, reorder_point) {LOW_STOCK_SQL}
+    ON CONFLICT (product_id) DO UPDATE
+    SET on_hand = excluded.on_hand, reorder_point = excluded.reorder_point
+    """,
+]
+
+# Tables whose every write is recorded in change_journal:
+# table -> (id column, other columns)
+JOURNALED = {
+    "products": ("product_id", ("product_name", "product_price")),
+    "stocks": ("stock_id", ("product_id", "stock_quantity")),
+    "suppliers": ("supplier_id", ("product_id", "supplier_name")),
+    "sales": ("sale_id", ("stock_id", "amount_sold", "sold_at")),
+}
+
+def _journal_statements(table, id_column, columns):
+    def row(ref):
+        return "json_object(" + ", ".join(f"'{column}', {ref}.{column}" for column in columns) + ")"
+    # only the columns an update actually changed, with their new values
+    changed = " UNION ALL ".join(
+        f"SELECT '{column}' AS name, NEW.{column} AS value WHERE OLD.{column} IS NOT NEW.{column}"
+        for column in columns
+    )
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS journal_{table}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO change_journal (table_name, op, row_id, changes)
+            VALUES ('{table}', 'insert', NEW.{id_column}, {row("NEW")});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS journal_{table}_update AFTER UPDATE ON {table}
+        WHEN {" OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)}
+        BEGIN
+            INSERT INTO change_journal (table_name, op, row_id, changes)
+            VALUES ('{table}', 'update', NEW.{id_column},
+                (SELECT json_group_object(name, value) FROM ({changed})));
+        END
+        """,
+        # a delete records the row as it was
+        f"""
+        CREATE TRIGGER IF NOT EXISTS journal_{table}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO change_journal (table_name, op, row_id, changes)
+            VALUES ('{table}', 'delete', OLD.{id_column}, {row("OLD")});
+        END
+        """,
+    ]
+
+# Sales moved out to the monthly archive files (archive.py) leave a per
+# stock, per hour summary behind in archived_sales, so balances, rollups and
+# totals keep counting them. The archiver deletes the moved rows with a row
+# in archiving inside its own transaction; the sale delete triggers skip
+# those deletes, since the sales still happened. Deleting or moving a stock
+# takes its archived sales with it like its hot ones.
+NOT_ARCHIVING = "NOT EXISTS (SELECT 1 FROM archiving)"
+
+def _sold(stock_id):
+    return f"""(COALESCE((SELECT SUM(amount_sold) FROM sales WHERE stock_id = {stock_id}), 0)
+                + COALESCE((SELECT SUM(amount_sold) FROM archived_sales WHERE stock_id = {stock_id}), 0))"""
+
+def add_archive_batch_column(conn):
+    # archive files written before migration 10 have no batch_id; their
+    # rows belong to batch 0, which counts as moved
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(sales)")]
+    if "batch_id" not in columns:
+        conn.execute("ALTER TABLE sales ADD COLUMN batch_id INTEGER NOT NULL DEFAULT 0")
+        conn.commit()
+
+def _upgrade_archives(cursor):
+    for (path,) in cursor.execute("SELECT path FROM sales_archives").fetchall():
+        if os.path.exists(path):
+            archive = sqlite3.connect(path)
+            try:
+                add_archive_batch_column(archive)
+            finally:
+                archive.close()
+
+def _archive_statements():
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS archived_sales (
+            stock_id INTEGER NOT NULL,
+            hour TEXT NOT NULL,
+            sales INTEGER NOT NULL,
+            amount_sold INTEGER NOT NULL,
+            PRIMARY KEY (stock_id, hour),
+            FOREIGN KEY (stock_id) REFERENCES stocks(stock_id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """,
+        # one archive file per month of sale times
+        """
+        CREATE TABLE IF NOT EXISTS sales_archives (
+            month TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            sales INTEGER NOT NULL DEFAULT 0,
+            amount_sold INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE TABLE IF NOT EXISTS archiving (active INTEGER NOT NULL)",
+        "DROP TRIGGER IF EXISTS balance_sale_delete",
+        f"""
+        CREATE TRIGGER balance_sale_delete AFTER DELETE ON sales
+        WHEN {NOT_ARCHIVING}
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand + OLD.amount_sold
+            WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = OLD.stock_id);
+        END
+        """,
+        "DROP TRIGGER IF EXISTS balance_stock_move",
+        f"""
+        CREATE TRIGGER balance_stock_move AFTER UPDATE OF product_id ON stocks
+        WHEN OLD.product_id != NEW.product_id
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand - OLD.stock_quantity + {_sold("OLD.stock_id")}
+            WHERE product_id = OLD.product_id;
+            UPDATE inventory_balance SET on_hand = on_hand + NEW.stock_quantity - {_sold("NEW.stock_id")}
+            WHERE product_id = NEW.product_id;
+        END
+        """,
+        "DROP TRIGGER IF EXISTS balance_stock_delete",
+        f"""
+        CREATE TRIGGER balance_stock_delete BEFORE DELETE ON stocks
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand - OLD.stock_quantity + {_sold("OLD.stock_id")}
+            WHERE product_id = OLD.product_id;
+        END
+        """,
+        "DROP TRIGGER IF EXISTS journal_sales_delete",
+        f"""
+        CREATE TRIGGER journal_sales_delete AFTER DELETE ON sales
+        WHEN {NOT_ARCHIVING}
+        BEGIN
+            INSERT INTO change_journal (table_name, op, row_id, changes)
+            VALUES ('sales', 'delete', OLD.sale_id,
+                json_object('stock_id', OLD.stock_id, 'amount_sold', OLD.amount_sold, 'sold_at', OLD.sold_at));
+        END
+        """,
+    ]
+    for table, bucket in ROLLUPS.values():
+        # units of one stock per bucket, hot and archived, taken off the
+        # rollup in one pass rather than one lookup per rollup row
+        take_off = f"""
+                UPDATE {table} SET units_sold = units_sold - sold.units
+                FROM (
+                    SELECT {bucket.format("sold_at")} AS bucket, SUM(amount_sold) AS units FROM (
+                        SELECT sold_at, amount_sold FROM sales WHERE stock_id = OLD.stock_id
+                        UNION ALL
+                        SELECT hour, amount_sold FROM archived_sales WHERE stock_id = OLD.stock_id)
+                    GROUP BY 1) AS sold
+                WHERE {table}.product_id = OLD.product_id AND {table}.bucket = sold.bucket;"""
+        statements += [
+            f"DROP TRIGGER IF EXISTS {table}_sale_delete",
+            f"""
+            CREATE TRIGGER {table}_sale_delete AFTER DELETE ON sales
+            WHEN {NOT_ARCHIVING}
+            BEGIN
+                UPDATE {table} SET units_sold = units_sold - OLD.amount_sold
+                WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = OLD.stock_id)
+                    AND bucket = {bucket.format("OLD.sold_at")};
+            END
+            """,
+            f"DROP TRIGGER IF EXISTS {table}_stock_delete",
+            f"""
+            CREATE TRIGGER {table}_stock_delete BEFORE DELETE ON stocks
+            BEGIN{take_off}
+            END
+            """,
+            f"DROP TRIGGER IF EXISTS {table}_stock_move",
+            f"""
+            CREATE TRIGGER {table}_stock_move AFTER UPDATE OF product_id ON stocks
+            WHEN OLD.product_id != NEW.product_id
+            BEGIN{take_off}
+                INSERT INTO {table} (product_id, bucket, units_sold)
+                SELECT NEW.product_id, {bucket.format("sold_at")}, SUM(amount_sold) FROM (
+                    SELECT sold_at, amount_sold FROM sales WHERE stock_id = NEW.stock_id
+                    UNION ALL
+                    SELECT hour, amount_sold FROM archived_sales WHERE stock_id = NEW.stock_id)
+                GROUP BY 2
+                ON CONFLICT (product_id, bucket) DO UPDATE SET units_sold = units_sold + excluded.units_sold;
+            END
+            """,
+        ]
+    return statements
+
+def _alert_check(product_id):
+    # the body of a trigger that re-checks one product
+    return f"""
+            DELETE FROM stock_alerts WHERE product_id = {product_id} AND NOT EXISTS (
+                SELECT 1 FROM inventory_balance b
+                JOIN reorder_points r ON r.product_id = b.product_id
+                WHERE b.product_id = {product_id} AND b.on_hand <= r.reorder_point);
+            INSERT INTO stock_alerts (product_id, on_hand, reorder_point)
+            SELECT b.product_id, b.on_hand, r.reorder_point
+            FROM inventory_balance b
+            JOIN reorder_points r ON r.product_id = b.product_id
+            WHERE b.product_id = {product_id} AND b.on_hand <= r.reorder_point
+            ON CONFLICT (product_id) DO UPDATE
+            SET on_hand = excluded.on_hand, reorder_point = excluded.reorder_point;
+    """
+
+def _version_statements(tables):
+    return [
+        f"INSERT OR IGNORE INTO table_versions (table_name) VALUES ('{table}')"
+        for table in tables
+    ] + [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS version_{table}_{op.lower()} AFTER {op} ON {table}
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+        END
+        """
+        for table in tables
+        for op in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+# Ordered schema steps on top of the tables the managers create. A step is a
+# list of SQL statements or callables taking a cursor; every step must be safe
+# to re-run, the version row is only written once it has fully applied.
+MIGRATIONS = [
+    (1, "Index foreign key columns", [
+        "CREATE INDEX IF NOT EXISTS idx_stocks_product_id ON stocks(product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_suppliers_product_id ON suppliers(product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_stock_id ON sales(stock_id)",
+    ]),
+    (2, "Maintain per-product on-hand balance", [
+        """
+        CREATE TABLE IF NOT EXISTS inventory_balance (
+            product_id INTEGER PRIMARY KEY,
+            on_hand INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS balance_product_insert AFTER INSERT ON products
+        BEGIN
+            INSERT OR IGNORE INTO inventory_balance (product_id, on_hand) VALUES (NEW.product_id, 0);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS balance_stock_insert AFTER INSERT ON stocks
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand + NEW.stock_quantity
+            WHERE product_id = NEW.product_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS balance_stock_update AFTER UPDATE OF stock_quantity ON stocks
+        WHEN OLD.product_id = NEW.product_id
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand - OLD.stock_quantity + NEW.stock_quantity
+            WHERE product_id = NEW.product_id;
+        END
+        """,
+        # a stock moved to another product takes its sales with it
+        """
+        CREATE TRIGGER IF NOT EXISTS balance_stock_move AFTER UPDATE OF product_id ON stocks
+        WHEN OLD.product_id != NEW.product_id
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand - OLD.stock_quantity
+                + COALESCE((SELECT SUM(amount_sold) FROM sales WHERE stock_id = OLD.stock_id), 0)
+            WHERE product_id = OLD.product_id;
+            UPDATE inventory_balance SET on_hand = on_hand + NEW.stock_quantity
+                - COALESCE((SELECT SUM(amount_sold) FROM sales WHERE stock_id = NEW.stock_id), 0)
+            WHERE product_id = NEW.product_id;
+        END
+        """,
+        # BEFORE, because the cascaded sales are gone by the time AFTER runs
+        # and their own delete trigger can no longer find the stock
+        """
+        CREATE TRIGGER IF NOT EXISTS balance_stock_delete BEFORE DELETE ON stocks
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand - OLD.stock_quantity
+                + COALESCE((SELECT SUM(amount_sold) FROM sales WHERE stock_id = OLD.stock_id), 0)
+            WHERE product_id = OLD.product_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS balance_sale_insert AFTER INSERT ON sales
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand - NEW.amount_sold
+            WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = NEW.stock_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS balance_sale_update AFTER UPDATE OF stock_id, amount_sold ON sales
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand + OLD.amount_sold
+            WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = OLD.stock_id);
+            UPDATE inventory_balance SET on_hand = on_hand - NEW.amount_sold
+            WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = NEW.stock_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS balance_sale_delete AFTER DELETE ON sales
+        BEGIN
+            UPDATE inventory_balance SET on_hand = on_hand + OLD.amount_sold
+            WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = OLD.stock_id);
+        END
+        """,
+        "INSERT OR REPLACE INTO inventory_balance (product_id, on_hand) " + _on_hand_sql(archived=False),
+    ]),
+    (3, "Count writes per table", [
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ] + _version_statements(VERSIONED_TABLES)),
+    (4, "Timestamp sales and roll them up per hour, day and week", [
+        _add_sale_timestamp,
+        "CREATE INDEX IF NOT EXISTS idx_sales_sold_at ON sales(sold_at)",
+    ] + [
+        statement
+        for table, bucket in ROLLUPS.values()
+        for statement in _rollup_statements(table, bucket)
+    ]),
+    (5, "Full-text search over product and supplier names", [
+        statement
+        for table, (id_column, name_column) in SEARCHABLE.items()
+        for statement in _search_statements(table, id_column, name_column)
+    ]),
+    (6, "Reorder points and low-stock alerts", [
+        """
+        CREATE TABLE IF NOT EXISTS reorder_points (
+            product_id INTEGER PRIMARY KEY,
+            reorder_point INTEGER NOT NULL CHECK(reorder_point >= 0),
+            FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS stock_alerts (
+            product_id INTEGER PRIMARY KEY,
+            on_hand INTEGER NOT NULL,
+            reorder_point INTEGER NOT NULL,
+            raised_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_stock_alerts_raised_at ON stock_alerts(raised_at)",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS alert_balance_update AFTER UPDATE OF on_hand ON inventory_balance
+        WHEN OLD.on_hand != NEW.on_hand
+        BEGIN{_alert_check("NEW.product_id")}END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS alert_reorder_insert AFTER INSERT ON reorder_points
+        BEGIN{_alert_check("NEW.product_id")}END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS alert_reorder_update AFTER UPDATE ON reorder_points
+        BEGIN{_alert_check("NEW.product_id")}END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS alert_reorder_delete AFTER DELETE ON reorder_points
+        BEGIN
+            DELETE FROM stock_alerts WHERE product_id = OLD.product_id;
+        END
+        """,
+    ] + REFRESH_ALERTS),
+    # alerts change through triggers on three tables; counting writes to
+    # the alert table itself tells a screen whether its list is stale
+    (7, "Count writes to low-stock alerts", _version_statements(("stock_alerts",))),
+    (8, "Journal every change to the main tables", [
+        """
+        CREATE TABLE IF NOT EXISTS change_journal (
+            change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            changes TEXT,
+            changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS journal_consumers (
+            name TEXT PRIMARY KEY,
+            position INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ] + [
+        statement
+        for table, (id_column, columns) in JOURNALED.items()
+        for statement in _journal_statements(table, id_column, columns)
+    ]),
+    (9, "Archive old sales into monthly files", _archive_statements()),
+    # Every archive run reserves a batch, committed, before it copies any
+    # sales; the copies carry its id and only count once the run has marked
+    # the batch moved, in the same transaction that deletes the hot rows.
+    (10, "Track archive batches", [
+        """
+        CREATE TABLE IF NOT EXISTS archive_batches (
+            batch_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            moved INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "INSERT OR IGNORE INTO archive_batches (batch_id, moved) VALUES (0, 1)",
+        _upgrade_archives,
+    ]),
+    (11, "Timestamp sales inserted without a time on upgraded databases", [
+        _stamp_new_sales,
+    ] + [
+        statement
+        for table, bucket in ROLLUPS.values()
+        for statement in [
+            f"DROP TRIGGER IF EXISTS {table}_sale_insert",
+            f"DROP TRIGGER IF EXISTS {table}_sale_update",
+        ] + _rollup_sale_triggers(table, bucket)
+    ]),
+]
+
+# Queries that must be answered through an index once migrations have run,
+# together with the index expected in their plan.
+HOT_QUERIES = {
+    "stocks of a product": (
+        "SELECT s.stock_id, p.product_id, p.product_name, s.stock_quantity "
+        "FROM products p JOIN stocks s ON s.product_id = p.product_id WHERE p.product_id = ?",
+        "idx_stocks_product_id",
+    ),
+    "suppliers of a product": (
+        "SELECT s.supplier_id, p.product_id, p.product_name, s.supplier_name "
+        "FROM products p JOIN suppliers s ON s.product_id = p.product_id WHERE p.product_id = ?",
+        "idx_suppliers_product_id",
+    ),
+    "sales of a stock": (
+        "SELECT s.sale_id, st.stock_id, s.amount_sold "
+        "FROM stocks st JOIN sales s ON s.stock_id = st.stock_id WHERE st.stock_id = ?",
+        "idx_sales_stock_id",
+    ),
+    "on-hand lookup": (
+        "SELECT on_hand FROM inventory_balance WHERE product_id = ?",
+        "PRIMARY KEY",
+    ),
+    "cascade from products to stocks": (
+        "SELECT 1 FROM stocks WHERE product_id = ?",
+        "idx_stocks_product_id",
+    ),
+    "cascade from products to suppliers": (
+        "SELECT 1 FROM suppliers WHERE product_id = ?",
+        "idx_suppliers_product_id",
+    ),
+    "daily sales of a product": (
+        "SELECT bucket, units_sold FROM sales_daily WHERE product_id = ? ORDER BY bucket",
+        "PRIMARY KEY",
+    ),
+    "daily sales over a period": (
+        "SELECT bucket, SUM(units_sold) FROM sales_daily WHERE bucket >= ? GROUP BY bucket",
+        "idx_sales_daily_bucket",
+    ),
+    "alert for a product": (
+        "SELECT on_hand FROM stock_alerts WHERE product_id = ?",
+        "PRIMARY KEY",
+    ),
+    "journal after a consumer's position": (
+        "SELECT change_id, table_name, op, row_id, changes FROM change_journal "
+        "WHERE change_id > ? ORDER BY change_id LIMIT 1000",
+        "PRIMARY KEY",
+    ),
+    "archived sales of a stock": (
+        "SELECT SUM(amount_sold) FROM archived_sales WHERE stock_id = ?",
+        "PRIMARY KEY",
+    ),
+    "cascade from stocks to sales": (
+        "SELECT 1 FROM sales WHERE stock_id = ?",
+        "idx_sales_stock_id",
+    ),
+}
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+def current_version(conn):
+    cursor = conn.cursor()
+    _ensure_version_table(cursor)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+def migrate(conn):
+    applied = []
+    version = current_version(conn)
+    cursor = conn.cursor()
+    for step_version, description, statements in MIGRATIONS:
+        if step_version <= version:
+            continue
+        try:
+            # take the write lock first so two processes starting together
+            # cannot both apply the same step
+            conn.commit()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT 1 FROM schema_version WHERE version=?", (step_version,))
+            if cursor.fetchone():
+                conn.rollback()
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(cursor)
+                else:
+                    cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (step_version, description)
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        applied.append(step_version)
+    return applied
+
+def explain(conn, sql, params=()):
+    cursor = conn.cursor()
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    return [row[-1] for row in cursor.fetchall()]
+
+def check_query_plans(conn):
+    results = []
+    for name, (sql, index) in HOT_QUERIES.items():
+        plan = explain(conn, sql, (1,) * sql.count("?"))
+        results.append((name, any(index in detail for detail in plan), plan))
+    return results
+
+def main(argv):
+    from inventory import ProductManager, Supplier, Sale, Authentication
+    pm = ProductManager()
+    Supplier(pm.conn)
+    Sale(pm.conn)
+    Authentication(pm.conn)
+    applied = migrate(pm.conn)
+    print(f"Schema version {current_version(pm.conn)}"
+          + (f" (applied {', '.join(map(str, applied))})" if applied else ""))
+    ok = True
+    for name, uses_index, plan in check_query_plans(pm.conn):
+        ok = ok and uses_index
+        print(f"{'OK  ' if uses_index else 'SCAN'} {name}: {'; '.join(plan)}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
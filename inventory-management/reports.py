@@ -0,0 +1,166 @@
+import os
+import sqlite3
+from connection import readonly_uri
+from migrations import ROLLUPS
+
+# Report sections computed in SQL and cached until one of the tables they
+# read is written to. Write counts come from the table_versions table kept
+# by triggers (migration 3), so writes from other connections and processes
+# invalidate the cache as well. Archived sales are counted from their
+# summary in archived_sales; moving sales to the archive bumps the sales
+# version like any other delete.
+SECTIONS = {
+    "stock_per_product": ("""
+        SELECT p.product_name, SUM(s.stock_quantity)
+        FROM stocks s
+        JOIN products p ON s.product_id = p.product_id
+        GROUP BY p.product_id
+        ORDER BY p.product_name
+        """, ("products", "stocks")),
+    "sales_per_product": ("""
+        SELECT p.product_name, SUM(sa.amount_sold)
+        FROM (SELECT stock_id, amount_sold FROM sales
+              UNION ALL
+              SELECT stock_id, amount_sold FROM archived_sales) sa
+        JOIN stocks st ON sa.stock_id = st.stock_id
+        JOIN products p ON st.product_id = p.product_id
+        GROUP BY p.product_name
+        ORDER BY p.product_name
+        """, ("products", "stocks", "sales")),
+    "price_distribution": ("""
+        SELECT product_name, product_price FROM products ORDER BY product_id
+        """, ("products",)),
+    "sales_per_day": ("""
+        SELECT bucket, SUM(units_sold) FROM sales_daily
+        GROUP BY bucket HAVING SUM(units_sold) != 0 ORDER BY bucket
+        """, ("stocks", "sales")),
+    "totals": ("""
+        SELECT
+            (SELECT COUNT(*) FROM products),
+            (SELECT COUNT(*) FROM stocks),
+            (SELECT COUNT(*) FROM suppliers),
+            (SELECT COUNT(*) FROM sales) + (SELECT COALESCE(SUM(sales), 0) FROM archived_sales),
+            (SELECT COALESCE(SUM(amount_sold), 0) FROM sales)
+                + (SELECT COALESCE(SUM(amount_sold), 0) FROM archived_sales)
+        """, ("products", "stocks", "suppliers", "sales")),
+}
+
+# archive rows copied by a run that never finished are not sales
+MOVED_BATCH = "sa.batch_id IN (SELECT batch_id FROM archive_batches WHERE moved)"
+
+def archived_months(conn, start=None, end=None):
+    # (month, path) of the sales archives (archive.py) that can hold sales
+    # between start and end
+    cursor = conn.execute(
+        "SELECT month, path FROM sales_archives "
+        "WHERE (? IS NULL OR month >= substr(?, 1, 7)) AND (? IS NULL OR month <= substr(?, 1, 7)) "
+        "ORDER BY month",
+        (start, start, end, end)
+    )
+    return cursor.fetchall()
+
+def read_archives(conn, select, params, start=None, end=None):
+    # Runs select against each archive the range reaches into, attached as
+    # the schema "archive" one at a time; select sees the hot tables as
+    # usual and should keep only rows whose batch was moved (MOVED_BATCH).
+    rows = []
+    for _, path in archived_months(conn, start, end):
+        if not os.path.exists(path):
+            raise sqlite3.OperationalError(f"Sales archive is missing: {path}")
+        conn.execute("ATTACH DATABASE ? AS archive", (readonly_uri(path),))
+        try:
+            rows += conn.execute(select, params).fetchall()
+        finally:
+            conn.execute("DETACH DATABASE archive")
+    return rows
+
+class ReportEngine:
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def table_versions(self):
+        self.cursor.execute("SELECT table_name, version FROM table_versions")
+        return dict(self.cursor.fetchall())
+
+    def key(self, name, versions):
+        # changes whenever a table the section reads is written to
+        return tuple(versions.get(table) for table in SECTIONS[name][1])
+
+    def section(self, name, versions=None):
+        sql, tables = SECTIONS[name]
+        if versions is None:
+            versions = self.table_versions()
+        key = self.key(name, versions)
+        cached = self.cache.get(name)
+        if cached and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        self.cursor.execute(sql)
+        rows = self.cursor.fetchall()
+        self.cache[name] = (key, rows)
+        return rows
+
+    def report(self, names=None, versions=None):
+        if versions is None:
+            versions = self.table_versions()
+        return {name: self.section(name, versions) for name in names or SECTIONS}
+
+    def trend(self, unit="day", product_id=None, start=None, end=None):
+        # units sold per bucket from the rollup tables, for one product or
+        # all of them; start and end are sale times, both inclusive
+        table, bucket = ROLLUPS[unit]
+        where, params = [], []
+        if product_id is not None:
+            where.append("product_id = ?")
+            params.append(product_id)
+        if start is not None:
+            where.append(f"bucket >= {bucket.format('?')}")
+            params.append(start)
+        if end is not None:
+            where.append(f"bucket <= {bucket.format('?')}")
+            params.append(end)
+        self.cursor.execute(
+            f"SELECT bucket, SUM(units_sold) FROM {table} "
+            + (f"WHERE {' AND '.join(where)} " if where else "")
+            + "GROUP BY bucket HAVING SUM(units_sold) != 0 ORDER BY bucket",
+            params
+        )
+        return self.cursor.fetchall()
+
+    def sales_between(self, start=None, end=None, product_id=None):
+        # Sale rows sold between start and end (inclusive), oldest first,
+        # from the hot table and from every monthly archive the range
+        # reaches into; without a start that is every archive.
+        where, params = [], []
+        if start is not None:
+            where.append("sa.sold_at >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("sa.sold_at <= ?")
+            params.append(end)
+        if product_id is not None:
+            where.append("p.product_id = ?")
+            params.append(product_id)
+        select = """
+            SELECT sa.sale_id, st.stock_id, p.product_name, sa.amount_sold, sa.sold_at
+            FROM {sales} sa
+            JOIN stocks st ON sa.stock_id = st.stock_id
+            JOIN products p ON st.product_id = p.product_id
+            """ + (f"WHERE {' AND '.join(where)}" if where else "")
+        self.cursor.execute(select.format(sales="sales"), params)
+        rows = self.cursor.fetchall()
+        rows += read_archives(
+            self.conn,
+            select.format(sales="archive.sales") + (" AND " if where else " WHERE ") + MOVED_BATCH,
+            params, start, end
+        )
+        rows.sort(key=lambda row: (row[4], row[0]))
+        return rows
+
+    def clear(self):
+        self.cache.clear()
@@ -0,0 +1,412 @@
+import argparse
+import json
+import re
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+from connection import connect, load_config
+from diagnostics import SLOW_STATEMENT_MS, Tracer
+from inventory import Managers, _parse_timestamp
+from writequeue import GROUP_COMMIT_RECORDS, WriteQueue
+
+TOKEN_TTL = 8 * 60 * 60
+MAX_BODY = 64 * 1024 * 1024
+
+# (method, path pattern, handler); the handler gets the thread's Managers,
+# the parsed JSON body (or query string for GET) and the path groups.
+ROUTES = []
+
+def route(method, pattern):
+    def register(handler):
+        ROUTES.append((method, re.compile(f"^{pattern}$"), handler))
+        return handler
+    return register
+
+def _page_args(query):
+    args = {"limit": min(int(query.get("limit", 100)), 1000)}
+    if "after_id" in query:
+        args["after_id"] = int(query["after_id"])
+    if "sort_by" in query:
+        args["sort_by"] = query["sort_by"]
+        args["after_value"] = query.get("after_value")
+    if query.get("descending") in ("1", "true"):
+        args["descending"] = True
+    return args
+
+def _search_limit(query):
+    return min(int(query.get("limit", 10)), 100)
+
+def _result(result):
+    success, message = result
+    return (200 if success else 400), {"success": success, "message": message}
+
+def _batch(result):
+    inserted, errors = result
+    return 200, {
+        "inserted": inserted,
+        "errors": [{"index": index, "message": message} for index, message in errors],
+    }
+
+@route("GET", "/products")
+def list_products(m, query):
+    return 200, m.products.get_products_page(**_page_args(query))
+
+@route("GET", "/products/search")
+def search_products(m, query):
+    return 200, m.products.search_products(query.get("q", ""), _search_limit(query))
+
+@route("POST", "/products")
+def add_product(m, body):
+    return _result(m.products.add_product(body.get("product_name"), body.get("product_price")))
+
+@route("POST", "/products/batch")
+def add_products(m, body):
+    return _batch(m.products.add_products(
+        (row.get("product_name"), row.get("product_price")) for row in body.get("rows", [])
+    ))
+
+@route("GET", r"/products/(\d+)")
+def get_product(m, query, pid):
+    product = m.products.get_product(int(pid))
+    if product is None:
+        return 404, {"success": False, "message": "No such product found"}
+    return 200, {
+        "product_id": product.product_id,
+        "product_name": product.product_name,
+        "product_price": product.product_price,
+    }
+
+@route("PUT", r"/products/(\d+)")
+def edit_product(m, body, pid):
+    return _result(m.products.edit_product(int(pid), body.get("product_name"), body.get("product_price")))
+
+@route("DELETE", r"/products/(\d+)")
+def delete_product(m, body, pid):
+    return _result(m.products.delete_product(int(pid)))
+
+@route("GET", r"/products/(\d+)/on_hand")
+def product_on_hand(m, query, pid):
+    on_hand = m.stocks.get_on_hand(int(pid))
+    if on_hand is None:
+        return 404, {"success": False, "message": "No such product found"}
+    return 200, {"product_id": int(pid), "on_hand": on_hand}
+
+@route("PUT", r"/products/(\d+)/reorder_point")
+def set_reorder_point(m, body, pid):
+    return _result(m.stocks.set_reorder_point(int(pid), body.get("reorder_point")))
+
+@route("DELETE", r"/products/(\d+)/reorder_point")
+def clear_reorder_point(m, body, pid):
+    return _result(m.stocks.clear_reorder_point(int(pid)))
+
+@route("GET", "/alerts")
+def list_alerts(m, query):
+    return 200, m.stocks.get_alerts_page(**_page_args(query))
+
+@route("GET", "/stocks")
+def list_stocks(m, query):
+    return 200, m.stocks.get_stocks_page(**_page_args(query))
+
+@route("GET", "/stocks/search")
+def search_stocks(m, query):
+    return 200, m.stocks.search_stocks(query.get("q", ""), _search_limit(query))
+
+@route("POST", "/stocks")
+def add_stock(m, body):
+    if m.writes:
+        return _result(m.writes.add_stock(body.get("product_id"), body.get("stock_quantity")).result())
+    return _result(m.stocks.add_stock(body.get("product_id"), body.get("stock_quantity")))
+
+@route("POST", "/stocks/batch")
+def add_stocks(m, body):
+    return _batch(m.stocks.add_stocks(
+        (row.get("product_id"), row.get("stock_quantity")) for row in body.get("rows", [])
+    ))
+
+@route("PUT", r"/stocks/(\d+)")
+def edit_stock(m, body, sid):
+    return _result(m.stocks.edit_stock(int(sid), body.get("stock_quantity")))
+
+@route("DELETE", r"/stocks/(\d+)")
+def delete_stock(m, body, sid):
+    return _result(m.stocks.delete_stock(int(sid)))
+
+@route("GET", "/suppliers")
+def list_suppliers(m, query):
+    return 200, m.suppliers.get_suppliers_page(**_page_args(query))
+
+@route("GET", "/suppliers/search")
+def search_suppliers(m, query):
+    return 200, m.suppliers.search_suppliers(query.get("q", ""), _search_limit(query))
+
+@route("POST", "/suppliers")
+def add_supplier(m, body):
+    return _result(m.suppliers.add_supplier(body.get("product_id"), body.get("supplier_name")))
+
+@route("POST", "/suppliers/batch")
+def add_suppliers(m, body):
+    return _batch(m.suppliers.add_suppliers(
+        (row.get("product_id"), row.get("supplier_name")) for row in body.get("rows", [])
+    ))
+
+@route("PUT", r"/suppliers/(\d+)")
+def edit_supplier(m, body, sid):
+    return _result(m.suppliers.edit_supplier(int(sid), body.get("product_id"), body.get("supplier_name")))
+
+@route("DELETE", r"/suppliers/(\d+)")
+def delete_supplier(m, body, sid):
+    return _result(m.suppliers.delete_supplier(int(sid)))
+
+@route("GET", "/sales")
+def list_sales(m, query):
+    return 200, m.sales.get_sales_page(**_page_args(query))
+
+@route("POST", "/sales")
+def add_sale(m, body):
+    if m.writes:
+        return _result(m.writes.post_sale(body.get("stock_id"), body.get("amount_sold")).result())
+    return _result(m.sales.post_sale(body.get("stock_id"), body.get("amount_sold")))
+
+@route("POST", "/sales/basket")
+def post_basket(m, body):
+    return _result(m.sales.post_basket(
+        (row.get("stock_id"), row.get("amount_sold")) for row in body.get("lines", [])
+    ))
+
+@route("POST", "/sales/batch")
+def add_sales(m, body):
+    # checked for overselling row by row, like POST /sales
+    return _batch(m.sales.post_sales(
+        (row.get("stock_id"), row.get("amount_sold")) for row in body.get("rows", [])
+    ))
+
+@route("PUT", r"/sales/(\d+)")
+def edit_sale(m, body, sid):
+    return _result(m.sales.edit_sale(int(sid), body.get("amount_sold")))
+
+@route("DELETE", r"/sales/(\d+)")
+def delete_sale(m, body, sid):
+    return _result(m.sales.delete_sale(int(sid)))
+
+@route("GET", "/metrics/writes")
+def write_metrics(m, query):
+    return 200, m.writes.metrics() if m.writes else {"group_commit": False}
+
+@route("GET", "/diagnostics")
+def diagnostics(m, query):
+    return 200, m.tracer.snapshot() if m.tracer else {"tracing": False}
+
+@route("GET", "/reports")
+def reports(m, query):
+    return 200, m.reports.report()
+
+@route("GET", "/reports/sales")
+def sales_between(m, query):
+    # reads the monthly sales archives when the range reaches back into them
+    product_id = query.get("product_id")
+    return 200, m.reports.sales_between(
+        _parse_timestamp(query.get("start")), _parse_timestamp(query.get("end")),
+        int(product_id) if product_id is not None else None
+    )
+
+@route("GET", "/analytics/products")
+def analytics_products(m, query):
+    with m.analytics() as snapshot:
+        return 200, snapshot.product_totals()
+
+@route("GET", "/analytics/valuation")
+def analytics_valuation(m, query):
+    with m.analytics() as snapshot:
+        return 200, snapshot.valuation_by_supplier()
+
+@route("GET", "/analytics/sell-through")
+def analytics_sell_through(m, query):
+    with m.analytics() as snapshot:
+        return 200, snapshot.sell_through(_parse_timestamp(query.get("start")), _parse_timestamp(query.get("end")))
+
+class InventoryServer(HTTPServer):
+    # Requests are served by a fixed pool of threads, each keeping its own
+    # connection and managers for its whole life. With group_commit_ms set,
+    # single sales and stock receipts go through one shared WriteQueue. With
+    # a tracer, every thread's managers report to it.
+    def __init__(self, address, config=None, threads=8, group_commit_ms=None, group_commit_records=GROUP_COMMIT_RECORDS,
+                 tracer=None):
+        super().__init__(address, RequestHandler)
+        self.config = config or load_config()
+        self.local = threading.local()
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="inventory")
+        self.tokens = {}
+        self.tokens_lock = threading.Lock()
+        # create or migrate the schema once, before any worker connects
+        Managers(connect(self.config)).products.conn.close()
+        self.writes = None
+        if group_commit_ms:
+            self.writes = WriteQueue(self.config, group_commit_ms, group_commit_records)
+        self.tracer = tracer
+        self.snapshot = None
+        self.snapshot_lock = threading.Lock()
+
+    @contextmanager
+    def analytics(self):
+        # One NumPy snapshot (analytics.py) shared by every thread, loaded on
+        # first use and brought up to date from the change journal before
+        # each query. NumPy is only imported then.
+        with self.snapshot_lock:
+            if self.snapshot is None:
+                from analytics import AnalyticsSnapshot
+                self.snapshot = AnalyticsSnapshot(connect(self.config, readonly=True, check_same_thread=False))
+            self.snapshot.refresh()
+            yield self.snapshot
+
+    def managers(self):
+        managers = getattr(self.local, "managers", None)
+        if managers is None:
+            managers = self.local.managers = Managers(connect(self.config))
+            managers.writes = self.writes
+            managers.tracer = self.tracer
+            managers.analytics = self.analytics
+            if self.tracer:
+                self.tracer.instrument(managers)
+        return managers
+
+    def issue_token(self, admin_id):
+        token = secrets.token_urlsafe(32)
+        with self.tokens_lock:
+            self.tokens[token] = (admin_id, time.monotonic() + TOKEN_TTL)
+        return token
+
+    def check_token(self, token):
+        with self.tokens_lock:
+            entry = self.tokens.get(token)
+            if entry and entry[1] < time.monotonic():
+                del self.tokens[token]
+                entry = None
+        return entry[0] if entry else None
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
+        if self.writes:
+            self.writes.close()
+        if self.snapshot:
+            self.snapshot.conn.close()
+
+class RequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        try:
+            body = self._read_body()
+        except ValueError:
+            return self._send(400, {"success": False, "message": "Invalid JSON body"})
+        if method == "POST" and url.path == "/login":
+            return self._login(body)
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not self.server.check_token(token):
+            return self._send(401, {"success": False, "message": "Invalid or expired token"})
+        allowed = False
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            if method == "GET":
+                body = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                status, payload = handler(self.server.managers(), body, *match.groups())
+            except (KeyError, ValueError, TypeError, AttributeError, OverflowError) as e:
+                # OverflowError: an id too big for SQLite's 64-bit integers
+                status, payload = 400, {"success": False, "message": f"Invalid request: {e}"}
+            except sqlite3.Error as e:
+                status, payload = 500, {"success": False, "message": f"Database error: {e}"}
+            return self._send(status, payload)
+        if allowed:
+            return self._send(405, {"success": False, "message": "Method not allowed"})
+        self._send(404, {"success": False, "message": "Not found"})
+
+    def _login(self, body):
+        admin_id = str(body.get("admin_id", ""))
+        success, message = self.server.managers().auth.login(admin_id, str(body.get("password", "")))
+        if not success:
+            return self._send(401, {"success": False, "message": message})
+        self._send(200, {"success": True, "message": message, "token": self.server.issue_token(admin_id)})
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            raise ValueError("body too large")
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length))
+        if not isinstance(body, dict):
+            raise ValueError("body must be an object")
+        return body
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Inventory HTTP/JSON service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--config", help="path to inventory.ini")
+    parser.add_argument("--group-commit-ms", type=float, help="commit single sales and stock receipts in batches every this many ms")
+    parser.add_argument("--group-commit-records", type=int, default=GROUP_COMMIT_RECORDS, help="or as soon as this many are waiting")
+    parser.add_argument("--trace", action="store_true", help="time manager calls and statements, served at /diagnostics")
+    parser.add_argument("--trace-slow-ms", type=float, default=SLOW_STATEMENT_MS, help="capture query plans of statements slower than this")
+    args = parser.parse_args(argv)
+    server = InventoryServer(
+        (args.host, args.port), load_config(args.config), args.threads,
+        args.group_commit_ms, args.group_commit_records,
+        Tracer(args.trace_slow_ms) if args.trace else None
+    )
+    print(f"Serving inventory on http://{args.host}:{args.port} with {args.threads} threads")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,31 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection import connect, load_config
+from inventory import Managers
+
+@pytest.fixture
+def config(tmp_path):
+    config = load_config(path=os.devnull, environ={})
+    config["path"] = str(tmp_path / "inventory.db")
+    config["archive_dir"] = str(tmp_path / "archive")
+    return config
+
+@pytest.fixture
+def managers(config):
+    m = Managers(connect(config))
+    yield m
+    m.products.conn.close()
+
+def add_product(m, name="Widget", price=2.5):
+    success, message = m.products.add_product(name, price)
+    assert success, message
+    return int(message.rsplit(":", 1)[1])
+
+def add_stock(m, pid, quantity):
+    success, message = m.stocks.add_stock(pid, quantity)
+    assert success, message
+    return int(message.rsplit(":", 1)[1])
@@ -0,0 +1,55 @@
+import sqlite3
+import pytest
+import archive
+from archive import archive_sales
+from conftest import add_product, add_stock
+
+def sell(m, sid, times):
+    m.sales.add_sales((sid, 1, f"2024-0{month}-15 10:00:00") for month in times)
+    return [row[0] for row in m.products.conn.execute("SELECT sale_id FROM sales ORDER BY sale_id")]
+
+def sale_ids(m):
+    return [row[0] for row in m.reports.sales_between()]
+
+def test_archived_sales_read_back_once(managers, config):
+    sid = add_stock(managers, add_product(managers), 100)
+    ids = sell(managers, sid, [1, 2, 3, 4])
+    assert archive_sales(managers.products.conn, keep=1, config=config) == 3
+    assert sale_ids(managers) == ids
+    assert managers.stocks.check_balances() == []
+
+def test_interrupted_run_leaves_no_phantom_sales(managers, config, monkeypatch):
+    conn = managers.products.conn
+    sid = add_stock(managers, add_product(managers), 100)
+    ids = sell(managers, sid, [1, 2, 3, 4])
+    # the month files are written, then the hot transaction fails
+    monkeypatch.setattr(archive, "CATALOG_SQL", "INSERT INTO no_such_table VALUES (?, ?, ?, ?)")
+    with pytest.raises(sqlite3.OperationalError):
+        archive_sales(conn, keep=1, config=config)
+    monkeypatch.undo()
+    assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 4
+
+    # one of the copied sales is deleted before the next run
+    assert managers.sales.delete_sale(ids[0])[0]
+    # the next run drops the stale copies before it moves anything
+    assert archive_sales(conn, keep=2, config=config) == 1
+    assert sale_ids(managers) == ids[1:]
+
+    left = 0
+    for month in ("2024-01", "2024-02", "2024-03"):
+        with sqlite3.connect(archive.archive_path(config["archive_dir"], month)) as copy:
+            left += copy.execute("SELECT COUNT(*) FROM sales WHERE sale_id=?", (ids[0],)).fetchone()[0]
+    assert left == 0
+    assert conn.execute("SELECT COUNT(*) FROM archive_batches WHERE NOT moved").fetchone()[0] == 0
+    assert managers.stocks.check_balances() == []
+
+def test_archive_files_from_before_batches_are_upgraded(managers, config, tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as old:
+        old.execute("CREATE TABLE sales (sale_id INTEGER PRIMARY KEY, stock_id INTEGER NOT NULL, "
+                    "amount_sold INTEGER NOT NULL, sold_at TEXT NOT NULL)")
+        old.execute("INSERT INTO sales VALUES (1, 1, 1, '2024-01-01 00:00:00')")
+    upgraded = archive._open_archive(config, path)
+    assert upgraded.execute("SELECT batch_id FROM sales").fetchall() == [(0,)]
+    upgraded.close()
+    assert managers.products.conn.execute("SELECT moved FROM archive_batches WHERE batch_id = 0").fetchone() == (1,)
@@ -0,0 +1,86 @@
+import threading
+from connection import connect
+from conftest import add_product, add_stock
+from inventory import Managers
+
+def test_basket_that_oversells_is_rolled_back_whole(managers):
+    pid = add_product(managers)
+    first, second = add_stock(managers, pid, 5), add_stock(managers, add_product(managers, "Gadget"), 1)
+    success, message = managers.sales.post_basket([(first, 3), (second, 2)])
+    assert not success
+    assert message == "Line 2: Insufficient stock: 1 available"
+    assert managers.sales.get_all_sales() == []
+    assert managers.stocks.get_on_hand(pid) == 5
+    # later lines see what earlier lines of the same basket took
+    success, message = managers.sales.post_basket([(first, 3), (first, 3)])
+    assert (success, message) == (False, "Line 2: Insufficient stock: 2 available")
+    assert managers.sales.post_basket([(first, 3), (first, 2)])[0]
+    assert managers.stocks.get_on_hand(pid) == 0
+    assert managers.sales.post_sale(first, 1) == (False, "Insufficient stock: 0 available")
+
+def test_balances_stay_exact_through_edits_deletes_and_rebuild(managers):
+    pids = [add_product(managers, f"Product {i}") for i in range(3)]
+    sids = [add_stock(managers, pid, 10) for pid in pids for _ in range(2)]
+    for sid in sids:
+        assert managers.sales.add_sale(sid, 2)[0]
+    assert managers.stocks.check_balances() == []
+
+    sale_ids = [row[0] for row in managers.products.conn.execute("SELECT sale_id FROM sales ORDER BY sale_id")]
+    assert managers.sales.edit_sale(sale_ids[0], 5)[0]
+    assert managers.sales.delete_sale(sale_ids[1])[0]
+    assert managers.stocks.edit_stock(sids[2], 25)[0]
+    assert managers.stocks.delete_stock(sids[3])[0]
+    assert managers.products.delete_product(pids[2])[0]
+    assert managers.stocks.check_balances() == []
+    assert managers.stocks.get_on_hand(pids[0]) == 20 - 5
+    assert managers.stocks.get_on_hand(pids[1]) == 25 - 2
+
+    managers.products.conn.execute("UPDATE inventory_balance SET on_hand = on_hand + 7")
+    managers.products.conn.commit()
+    assert len(managers.stocks.check_balances()) == 2
+    assert managers.stocks.rebuild_balances()[0]
+    assert managers.stocks.check_balances() == []
+
+def test_concurrent_post_sale_never_oversells(config, managers):
+    pid = add_product(managers)
+    sids = [add_stock(managers, pid, 10), add_stock(managers, pid, 10)]
+    tills, attempts = 6, 10
+    start = threading.Barrier(tills)
+    results = []
+
+    def till(index):
+        m = Managers(connect(config))
+        start.wait()
+        for i in range(attempts):
+            results.append(m.sales.post_sale(sids[(index + i) % 2], 1))
+        m.products.conn.close()
+
+    threads = [threading.Thread(target=till, args=(index,)) for index in range(tills)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    sold = [message for success, message in results if success]
+    refused = [message for success, message in results if not success]
+    assert len(sold) == 20
+    assert all(message.startswith("Insufficient stock") for message in refused)
+    assert managers.stocks.get_on_hand(pid) == 0
+    assert managers.products.conn.execute("SELECT SUM(amount_sold) FROM sales").fetchone()[0] == 20
+    assert managers.stocks.check_balances() == []
+
+def test_malformed_basket_lines_are_reported_by_index(managers):
+    sid = add_stock(managers, add_product(managers), 5)
+    assert managers.sales.post_basket([(sid,)]) == (False, "Invalid row")
+    assert managers.sales.post_basket([(sid, 1), (sid, 1, None, 4)]) == (False, "Line 2: Invalid row")
+    assert managers.sales.post_basket([(sid, 1), None]) == (False, "Line 2: Invalid row")
+    assert managers.sales.get_all_sales() == []
+
+def test_post_sales_refuses_only_the_rows_that_oversell(managers):
+    pid = add_product(managers)
+    sid = add_stock(managers, pid, 5)
+    inserted, errors = managers.sales.post_sales([(sid, 3), (sid, 3), (sid,), (sid, 2), (999, 1)])
+    assert inserted == 2
+    assert errors == [(1, "Insufficient stock: 2 available"), (2, "Invalid row"), (4, "No such stock id exists")]
+    assert managers.stocks.get_on_hand(pid) == 0
+    assert not managers.products.conn.in_transaction
@@ -0,0 +1,33 @@
+from conftest import add_product, add_stock
+from importer import import_file
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def test_import_products_csv(managers, tmp_path):
+    path = write(tmp_path, "products.csv", "product_name,product_price\nWidget,2.5\nBad,abc\n")
+    inserted, errors = import_file(managers.products.add_products, "products", path)
+    assert inserted == 1
+    assert errors == [(1, "Invalid price. Please enter a number")]
+
+def test_import_sales_with_blank_sold_at_defaults_to_now(managers, tmp_path):
+    sid = add_stock(managers, add_product(managers), 10)
+    path = write(tmp_path, "sales.csv", f"stock_id,amount_sold,sold_at\n{sid},2,\n{sid},1,   \n{sid},1,2024-01-02 03:04:05\n")
+    assert import_file(managers.sales.add_sales, "sales", path) == (3, [])
+    times = [row[0] for row in managers.products.conn.execute("SELECT sold_at FROM sales ORDER BY sale_id")]
+    assert times[2] == "2024-01-02 03:04:05"
+    assert all(times[:2]) and times[0] > "2024-01-02"
+
+def test_import_sales_without_sold_at_column(managers, tmp_path):
+    sid = add_stock(managers, add_product(managers), 10)
+    path = write(tmp_path, "sales.jsonl", f'{{"stock_id": {sid}, "amount_sold": 3}}\nnot json\n')
+    inserted, errors = import_file(managers.sales.add_sales, "sales", path)
+    assert inserted == 1
+    assert [index for index, _ in errors] == [1]
+
+def test_import_sales_rejects_bad_sold_at(managers, tmp_path):
+    sid = add_stock(managers, add_product(managers), 10)
+    path = write(tmp_path, "sales.csv", f"stock_id,amount_sold,sold_at\n{sid},2,yesterday\n")
+    assert import_file(managers.sales.add_sales, "sales", path) == (0, [(0, "Invalid sale time")])
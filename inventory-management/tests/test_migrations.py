@@ -0,0 +1,50 @@
+from connection import connect
+from inventory import Managers
+
+# the tables as the first release created them, before any migration
+BASELINE_SCHEMA = """
+CREATE TABLE products (
+    product_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_name TEXT NOT NULL,
+    product_price REAL NOT NULL CHECK(product_price > 0)
+);
+CREATE TABLE stocks (
+    stock_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    stock_quantity INTEGER NOT NULL CHECK(stock_quantity >= 0),
+    FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
+);
+CREATE TABLE suppliers (
+    supplier_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    supplier_name TEXT NOT NULL,
+    FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
+);
+CREATE TABLE sales (
+    sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stock_id INTEGER NOT NULL,
+    amount_sold INTEGER NOT NULL,
+    FOREIGN KEY (stock_id) REFERENCES stocks(stock_id) ON DELETE CASCADE
+);
+CREATE TABLE authentication (
+    admin_id TEXT PRIMARY KEY,
+    password TEXT
+);
+INSERT INTO products (product_name, product_price) VALUES ('Widget', 2.5);
+INSERT INTO stocks (product_id, stock_quantity) VALUES (1, 10);
+INSERT INTO sales (stock_id, amount_sold) VALUES (1, 2);
+"""
+
+def test_upgraded_database_stamps_sales_inserted_without_a_time(config):
+    conn = connect(config)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.close()
+    m = Managers(connect(config))
+    conn = m.products.conn
+    conn.execute("INSERT INTO sales (stock_id, amount_sold) VALUES (1, 3)")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM sales WHERE sold_at IS NULL").fetchone() == (0,)
+    for table in ("sales_hourly", "sales_daily", "sales_weekly"):
+        assert conn.execute(f"SELECT SUM(units_sold) FROM {table}").fetchone() == (5,)
+    assert m.stocks.get_on_hand(1) == 5
+    conn.close()
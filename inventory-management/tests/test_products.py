@@ -0,0 +1,46 @@
+from conftest import add_product
+
+def test_edit_with_string_id_invalidates_cached_product(managers):
+    pid = add_product(managers, "Widget", 2.5)
+    assert managers.products.get_product(pid).product_name == "Widget"
+    success, message = managers.products.edit_product(str(pid), "Gadget", 3.0)
+    assert success, message
+    product = managers.products.get_product(pid)
+    assert (product.product_name, product.product_price) == ("Gadget", 3.0)
+
+def test_delete_with_string_id_invalidates_cached_product(managers):
+    pid = add_product(managers)
+    managers.products.get_product(pid)
+    assert managers.products.delete_product(str(pid))[0]
+    assert managers.products.get_product(pid) is None
+
+def test_edit_many_and_delete_many_with_string_ids(managers):
+    first, second = add_product(managers, "First"), add_product(managers, "Second")
+    managers.products.get_products([first, second])
+    managers.products.edit_many([(str(first), "Renamed", 1.0)])
+    assert managers.products.get_product(first).product_name == "Renamed"
+    managers.products.delete_many([str(second)])
+    assert managers.products.get_product(second) is None
+
+def test_add_products_reports_rows_of_the_wrong_size(managers):
+    inserted, errors = managers.products.add_products(
+        [("Widget", 1.0), ("Too", 1.0, "many"), ("Few",), None, ("Bad", "abc")])
+    assert inserted == 1
+    assert errors == [(1, "Invalid row"), (2, "Invalid row"), (3, "Invalid row"),
+                      (4, "Invalid price. Please enter a number")]
+
+def test_other_bulk_adds_report_rows_of_the_wrong_size(managers):
+    pid = add_product(managers)
+    assert managers.stocks.add_stocks([(pid, 5, 1), (pid, 5)]) == (1, [(0, "Invalid row")])
+    assert managers.suppliers.add_suppliers([(pid,), (pid, "Acme")]) == (1, [(0, "Invalid row")])
+    sid = managers.products.conn.execute("SELECT MAX(stock_id) FROM stocks").fetchone()[0]
+    assert managers.sales.add_sales([(sid,), (sid, 1), (sid, 1, None, 4)]) == (1, [(0, "Invalid row"), (2, "Invalid row")])
+
+def test_string_ids_hit_the_cache(managers):
+    pid = add_product(managers)
+    product = managers.products.get_product(pid)
+    hits = managers.products.cache_hits
+    assert managers.products.get_product(str(pid)) is product
+    assert managers.products.get_products([str(pid)]) == {pid: product}
+    assert managers.products.cache_hits == hits + 2
+    assert managers.products.get_product("not a number") is None
@@ -0,0 +1,24 @@
+from connection import connect
+from conftest import add_product
+from inventory import Managers
+
+def test_not_found_edit_and_delete_end_the_transaction(managers, config):
+    conn = managers.products.conn
+    assert managers.products.edit_product(999, "Nothing", 1.0) == (False, "No such product found")
+    assert not conn.in_transaction
+    assert managers.stocks.edit_stock(999, 5) == (False, "No such stock ID exists")
+    assert not conn.in_transaction
+    assert managers.sales.delete_sale(999) == (False, "No such sale id exists")
+    assert not conn.in_transaction
+
+    # another connection can still write straight away
+    other = Managers(connect(dict(config, busy_timeout=100)))
+    try:
+        assert other.products.add_product("Widget", 1.0)[0]
+    finally:
+        other.products.conn.close()
+
+def test_clearing_a_missing_reorder_point_ends_the_transaction(managers):
+    pid = add_product(managers)
+    assert managers.stocks.clear_reorder_point(pid) == (False, "No reorder point set for this product")
+    assert not managers.products.conn.in_transaction
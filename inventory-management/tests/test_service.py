@@ -0,0 +1,57 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from conftest import add_product, add_stock
+from inventory import Managers
+from connection import connect
+from service import InventoryServer
+
+@pytest.fixture
+def server(config):
+    m = Managers(connect(config))
+    m.auth.add_admin("admin", "secret")
+    m.products.conn.close()
+    server = InventoryServer(("127.0.0.1", 0), config, threads=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def call(server, method, path, body=None, token=None):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{server.server_address[1]}{path}", method=method,
+        data=json.dumps(body).encode() if body is not None else None,
+        headers={"Authorization": f"Bearer {token}"} if token else {},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+def login(server):
+    status, payload = call(server, "POST", "/login", {"admin_id": "admin", "password": "secret"})
+    assert status == 200
+    return payload["token"]
+
+def test_ids_beyond_64_bits_are_bad_requests(server):
+    token = login(server)
+    status, payload = call(server, "GET", "/products/99999999999999999999999", token=token)
+    assert status == 400
+    assert not payload["success"]
+    status, _ = call(server, "POST", "/sales", {"stock_id": 10 ** 30, "amount_sold": 1}, token=token)
+    assert status == 400
+    # the worker thread survived
+    assert call(server, "GET", "/products/1", token=token)[0] == 404
+
+def test_sales_batch_refuses_overselling_rows(server, config):
+    m = Managers(connect(config))
+    sid = add_stock(m, add_product(m), 3)
+    m.products.conn.close()
+    status, payload = call(server, "POST", "/sales/batch", {"rows": [
+        {"stock_id": sid, "amount_sold": 2}, {"stock_id": sid, "amount_sold": 2}]}, token=login(server))
+    assert status == 200
+    assert payload == {"inserted": 1, "errors": [{"index": 1, "message": "Insufficient stock: 1 available"}]}
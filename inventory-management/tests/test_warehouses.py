@@ -0,0 +1,27 @@
+import pytest
+from archive import archive_sales
+from conftest import add_product, add_stock
+from warehouses import MAX_SITES, Warehouses
+
+def sites(tmp_path, count):
+    return [(site_id, f"site{site_id}", str(tmp_path / f"site{site_id}.db")) for site_id in range(1, count + 1)]
+
+def test_reader_with_most_sites_can_read_archives(managers, config, tmp_path):
+    sid = add_stock(managers, add_product(managers), 100)
+    managers.sales.add_sales((sid, 1, f"2024-0{month}-15 10:00:00") for month in (1, 2, 3))
+    assert archive_sales(managers.products.conn, keep=1, config=config) == 2
+
+    warehouses = Warehouses(sites(tmp_path, MAX_SITES), config)
+    site = warehouses.site("site1")
+    assert site.sales.add_sale(add_stock(site, add_product(managers, "Gadget"), 5), 2)[0]
+    site.close()
+    reader = warehouses.reader()
+    try:
+        assert len(reader.reports.sales_between()) == 4
+        assert len(reader.reports.sales_between(end="2024-02-28")) == 2
+    finally:
+        reader.products.conn.close()
+
+def test_too_many_sites_are_refused(config, tmp_path):
+    with pytest.raises(ValueError):
+        Warehouses(sites(tmp_path, MAX_SITES + 1), config)
@@ -0,0 +1,18 @@
+from conftest import add_product, add_stock
+from writequeue import WriteQueue
+
+def test_queued_writes_report_their_own_action(managers, config):
+    pid = add_product(managers)
+    sid = add_stock(managers, pid, 3)
+    writes = WriteQueue(config, max_delay_ms=1, synchronous=None)
+    try:
+        assert writes.post_sale(sid, 2).result() == (True, "Sale added successfully")
+        assert writes.post_sale(sid, 2).result() == (False, "Insufficient stock: 1 available")
+        # a database error names the write that hit it
+        writes.conn.execute(
+            "CREATE TEMP TRIGGER refuse_sales BEFORE INSERT ON sales BEGIN SELECT RAISE(ABORT, 'till closed'); END")
+        assert writes.post_sale(sid, 1).result() == (False, "Error posting sale: till closed")
+        assert writes.add_sale(sid, 1).result() == (False, "Error adding sale: till closed")
+    finally:
+        writes.close()
+    assert managers.stocks.get_on_hand(pid) == 1
@@ -0,0 +1,268 @@
+import configparser
+import os
+import re
+from connection import connect, load_config, readonly_uri
+from inventory import Managers, Sale, StockManager
+from migrations import ROLLUPS, _rollup_statements, _version_statements
+
+# Stocks and sales are kept in one SQLite file per warehouse, next to the
+# shared catalog (products, suppliers, reorder points) in the main database.
+# A site's writer only ever writes its own file; the catalog is attached to
+# it read-only. Readers attach every site to the catalog and put TEMP views
+# named stocks, sales, inventory_balance, the rollups and table_versions in
+# front of the real tables, so the managers, the report sections and the
+# exporter read all warehouses merged without changing their SQL. Stock and
+# sales already in the main database count as one more warehouse, "main".
+#
+# Nothing in the app opens warehouses yet: connect(), Managers, the GUI and
+# the service all use the single database. Callers that want sites build a
+# Warehouses themselves, from [warehouse:<name>] sections or a list.
+
+# Site n hands out stock and sale ids from n * ID_BLOCK up, so ids stay unique
+# once the sites are merged and an id tells which site it belongs to.
+ID_BLOCK = 10 ** 12
+MAX_SITE_ID = (2 ** 63 - 1) // ID_BLOCK - 1
+# SQLite's default limit on attached databases; a reader keeps one free for
+# the sales archive that reports.read_archives attaches
+ATTACH_LIMIT = 10
+MAX_SITES = ATTACH_LIMIT - 1
+SITE_SCHEMA_VERSION = 1
+MAIN_SITE = "main"
+
+SITE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS stocks (
+        stock_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        stock_quantity INTEGER NOT NULL CHECK(stock_quantity >= 0)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sales (
+        sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stock_id INTEGER NOT NULL,
+        amount_sold INTEGER NOT NULL,
+        sold_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (stock_id) REFERENCES stocks(stock_id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_stocks_product_id ON stocks(product_id)",
+    "CREATE INDEX IF NOT EXISTS idx_sales_stock_id ON sales(stock_id)",
+    "CREATE INDEX IF NOT EXISTS idx_sales_sold_at ON sales(sold_at)",
+    # this site's share of the on-hand balance; a product gets a row with
+    # its first stock here rather than when it is created in the catalog
+    """
+    CREATE TABLE IF NOT EXISTS inventory_balance (
+        product_id INTEGER PRIMARY KEY,
+        on_hand INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS balance_stock_insert AFTER INSERT ON stocks
+    BEGIN
+        INSERT INTO inventory_balance (product_id, on_hand) VALUES (NEW.product_id, NEW.stock_quantity)
+        ON CONFLICT (product_id) DO UPDATE SET on_hand = on_hand + excluded.on_hand;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS balance_stock_update AFTER UPDATE OF stock_quantity ON stocks
+    WHEN OLD.product_id = NEW.product_id
+    BEGIN
+        UPDATE inventory_balance SET on_hand = on_hand - OLD.stock_quantity + NEW.stock_quantity
+        WHERE product_id = NEW.product_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS balance_stock_delete BEFORE DELETE ON stocks
+    BEGIN
+        UPDATE inventory_balance SET on_hand = on_hand - OLD.stock_quantity
+            + COALESCE((SELECT SUM(amount_sold) FROM sales WHERE stock_id = OLD.stock_id), 0)
+        WHERE product_id = OLD.product_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS balance_sale_insert AFTER INSERT ON sales
+    BEGIN
+        UPDATE inventory_balance SET on_hand = on_hand - NEW.amount_sold
+        WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = NEW.stock_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS balance_sale_update AFTER UPDATE OF stock_id, amount_sold ON sales
+    BEGIN
+        UPDATE inventory_balance SET on_hand = on_hand + OLD.amount_sold
+        WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = OLD.stock_id);
+        UPDATE inventory_balance SET on_hand = on_hand - NEW.amount_sold
+        WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = NEW.stock_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS balance_sale_delete AFTER DELETE ON sales
+    BEGIN
+        UPDATE inventory_balance SET on_hand = on_hand + OLD.amount_sold
+        WHERE product_id = (SELECT product_id FROM stocks WHERE stock_id = OLD.stock_id);
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS table_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+] + _version_statements(("stocks", "sales")) + [
+    statement
+    for table, bucket in ROLLUPS.values()
+    for statement in _rollup_statements(table, bucket, foreign_key=False)
+]
+
+# The catalog has no foreign keys into a site file, so a site's writer
+# checks stock against it with TEMP triggers, the only kind that may look
+# into another database. They fail the way the foreign key would.
+SITE_CHECKS = [
+    """
+    CREATE TEMP TRIGGER IF NOT EXISTS site_stock_product BEFORE INSERT ON main.stocks
+    WHEN NOT EXISTS (SELECT 1 FROM catalog.products WHERE product_id = NEW.product_id)
+    BEGIN
+        SELECT RAISE(ABORT, 'FOREIGN KEY constraint failed');
+    END
+    """,
+    """
+    CREATE TEMP TRIGGER IF NOT EXISTS site_stock_move BEFORE UPDATE OF product_id ON main.stocks
+    WHEN NOT EXISTS (SELECT 1 FROM catalog.products WHERE product_id = NEW.product_id)
+    BEGIN
+        SELECT RAISE(ABORT, 'FOREIGN KEY constraint failed');
+    END
+    """,
+]
+
+def load_sites(path=None, environ=None):
+    # [warehouse:<name>] sections of the config file, each with an id and
+    # the path of the site's database; returns [(id, name, path)]
+    environ = os.environ if environ is None else environ
+    path = path or environ.get("INVENTORY_CONFIG", "inventory.ini")
+    sites = []
+    if os.path.exists(path):
+        parser = configparser.ConfigParser()
+        parser.read(path)
+        for section in parser.sections():
+            if section.startswith("warehouse:"):
+                sites.append((parser.getint(section, "id"), section.split(":", 1)[1], parser.get(section, "path")))
+    return sorted(sites)
+
+def _check_sites(sites):
+    names, ids = set(), set()
+    for site_id, name, _ in sites:
+        if not 1 <= site_id <= MAX_SITE_ID:
+            raise ValueError(f"Warehouse id must be between 1 and {MAX_SITE_ID}: {site_id}")
+        if not re.fullmatch(r"\w+", name) or name == MAIN_SITE:
+            raise ValueError(f"Invalid warehouse name: {name}")
+        if site_id in ids or name in names:
+            raise ValueError(f"Duplicate warehouse: {site_id} {name}")
+        ids.add(site_id)
+        names.add(name)
+    if len(sites) > MAX_SITES:
+        raise ValueError(f"At most {MAX_SITES} warehouses can be attached at once")
+
+def create_site(conn, site_id):
+    # creates the schema of a new site file; ids start in the site's block
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= SITE_SCHEMA_VERSION:
+        return False
+    conn.commit()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for statement in SITE_SCHEMA:
+            cursor.execute(statement)
+        cursor.executemany(
+            "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+            ((table, site_id * ID_BLOCK) for table in ("stocks", "sales"))
+        )
+        cursor.execute(f"PRAGMA user_version = {SITE_SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return True
+
+class Site:
+    # The writer for one warehouse: stock and sales managers on the site's
+    # own file, with the catalog attached read-only for names and checks.
+    def __init__(self, site_id, name, path, config=None):
+        config = dict(config or load_config())
+        self.site_id = site_id
+        self.name = name
+        self.conn = connect(dict(config, path=path))
+        create_site(self.conn, site_id)
+        self.conn.execute("ATTACH DATABASE ? AS catalog", (readonly_uri(config["path"]),))
+        for statement in SITE_CHECKS:
+            self.conn.execute(statement)
+        self.stocks = StockManager(self.conn)
+        self.sales = Sale(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+def _union(sites, select):
+    return "\n    UNION ALL\n    ".join(select.format(schema=schema, name=name) for schema, name in sites)
+
+def federated_views(sites):
+    # sites are (schema, warehouse name) pairs, the main database first
+    views = {
+        "stocks": _union(sites, "SELECT stock_id, product_id, stock_quantity, '{name}' AS warehouse FROM {schema}.stocks"),
+        "sales": _union(sites, "SELECT sale_id, stock_id, amount_sold, sold_at, '{name}' AS warehouse FROM {schema}.sales"),
+        "inventory_balance": f"""
+            SELECT product_id, SUM(on_hand) AS on_hand FROM (
+            {_union(sites, "SELECT product_id, on_hand FROM {schema}.inventory_balance")})
+            GROUP BY product_id""",
+        # the sum of every site's counter still moves whenever one of them does
+        "table_versions": f"""
+            SELECT table_name, SUM(version) AS version FROM (
+            {_union(sites, "SELECT table_name, version FROM {schema}.table_versions")})
+            GROUP BY table_name""",
+    }
+    for table, _ in ROLLUPS.values():
+        views[table] = f"""
+            SELECT product_id, bucket, SUM(units_sold) AS units_sold FROM (
+            {_union(sites, "SELECT product_id, bucket, units_sold FROM {schema}." + table)})
+            GROUP BY product_id, bucket"""
+    return [f"CREATE TEMP VIEW {name} AS {select}" for name, select in views.items()]
+
+class Warehouses:
+    # sites are (id, name, path) as returned by load_sites
+    def __init__(self, sites=None, config=None):
+        self.config = config or load_config()
+        self.sites = load_sites() if sites is None else sorted(sites)
+        _check_sites(self.sites)
+
+    def site(self, name):
+        for site_id, site_name, path in self.sites:
+            if site_name == name:
+                return Site(site_id, site_name, path, self.config)
+        raise ValueError(f"Unknown warehouse: {name}")
+
+    def site_of(self, row_id):
+        # the warehouse a stock or sale id was handed out by
+        block = int(row_id) // ID_BLOCK
+        for site_id, name, _ in self.sites:
+            if site_id == block:
+                return name
+        return MAIN_SITE
+
+    def reader(self):
+        # Managers reading every warehouse at once. The catalog is opened
+        # writable only long enough to attach the sites and create the TEMP
+        # views, then the connection is made read-only like any reader.
+        conn = connect(self.config)
+        Managers(conn)
+        for site_id, name, path in self.sites:
+            # make sure a site that has not been written to yet has tables
+            site = connect(dict(self.config, path=path))
+            create_site(site, site_id)
+            site.close()
+            conn.execute(f"ATTACH DATABASE ? AS site_{site_id}", (readonly_uri(path),))
+        schemas = [("main", MAIN_SITE)] + [(f"site_{site_id}", name) for site_id, name, _ in self.sites]
+        for statement in federated_views(schemas):
+            conn.execute(statement)
+        conn.execute("PRAGMA query_only = ON")
+        return Managers(conn)
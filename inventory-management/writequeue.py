@@ -0,0 +1,166 @@
+import queue
+import sqlite3
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from connection import connect, load_config
+from inventory import Managers, Sale, StockManager
+
+GROUP_COMMIT_MS = 5
+GROUP_COMMIT_RECORDS = 500
+METRICS_WINDOW = 1000
+
+class WriteQueue:
+    # Write-behind queue for sales and stock receipts. Callers get a Future
+    # straight away; one thread collects their writes and commits them
+    # together, every max_delay_ms or max_batch records, whichever comes
+    # first, so one fsync is paid per batch instead of per sale. Each record
+    # runs inside its own savepoint, so a rejected one is rolled back alone,
+    # and every future is completed with the usual (success, message) only
+    # after the batch has committed. The queue's connection commits with
+    # synchronous=FULL by default: a completed future means the write is on
+    # disk, which plain WAL + NORMAL does not promise.
+    def __init__(self, config=None, max_delay_ms=GROUP_COMMIT_MS, max_batch=GROUP_COMMIT_RECORDS, synchronous="full"):
+        config = dict(config or load_config())
+        if synchronous:
+            config["synchronous"] = synchronous
+        managers = Managers(connect(config, check_same_thread=False))
+        self.conn = managers.products.conn
+        self.sales = managers.sales
+        self.stocks = managers.stocks
+        self.cursor = self.conn.cursor()
+        self.max_delay = max_delay_ms / 1000
+        self.max_batch = max_batch
+        self.pending = queue.Queue()
+        self.closed = False
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.records = 0
+        self.max_depth = 0
+        # (records, flush ms, oldest record's wait ms) per recent batch
+        self.recent = deque(maxlen=METRICS_WINDOW)
+        self.thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+        self.thread.start()
+
+    def add_sale(self, sid, amount, sold_at=None):
+        return self._submit(self.sales, self.sales._add_params, (sid, amount, sold_at), self._insert_sale, "adding")
+
+    def post_sale(self, sid, amount, sold_at=None):
+        # like Sale.post_sale: refused when the product is short
+        return self._submit(self.sales, self.sales._add_params, (sid, amount, sold_at), self._post_sale, "posting")
+
+    def add_stock(self, pid, quantity):
+        return self._submit(self.stocks, self.stocks._add_params, (pid, quantity), self._insert_stock, "adding")
+
+    def _insert_sale(self, params):
+        self.cursor.execute(Sale.INSERT_SQL, params)
+        return True, "Sale added successfully"
+
+    def _post_sale(self, params):
+        shortfall = self.sales._post_line(*params)
+        return (False, shortfall) if shortfall else (True, "Sale added successfully")
+
+    def _insert_stock(self, params):
+        self.cursor.execute(StockManager.INSERT_SQL, params)
+        return True, f"Stock added successfully! Stock ID: {self.cursor.lastrowid}"
+
+    def _submit(self, manager, prepare, args, apply, verb):
+        # verb names the write in error messages, as the manager's own
+        # method would
+        future = Future()
+        try:
+            params = prepare(*args)
+        except ValueError as e:
+            # bad input never reaches the queue
+            future.set_result((False, str(e)))
+            return future
+        with self.lock:
+            if self.closed:
+                future.set_result((False, "Write queue is closed"))
+                return future
+            self.pending.put((time.perf_counter(), future, manager, apply, params, verb))
+            self.max_depth = max(self.max_depth, self.pending.qsize())
+        return future
+
+    def _run(self):
+        while True:
+            first = self.pending.get()
+            if first is None:
+                return
+            batch, stop = [first], False
+            deadline = first[0] + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self.pending.get(timeout=timeout) if timeout > 0 else self.pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        results = []
+        try:
+            self.conn.commit()
+            self.cursor.execute("BEGIN IMMEDIATE")
+            for _, _, manager, apply, params, verb in batch:
+                self.cursor.execute("SAVEPOINT record")
+                try:
+                    result = apply(params)
+                except sqlite3.Error as e:
+                    result = False, manager._error_message(e, verb)
+                if not result[0]:
+                    self.cursor.execute("ROLLBACK TO record")
+                self.cursor.execute("RELEASE record")
+                results.append(result)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            # the batch as a whole did not commit, so nothing in it did
+            self.conn.rollback()
+            results = [(False, f"Error committing batch: {e}")] * len(batch)
+        finished = time.perf_counter()
+        with self.lock:
+            self.batches += 1
+            self.records += len(batch)
+            self.recent.append((len(batch), (finished - started) * 1000, (finished - batch[0][0]) * 1000))
+        for (_, future, *_), result in zip(batch, results):
+            future.set_result(result)
+
+    def metrics(self):
+        with self.lock:
+            recent = list(self.recent)
+            metrics = {
+                "batches": self.batches,
+                "records": self.records,
+                "queue_depth": self.pending.qsize(),
+                "max_queue_depth": self.max_depth,
+            }
+        if recent:
+            sizes, flush_ms, wait_ms = zip(*recent)
+            metrics.update({
+                "batch_size_mean": statistics.fmean(sizes),
+                "batch_size_max": max(sizes),
+                "flush_ms_median": statistics.median(flush_ms),
+                "flush_ms_max": max(flush_ms),
+                "wait_ms_median": statistics.median(wait_ms),
+                "wait_ms_max": max(wait_ms),
+            })
+        return metrics
+
+    def close(self):
+        # everything queued before close still gets written
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.pending.put(None)
+        self.thread.join()
+        self.conn.close()